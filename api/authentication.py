@@ -0,0 +1,32 @@
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+from contas.papeis import versao_permissoes
+
+User = get_user_model()
+
+
+# Monta o usuário a partir das claims do token, sem consultar auth_user:
+# só a versão de permissões é lida do cache (em memória). Se a versão do
+# token não for a atual (grupo, loja, nome ou situação do usuário mudaram,
+# ou o usuário foi excluído), volta para a busca no banco.
+class CromaJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        perm_ver = validated_token.get("perm_ver")
+        if user_id is None or perm_ver is None or perm_ver != versao_permissoes(user_id):
+            return super().get_user(validated_token)
+
+        # Instância leve: id, nomes e papel. Não deve ser salva.
+        user = User(
+            pk=user_id,
+            username=validated_token.get("username", ""),
+            first_name=validated_token.get("first_name", ""),
+            last_name=validated_token.get("last_name", ""),
+            is_active=True,
+        )
+        user._state.adding = False
+        user._croma_is_admin = bool(validated_token.get("is_admin"))
+        user._croma_loja_id = validated_token.get("loja_id")
+        return user
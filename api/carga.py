@@ -0,0 +1,275 @@
+import importlib.util
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+import requests
+
+
+# Teste de carga da API do app: cada usuário virtual é um técnico que faz
+# login (LoginAPIView) e repete uma mistura ponderada de operações até o fim
+# do tempo. O resultado traz vazão, latência (p50/p95/p99) e taxa de erro
+# por operação, para dimensionar workers e comparar versões.
+#
+# Roda contra um servidor já no ar (--url) ou sobe um gunicorn/uvicorn local.
+# Cria OS de verdade (marcadas com PREFIXO_OS e canceladas no fim do fluxo):
+# use uma base de teste, como a do seed_demo.
+
+PREFIXO_OS = "[carga]"
+
+OPERACOES = ("lista", "detalhe", "dashboard", "criar", "status")
+MISTURA_PADRAO = "lista=40,detalhe=25,dashboard=15,criar=10,status=10"
+
+PERCENTIS = (50, 95, 99)
+
+# Fluxo das OS criadas pelo teste. EM_EXECUCAO exige técnico responsável,
+# que a API não define, então o fluxo termina em CANCELADA.
+_PROXIMO_STATUS = {
+    "ABERTA": {"status": "EM_ANALISE", "texto_andamento": "Análise (teste de carga)"},
+    "EM_ANALISE": {"status": "CANCELADA", "motivo_cancelamento": "Teste de carga"},
+}
+
+
+class ErroCarga(Exception):
+    pass
+
+
+def ler_mistura(texto: str) -> dict:
+    mistura = {}
+    for parte in filter(None, (p.strip() for p in texto.split(","))):
+        nome, _, peso = parte.partition("=")
+        if nome not in OPERACOES:
+            raise ErroCarga(f"Operação desconhecida: {nome}. Use: {', '.join(OPERACOES)}.")
+        try:
+            mistura[nome] = float(peso or 1)
+        except ValueError:
+            raise ErroCarga(f"Peso inválido para {nome}: {peso}.")
+    if not mistura or sum(mistura.values()) <= 0:
+        raise ErroCarga("A mistura precisa de ao menos uma operação com peso positivo.")
+    return mistura
+
+
+def percentil(ordenados: list, p: float):
+    if not ordenados:
+        return None
+    indice = max(0, min(len(ordenados) - 1, round(p / 100 * len(ordenados) + 0.5) - 1))
+    return ordenados[indice]
+
+
+class Estatisticas:
+    def __init__(self):
+        self._trava = threading.Lock()
+        self.latencias = defaultdict(list)
+        self.erros = defaultdict(int)
+        self.exemplos_erro = {}
+
+    def registrar(self, operacao, segundos, erro=None):
+        with self._trava:
+            self.latencias[operacao].append(segundos * 1000)
+            if erro:
+                self.erros[operacao] += 1
+                self.exemplos_erro.setdefault(operacao, erro)
+
+    def resumo(self, duracao: float) -> dict:
+        operacoes = {}
+        total = total_erros = 0
+        for operacao, tempos in sorted(self.latencias.items()):
+            ordenados = sorted(tempos)
+            erros = self.erros[operacao]
+            operacoes[operacao] = {
+                "requisicoes": len(ordenados),
+                "rps": round(len(ordenados) / duracao, 2),
+                "erros": erros,
+                "taxa_erro": round(erros / len(ordenados), 4),
+                **{f"p{p}_ms": round(percentil(ordenados, p), 1) for p in PERCENTIS},
+                "max_ms": round(ordenados[-1], 1),
+            }
+            if operacao in self.exemplos_erro:
+                operacoes[operacao]["exemplo_erro"] = self.exemplos_erro[operacao]
+            total += len(ordenados)
+            total_erros += erros
+
+        todos = sorted(t for tempos in self.latencias.values() for t in tempos)
+        return {
+            "duracao_s": round(duracao, 1),
+            "requisicoes": total,
+            "rps": round(total / duracao, 2) if duracao else 0,
+            "erros": total_erros,
+            "taxa_erro": round(total_erros / total, 4) if total else 0,
+            **{f"p{p}_ms": round(percentil(todos, p), 1) for p in PERCENTIS if todos},
+            "operacoes": operacoes,
+        }
+
+
+# --- usuário virtual ---------------------------------------------------------
+
+class UsuarioVirtual:
+    def __init__(self, url_base, username, senha, estatisticas, timeout=30):
+        self.url_base = url_base.rstrip("/")
+        self.username = username
+        self.senha = senha
+        self.estatisticas = estatisticas
+        self.timeout = timeout
+        self.sessao = requests.Session()
+        self.ids_vistos = []
+        self.minhas_os = {}   # id -> status atual
+        self.lojas = []
+
+    def _chamar(self, operacao, metodo, caminho, esperado=(200,), **kwargs):
+        inicio = time.perf_counter()
+        erro = None
+        resposta = None
+        try:
+            resposta = self.sessao.request(metodo, self.url_base + caminho, timeout=self.timeout, **kwargs)
+            if resposta.status_code not in esperado:
+                erro = f"HTTP {resposta.status_code}: {resposta.text[:200]}"
+        except requests.RequestException as e:
+            erro = f"{type(e).__name__}: {e}"
+        self.estatisticas.registrar(operacao, time.perf_counter() - inicio, erro)
+        return resposta if erro is None else None
+
+    def entrar(self) -> bool:
+        resposta = self._chamar("login", "POST", "/api/auth/login/", json={
+            "username": self.username, "password": self.senha,
+        })
+        if resposta is None:
+            return False
+        self.sessao.headers["Authorization"] = f"Bearer {resposta.json()['access']}"
+        lojas = self._chamar("lojas", "GET", "/api/lojas/")
+        if lojas is not None:
+            self.lojas = [loja["id"] for loja in lojas.json()]
+        return True
+
+    def lista(self):
+        resposta = self._chamar("lista", "GET", "/api/os/", params={"limite": 20})
+        if resposta is not None:
+            ids = [os["id"] for os in resposta.json().get("resultados", [])]
+            self.ids_vistos = (ids + self.ids_vistos)[:200]
+
+    def detalhe(self):
+        if not self.ids_vistos:
+            return self.lista()
+        self._chamar("detalhe", "GET", f"/api/os/{random.choice(self.ids_vistos)}/")
+
+    def dashboard(self):
+        self._chamar("dashboard", "GET", "/api/dashboard/")
+
+    def criar(self):
+        dados = {"descricao_problema": f"{PREFIXO_OS} OS de teste ({self.username})", "prioridade": "MEDIA"}
+        if self.lojas:
+            dados["loja_id"] = random.choice(self.lojas)
+        resposta = self._chamar("criar", "POST", "/api/os/", esperado=(201,), json=dados)
+        if resposta is not None:
+            self.minhas_os[resposta.json()["id"]] = "ABERTA"
+
+    def status(self):
+        pendentes = [pk for pk, status in self.minhas_os.items() if status in _PROXIMO_STATUS]
+        if not pendentes:
+            return self.criar()
+        pk = random.choice(pendentes)
+        dados = _PROXIMO_STATUS[self.minhas_os[pk]]
+        if self._chamar("status", "PUT", f"/api/os/{pk}/", json=dados) is not None:
+            self.minhas_os[pk] = dados["status"]
+
+    def executar(self, mistura, fim, pensar=0.0):
+        if not self.entrar():
+            return
+        operacoes, pesos = zip(*mistura.items())
+        while time.monotonic() < fim:
+            getattr(self, random.choices(operacoes, weights=pesos)[0])()
+            if pensar:
+                time.sleep(random.uniform(0, 2 * pensar))
+
+
+def executar_carga(url_base, credenciais, mistura, duracao, rampa=0.0, pensar=0.0) -> dict:
+    estatisticas = Estatisticas()
+    inicio = time.monotonic()
+    fim = inicio + rampa + duracao
+    threads = []
+    for i, (username, senha) in enumerate(credenciais):
+        usuario = UsuarioVirtual(url_base, username, senha, estatisticas)
+        atraso = rampa * i / max(1, len(credenciais))
+        thread = threading.Thread(
+            target=lambda u=usuario, a=atraso: (time.sleep(a), u.executar(mistura, fim, pensar)),
+            daemon=True,
+        )
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+    return estatisticas.resumo(time.monotonic() - inicio)
+
+
+# Vazão menor ou p95 maior que a base além da tolerância, ou mais erros.
+# Login e lojas (uma vez por usuário, na rampa) têm amostras demais pequenas.
+def regressoes(atual: dict, base: dict, tolerancia=0.2) -> list[str]:
+    problemas = []
+    for nome, medida in atual["operacoes"].items():
+        anterior = base.get("operacoes", {}).get(nome)
+        if not anterior or nome not in OPERACOES:
+            continue
+        if medida["rps"] < anterior["rps"] * (1 - tolerancia):
+            problemas.append(f"{nome}: vazão {anterior['rps']} -> {medida['rps']} req/s")
+        if medida["p95_ms"] > anterior["p95_ms"] * (1 + tolerancia):
+            problemas.append(f"{nome}: p95 {anterior['p95_ms']} -> {medida['p95_ms']} ms")
+        if medida["taxa_erro"] > anterior["taxa_erro"]:
+            problemas.append(f"{nome}: erros {anterior['taxa_erro']:.2%} -> {medida['taxa_erro']:.2%}")
+    return problemas
+
+
+# --- servidor local ----------------------------------------------------------
+
+def _porta_aberta(host, porta) -> bool:
+    with socket.socket() as s:
+        s.settimeout(0.5)
+        return s.connect_ex((host, porta)) == 0
+
+
+def comando_servidor(tipo: str, url_base: str, workers: int, threads: int) -> list[str]:
+    partes = urlsplit(url_base)
+    endereco = f"{partes.hostname}:{partes.port or 80}"
+    if tipo == "gunicorn":
+        return [
+            sys.executable, "-m", "gunicorn", "core.wsgi", "--bind", endereco,
+            "--workers", str(workers), "--threads", str(threads), "--log-level", "warning",
+        ]
+    if tipo == "uvicorn":
+        return [
+            sys.executable, "-m", "uvicorn", "core.asgi:application",
+            "--host", partes.hostname, "--port", str(partes.port or 80),
+            "--workers", str(workers), "--log-level", "warning",
+        ]
+    raise ErroCarga(f"Servidor desconhecido: {tipo}.")
+
+
+# Sobe o servidor em segundo plano e espera a porta abrir; devolve o processo
+def iniciar_servidor(tipo, url_base, workers=2, threads=1, espera=30) -> subprocess.Popen:
+    if importlib.util.find_spec(tipo) is None:
+        raise ErroCarga(f"{tipo} não está instalado neste ambiente.")
+    partes = urlsplit(url_base)
+    if _porta_aberta(partes.hostname, partes.port or 80):
+        raise ErroCarga(f"Já existe algo escutando em {partes.hostname}:{partes.port}.")
+
+    processo = subprocess.Popen(comando_servidor(tipo, url_base, workers, threads))
+    limite = time.monotonic() + espera
+    while time.monotonic() < limite:
+        if processo.poll() is not None:
+            raise ErroCarga(f"{tipo} encerrou ao iniciar (código {processo.returncode}).")
+        if _porta_aberta(partes.hostname, partes.port or 80):
+            return processo
+        time.sleep(0.2)
+    parar_servidor(processo)
+    raise ErroCarga(f"{tipo} não respondeu em {espera}s.")
+
+
+def parar_servidor(processo: subprocess.Popen) -> None:
+    processo.terminate()
+    try:
+        processo.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        processo.kill()
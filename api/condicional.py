@@ -0,0 +1,37 @@
+import hashlib
+from functools import wraps
+
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+
+def gerar_etag(*partes) -> str:
+    return hashlib.sha1("|".join(str(p) for p in partes).encode()).hexdigest()
+
+
+# GET condicional para métodos de APIView.
+# "validador(request, *args, **kwargs)" devolve (etag, ultima_alteracao); se a
+# requisição trouxer os mesmos validadores, responde 304 sem executar a view.
+def condicional(validador):
+    def decorator(metodo):
+        @wraps(metodo)
+        def _wrapped(self, request, *args, **kwargs):
+            etag, ultima_alteracao = validador(request, *args, **kwargs)
+            etag = quote_etag(etag) if etag else None
+            last_modified = int(ultima_alteracao.timestamp()) if ultima_alteracao else None
+
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = metodo(self, request, *args, **kwargs)
+                if response.status_code == 200:
+                    if etag:
+                        response.headers.setdefault("ETag", etag)
+                    if last_modified:
+                        response.headers.setdefault("Last-Modified", http_date(last_modified))
+
+            # Respostas dependem do usuário: o app sempre revalida
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ["Authorization"])
+            return response
+        return _wrapped
+    return decorator
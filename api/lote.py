@@ -0,0 +1,240 @@
+import re
+from decimal import Decimal, InvalidOperation
+
+from django.db import IntegrityError, transaction
+
+from contas.papeis import loja_do_usuario
+from core.versoes import nova_versao
+from estoque.models import Loja
+from ordens.models import OrdemServico, AndamentoOS, CategoriaProblema
+from .models import OperacaoLote
+
+
+MAX_OPERACOES = 200
+LIMITE_CUSTO = Decimal(10) ** 8  # OrdemServico.custo_total: 8 dígitos inteiros
+
+
+class OperacaoInvalida(Exception):
+    pass
+
+
+class _ContextoLote:
+    def __init__(self, user, is_admin, ordens, chaves_os):
+        self.user = user
+        self.is_admin = is_admin
+        self.ordens = ordens          # id -> OrdemServico já carregada
+        self.chaves_os = chaves_os    # chave de "criar" -> id da OS criada
+        self.andamentos = []          # inseridos de uma vez no final (bulk_create)
+
+    def obter_os(self, op):
+        os_id = op.get("os_id")
+        if not os_id and op.get("os_chave"):
+            os_id = self.chaves_os.get(op["os_chave"])
+        try:
+            os_obj = self.ordens.get(int(os_id))
+        except (TypeError, ValueError):
+            os_obj = None
+        if os_obj is None:
+            raise OperacaoInvalida("OS não encontrada.")
+        return os_obj
+
+    def exigir_responsavel(self, os_obj):
+        if not (self.is_admin or os_obj.tecnico_responsavel_id == self.user.pk):
+            raise OperacaoInvalida("Acesso negado.")
+
+
+def _inteiro(valor, mensagem):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        raise OperacaoInvalida(mensagem)
+
+
+def _op_criar(ctx, op):
+    descricao = op.get("descricao_problema")
+    if not descricao:
+        raise OperacaoInvalida("Descrição do problema é obrigatória.")
+
+    loja_id = op.get("loja_id") or loja_do_usuario(ctx.user)
+    if loja_id:
+        loja_id = _inteiro(loja_id, "Loja não identificada.")
+    if not loja_id or not Loja.objects.filter(pk=loja_id).exists():
+        raise OperacaoInvalida("Loja não identificada.")
+
+    categoria_id = op.get("categoria_id")
+    if categoria_id:
+        categoria_id = _inteiro(categoria_id, "Categoria não encontrada.")
+    if categoria_id and not CategoriaProblema.objects.filter(pk=categoria_id).exists():
+        raise OperacaoInvalida("Categoria não encontrada.")
+
+    prioridade = op.get("prioridade", "MEDIA")
+    if prioridade not in dict(OrdemServico.PRIORIDADE_CHOICES):
+        raise OperacaoInvalida(f"Prioridade inválida: {prioridade}.")
+
+    os_obj = OrdemServico.objects.create(
+        loja_id=loja_id,
+        solicitante=ctx.user,
+        descricao_problema=descricao,
+        prioridade=prioridade,
+        categoria_id=categoria_id or None,
+        observacoes=op.get("observacoes", ""),
+    )
+    ctx.ordens[os_obj.pk] = os_obj
+    if op.get("chave"):
+        ctx.chaves_os[op["chave"]] = os_obj.pk
+    return os_obj
+
+
+def _op_status(ctx, op):
+    os_obj = ctx.obter_os(op)
+    ctx.exigir_responsavel(os_obj)
+
+    novo_status = op.get("status")
+    anteriores = (os_obj.solucao, os_obj.motivo_cancelamento)
+    if novo_status == "FINALIZADA":
+        os_obj.solucao = op.get("solucao", os_obj.solucao)
+    if novo_status == "CANCELADA":
+        os_obj.motivo_cancelamento = op.get("motivo_cancelamento", os_obj.motivo_cancelamento)
+
+    try:
+        andamento = os_obj.mudar_status(
+            novo_status,
+            autor=ctx.user,
+            texto_andamento=op.get("texto_andamento", ""),
+            salvar_andamento=False,
+        )
+    except Exception:
+        # Não deixa valores da operação recusada vazarem para as próximas
+        os_obj.solucao, os_obj.motivo_cancelamento = anteriores
+        raise
+    ctx.andamentos.append(andamento)
+    return os_obj
+
+
+def _op_andamento(ctx, op):
+    os_obj = ctx.obter_os(op)
+    if not (ctx.is_admin or ctx.user.pk in (os_obj.solicitante_id, os_obj.tecnico_responsavel_id)):
+        raise OperacaoInvalida("Acesso negado.")
+
+    texto = (op.get("texto") or "").strip()
+    if not texto:
+        raise OperacaoInvalida("Texto do andamento é obrigatório.")
+
+    visibilidade = op.get("visibilidade", "PUBLICO") if ctx.is_admin else "PUBLICO"
+    if visibilidade not in dict(AndamentoOS.VISIBILIDADE_CHOICES):
+        raise OperacaoInvalida(f"Visibilidade inválida: {visibilidade}.")
+
+    ctx.andamentos.append(AndamentoOS(os=os_obj, autor=ctx.user, texto=texto, visibilidade=visibilidade))
+    return os_obj
+
+
+def _op_custo(ctx, op):
+    os_obj = ctx.obter_os(op)
+    ctx.exigir_responsavel(os_obj)
+
+    valor = op.get("custo_total")
+    custo = None
+    if valor not in (None, ""):
+        # NaN e valores fora de DecimalField(max_digits=10, decimal_places=2)
+        # passariam pelo quantize e só falhariam no save()
+        try:
+            custo = Decimal(str(valor))
+            custo = custo.quantize(Decimal("0.01")) if custo.is_finite() else None
+        except InvalidOperation:
+            custo = None
+        if custo is None or abs(custo) >= LIMITE_CUSTO:
+            raise OperacaoInvalida(f"Custo inválido: {valor}.")
+    os_obj.custo_total = custo
+    os_obj.save(update_fields=["custo_total", "atualizado_em"])
+    return os_obj
+
+
+OPERACOES = {
+    "criar": _op_criar,
+    "status": _op_status,
+    "andamento": _op_andamento,
+    "custo": _op_custo,
+}
+
+
+def _aplicadas(user, chaves) -> dict:
+    return dict(OperacaoLote.objects.filter(usuario=user, chave__in=chaves).values_list("chave", "resultado"))
+
+
+# Aplica a fila offline do app em uma única transação.
+# Cada operação roda em um savepoint próprio: falhas são reportadas por item
+# sem desfazer as demais. Operações com "chave" já aplicada não são repetidas.
+def processar_lote(user, is_admin: bool, operacoes: list) -> tuple[list, set]:
+    if not isinstance(operacoes, list):
+        raise OperacaoInvalida("Informe a lista de operações.")
+    if len(operacoes) > MAX_OPERACOES:
+        raise OperacaoInvalida(f"Máximo de {MAX_OPERACOES} operações por lote.")
+
+    try:
+        resultados, alteradas, andamentos = _aplicar_lote(user, is_admin, operacoes)
+    except IntegrityError:
+        # O mesmo lote reenviado em paralelo: a outra requisição gravou as
+        # chaves antes (unicidade usuario+chave) e esta transação foi desfeita
+        # inteira. Refeito, as operações dela voltam como repetidas.
+        resultados, alteradas, andamentos = _aplicar_lote(user, is_admin, operacoes)
+
+    if andamentos:
+        # bulk_create não dispara post_save
+        nova_versao("andamentos")
+
+    return resultados, alteradas
+
+
+def _aplicar_lote(user, is_admin, operacoes) -> tuple[list, set, bool]:
+    chaves = [op.get("chave") for op in operacoes if isinstance(op, dict) and op.get("chave")]
+    os_ids = set()
+    for op in operacoes:
+        if isinstance(op, dict) and re.fullmatch(r"[0-9]+", str(op.get("os_id", ""))):
+            os_ids.add(int(op["os_id"]))
+
+    resultados = []
+    with transaction.atomic():
+        aplicadas = _aplicadas(user, chaves)
+        chaves_os = {ch: r["os_id"] for ch, r in aplicadas.items() if r.get("os_id")}
+        os_ids.update(chaves_os.values())
+
+        ctx = _ContextoLote(
+            user, is_admin,
+            ordens=OrdemServico.objects.in_bulk(os_ids),
+            chaves_os=chaves_os,
+        )
+        novas = []
+        alteradas = set()
+
+        for indice, op in enumerate(operacoes):
+            if not isinstance(op, dict):
+                resultados.append({"indice": indice, "ok": False, "erro": "Operação inválida."})
+                continue
+
+            chave = op.get("chave")
+            if chave and chave in aplicadas:
+                resultados.append({**aplicadas[chave], "indice": indice, "repetida": True})
+                continue
+
+            tipo = op.get("op")
+            resultado = {"indice": indice, "op": tipo, "chave": chave}
+            try:
+                if tipo not in OPERACOES:
+                    raise OperacaoInvalida(f"Operação desconhecida: {tipo}.")
+                with transaction.atomic():
+                    os_obj = OPERACOES[tipo](ctx, op)
+            except (OperacaoInvalida, OrdemServico.TransicaoInvalida, OrdemServico.CamposObrigatorios) as e:
+                resultados.append({**resultado, "ok": False, "erro": str(e)})
+                continue
+
+            resultado.update({"ok": True, "os_id": os_obj.pk})
+            resultados.append(resultado)
+            alteradas.add(os_obj.pk)
+            if chave:
+                aplicadas[chave] = resultado
+                novas.append(OperacaoLote(usuario=user, chave=chave, resultado=resultado))
+
+        AndamentoOS.objects.bulk_create(ctx.andamentos)
+        OperacaoLote.objects.bulk_create(novas)
+
+    return resultados, alteradas, bool(ctx.andamentos)
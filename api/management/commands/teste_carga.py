@@ -0,0 +1,107 @@
+import json
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from api.carga import (
+    MISTURA_PADRAO, PERCENTIS, ErroCarga, executar_carga, iniciar_servidor, ler_mistura, parar_servidor,
+    regressoes,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Teste de carga da API do app (login JWT + lista, detalhe, dashboard, criação e mudança de status). "
+        "Mostra vazão, p50/p95/p99 e taxa de erro por operação"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8765", help="Endereço do servidor")
+        parser.add_argument("--servidor", choices=("gunicorn", "uvicorn"), help="Sobe este servidor local em --url")
+        parser.add_argument("--workers", type=int, default=2, help="Workers do servidor local")
+        parser.add_argument("--threads", type=int, default=1, help="Threads por worker (gunicorn)")
+        parser.add_argument("--usuarios", type=int, default=10, help="Técnicos simultâneos")
+        parser.add_argument("--prefixo", default="tecnico_demo", help="Prefixo dos usernames usados (ver seed_demo)")
+        parser.add_argument("--senha", default="123456")
+        parser.add_argument("--duracao", type=float, default=30, help="Segundos de carga, após a rampa")
+        parser.add_argument("--rampa", type=float, default=5, help="Segundos para iniciar todos os usuários")
+        parser.add_argument("--pensar", type=float, default=0, help="Pausa média entre requisições, em segundos")
+        parser.add_argument("--mistura", default=MISTURA_PADRAO, help="Pesos por operação")
+        parser.add_argument("--saida", help="Grava o resultado em JSON")
+        parser.add_argument("--comparar", help="JSON de uma execução anterior (linha de base)")
+        parser.add_argument("--tolerancia", type=float, default=0.2, help="Piora aceita (0.2 = 20%%)")
+
+    def handle(self, *args, **opts):
+        if opts["usuarios"] < 1 or opts["duracao"] <= 0:
+            raise CommandError("--usuarios e --duracao devem ser positivos.")
+        try:
+            mistura = ler_mistura(opts["mistura"])
+        except ErroCarga as e:
+            raise CommandError(str(e))
+
+        base = None
+        if opts["comparar"]:
+            try:
+                base = json.loads(Path(opts["comparar"]).read_text(encoding="utf-8"))
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Não foi possível ler a linha de base: {e}")
+
+        # Mais usuários virtuais que contas: as contas são reaproveitadas
+        usernames = list(
+            User.objects.filter(username__startswith=opts["prefixo"], is_active=True)
+            .order_by("username").values_list("username", flat=True)[:opts["usuarios"]]
+        )
+        if not usernames:
+            raise CommandError(f"Nenhum usuário ativo com o prefixo '{opts['prefixo']}'. Rode o seed_demo antes.")
+        credenciais = [(usernames[i % len(usernames)], opts["senha"]) for i in range(opts["usuarios"])]
+
+        processo = None
+        try:
+            if opts["servidor"]:
+                processo = iniciar_servidor(opts["servidor"], opts["url"], opts["workers"], opts["threads"])
+                self.stderr.write(f"{opts['servidor']} iniciado em {opts['url']} ({opts['workers']} workers)")
+            self.stderr.write(
+                f"{opts['usuarios']} usuários por {opts['duracao']:.0f}s (rampa de {opts['rampa']:.0f}s)..."
+            )
+            resultado = executar_carga(
+                opts["url"], credenciais, mistura, opts["duracao"], rampa=opts["rampa"], pensar=opts["pensar"],
+            )
+        except ErroCarga as e:
+            raise CommandError(str(e))
+        finally:
+            if processo is not None:
+                parar_servidor(processo)
+
+        resultado["configuracao"] = {
+            "url": opts["url"], "servidor": opts["servidor"], "workers": opts["workers"],
+            "threads": opts["threads"], "usuarios": opts["usuarios"], "mistura": mistura,
+        }
+        self._tabela(resultado)
+
+        if opts["saida"]:
+            Path(opts["saida"]).write_text(json.dumps(resultado, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+            self.stderr.write(self.style.SUCCESS(f"Resultado gravado em {opts['saida']}"))
+
+        if base is not None:
+            problemas = regressoes(resultado, base, opts["tolerancia"])
+            if problemas:
+                raise CommandError("Regressão em:\n  " + "\n  ".join(problemas))
+            self.stderr.write(self.style.SUCCESS("Sem regressões em relação à linha de base."))
+
+    def _tabela(self, resultado):
+        colunas = ["operação", "req", "req/s", "erros", *(f"p{p} ms" for p in PERCENTIS), "máx ms"]
+        linhas = [
+            [nome, m["requisicoes"], m["rps"], f"{m['taxa_erro']:.1%}", *(m[f"p{p}_ms"] for p in PERCENTIS), m["max_ms"]]
+            for nome, m in resultado["operacoes"].items()
+        ]
+        larguras = [max(len(str(c)) for c in coluna) for coluna in zip(colunas, *linhas)]
+        for linha in [colunas, *linhas]:
+            self.stdout.write("  ".join(str(c).rjust(l) for c, l in zip(linha, larguras)))
+        self.stdout.write(
+            f"\nTotal: {resultado['requisicoes']} requisições, {resultado['rps']} req/s, "
+            f"erros {resultado['taxa_erro']:.1%}, p95 {resultado.get('p95_ms', '-')} ms"
+        )
+        for nome, m in resultado["operacoes"].items():
+            if "exemplo_erro" in m:
+                self.stdout.write(self.style.WARNING(f"{nome}: {m['exemplo_erro']}"))
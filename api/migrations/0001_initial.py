@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OperacaoLote',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chave', models.CharField(max_length=100)),
+                ('resultado', models.JSONField(default=dict)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='operacoes_lote', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Operação em lote',
+                'verbose_name_plural': 'Operações em lote',
+                'constraints': [models.UniqueConstraint(fields=('usuario', 'chave'), name='uniq_operacao_lote_usuario_chave')],
+            },
+        ),
+    ]
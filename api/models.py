@@ -1,3 +1,22 @@
 from django.db import models
+from django.contrib.auth import get_user_model
 
-# Create your models here.
+User = get_user_model()
+
+
+# Operações do lote offline já aplicadas (idempotência por usuário + chave)
+class OperacaoLote(models.Model):
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name="operacoes_lote")
+    chave = models.CharField(max_length=100)
+    resultado = models.JSONField(default=dict)
+    criado_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Operação em lote"
+        verbose_name_plural = "Operações em lote"
+        constraints = [
+            models.UniqueConstraint(fields=["usuario", "chave"], name="uniq_operacao_lote_usuario_chave")
+        ]
+
+    def __str__(self):
+        return f"{self.usuario} | {self.chave}"
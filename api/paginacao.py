@@ -0,0 +1,53 @@
+import base64
+import binascii
+from datetime import datetime
+
+from django.db.models import Q
+
+
+LIMITE_PADRAO = 50
+LIMITE_MAXIMO = 200
+
+
+class CursorInvalido(Exception):
+    pass
+
+
+# Cursor opaco: (data_abertura, id) do último item entregue
+def codificar_cursor(data_abertura: datetime, pk: int) -> str:
+    bruto = f"{data_abertura.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(bruto).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        data_txt, pk_txt = bruto.split("|", 1)
+        return datetime.fromisoformat(data_txt), int(pk_txt)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        raise CursorInvalido("Cursor inválido.")
+
+
+def ler_limite(valor) -> int:
+    try:
+        limite = int(valor) if valor else LIMITE_PADRAO
+    except (TypeError, ValueError):
+        limite = LIMITE_PADRAO
+    return max(1, min(limite, LIMITE_MAXIMO))
+
+
+# Paginação por keyset em (data_abertura, id), do mais recente para o mais antigo.
+# O custo de cada página não depende da profundidade (sem OFFSET).
+def paginar_keyset(qs, cursor: str | None, limite: int):
+    qs = qs.order_by("-data_abertura", "-id")
+    if cursor:
+        data, pk = decodificar_cursor(cursor)
+        qs = qs.filter(Q(data_abertura__lt=data) | Q(data_abertura=data, id__lt=pk))
+
+    itens = list(qs[:limite + 1])
+    proximo = None
+    if len(itens) > limite:
+        itens = itens[:limite]
+        ultimo = itens[-1]
+        proximo = codificar_cursor(ultimo.data_abertura, ultimo.id)
+    return itens, proximo
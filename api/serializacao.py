@@ -0,0 +1,92 @@
+from ordens.models import OrdemServico
+
+
+class CamposInvalidos(Exception):
+    pass
+
+
+def _nome_usuario(user):
+    return user.get_full_name() or user.username
+
+
+def _loja(os):
+    return {"id": os.loja_id, "nome": os.loja.nome} if os.loja_id else None
+
+
+def _tecnico(os):
+    return _nome_usuario(os.tecnico_responsavel) if os.tecnico_responsavel_id else None
+
+
+def _data(campo):
+    def _valor(os):
+        valor = getattr(os, campo)
+        return valor.isoformat() if valor else None
+    return _valor
+
+
+def _texto(campo):
+    return lambda os: getattr(os, campo)
+
+
+_USUARIO = ["username", "first_name", "last_name"]
+
+# Campo da API -> (colunas carregadas via .only(), função que monta o valor)
+CAMPOS_OS = {
+    "id": (["id"], lambda os: os.id),
+    "loja": (["loja", "loja__nome"], _loja),
+    "solicitante": (
+        ["solicitante"] + [f"solicitante__{c}" for c in _USUARIO],
+        lambda os: _nome_usuario(os.solicitante),
+    ),
+    "tecnico_responsavel": (
+        ["tecnico_responsavel"] + [f"tecnico_responsavel__{c}" for c in _USUARIO],
+        _tecnico,
+    ),
+    "categoria": (["categoria", "categoria__nome"], lambda os: os.categoria.nome if os.categoria_id else None),
+    "descricao_problema": (["descricao_problema"], _texto("descricao_problema")),
+    "prioridade": (["prioridade"], _texto("prioridade")),
+    "status": (["status"], _texto("status")),
+    "observacoes": (["observacoes"], _texto("observacoes")),
+    "solucao": (["solucao"], _texto("solucao")),
+    "motivo_cancelamento": (["motivo_cancelamento"], _texto("motivo_cancelamento")),
+    "custo_total": (["custo_total"], lambda os: str(os.custo_total) if os.custo_total else None),
+    "data_abertura": (["data_abertura"], _data("data_abertura")),
+    "data_fechamento": (["data_fechamento"], _data("data_fechamento")),
+    "atualizado_em": (["atualizado_em"], _data("atualizado_em")),
+}
+
+# Representação compacta das telas de listagem (sem os campos de texto longo)
+CAMPOS_LISTA = (
+    "id", "loja", "tecnico_responsavel", "categoria", "prioridade", "status",
+    "data_abertura", "data_fechamento", "atualizado_em",
+)
+
+_RELACOES = ("loja", "solicitante", "tecnico_responsavel", "categoria")
+
+
+# Lê "?fields=id,status,loja"; sem o parâmetro, usa o padrão da tela
+def ler_campos(valor: str | None, padrao=tuple(CAMPOS_OS)) -> tuple:
+    if not valor:
+        return tuple(padrao)
+    campos = tuple(dict.fromkeys(c.strip() for c in valor.split(",") if c.strip()))
+    desconhecidos = [c for c in campos if c not in CAMPOS_OS]
+    if desconhecidos:
+        raise CamposInvalidos(f"Campo(s) desconhecido(s): {', '.join(desconhecidos)}.")
+    return campos or tuple(padrao)
+
+
+# Queryset que carrega apenas as colunas necessárias para os campos pedidos.
+# id, data_abertura (paginação por keyset) e os ids de solicitante/técnico
+# (checagem de acesso) sempre entram.
+def consulta_os(campos, qs=None):
+    qs = OrdemServico.objects.all() if qs is None else qs
+    colunas = {"id", "data_abertura", "solicitante", "tecnico_responsavel"}
+    for campo in campos:
+        colunas.update(CAMPOS_OS[campo][0])
+    relacoes = [r for r in _RELACOES if any(c.startswith(f"{r}__") for c in colunas)]
+    return qs.select_related(*relacoes).only(*colunas)
+
+
+def serializar_os(os, campos=None):
+    campos = campos or CAMPOS_OS
+    return {campo: CAMPOS_OS[campo][1](os) for campo in campos}
@@ -0,0 +1,74 @@
+import base64
+import binascii
+from datetime import datetime, timedelta
+
+from django.utils import timezone
+
+from ordens.models import AndamentoOS, OrdemServico, OSExcluida
+from .serializacao import CAMPOS_OS, consulta_os
+
+
+# Margem para não perder registros de transações que ainda não tinham
+# sido confirmadas no instante em que o token foi emitido
+MARGEM_SYNC = timedelta(seconds=5)
+
+
+class TokenSyncInvalido(Exception):
+    pass
+
+
+def gerar_token_sync(instante: datetime) -> str:
+    bruto = (instante - MARGEM_SYNC).isoformat().encode()
+    return base64.urlsafe_b64encode(bruto).decode().rstrip("=")
+
+
+def ler_token_sync(token: str) -> datetime:
+    try:
+        bruto = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        instante = datetime.fromisoformat(bruto)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        raise TokenSyncInvalido("Token de sincronização inválido.")
+    if timezone.is_naive(instante):
+        raise TokenSyncInvalido("Token de sincronização inválido.")
+    return instante
+
+
+def serializar_andamento(andamento):
+    return {
+        "id": andamento.id,
+        "os_id": andamento.os_id,
+        "autor": andamento.autor.get_full_name() or andamento.autor.username,
+        "criado_em": andamento.criado_em.isoformat(),
+        "texto": andamento.texto,
+        "visibilidade": andamento.visibilidade,
+        "status_de": andamento.status_de,
+        "status_para": andamento.status_para,
+    }
+
+
+# Retorna OS, andamentos e exclusões posteriores a "desde" (tudo, se desde=None).
+# "Exclusões" são as OS que o aparelho deve remover: excluídas ou, para o
+# técnico, reatribuídas a outro (a menos que tenham voltado para ele).
+def coletar_alteracoes(user, is_admin: bool, desde: datetime | None, campos=tuple(CAMPOS_OS)):
+    ordens = consulta_os(campos).order_by("atualizado_em", "id")
+    andamentos = AndamentoOS.objects.select_related("autor").order_by("criado_em", "id")
+    excluidas = OSExcluida.objects.order_by("excluida_em")
+
+    if is_admin:
+        excluidas = excluidas.filter(motivo="EXCLUIDA")
+    else:
+        ordens = ordens.filter(tecnico_responsavel=user)
+        andamentos = andamentos.filter(os__tecnico_responsavel=user)
+        excluidas = excluidas.filter(tecnico_responsavel_id=user.pk).exclude(
+            os_id__in=OrdemServico.objects.filter(tecnico_responsavel=user).values("pk")
+        )
+
+    if desde is None:
+        # Sincronização completa: não há exclusões a informar
+        return ordens, andamentos, excluidas.none()
+
+    return (
+        ordens.filter(atualizado_em__gt=desde),
+        andamentos.filter(criado_em__gt=desde),
+        excluidas.filter(excluida_em__gt=desde),
+    )
@@ -1,3 +1,282 @@
+from unittest import mock
+
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.testes import SENHA, OrcamentoTestCase
+from estoque.models import Loja
+from ordens.models import AndamentoOS, CategoriaProblema, OrdemServico
+from . import lote
+from .models import OperacaoLote
+from .sincronizacao import gerar_token_sync
+from .tokens import CromaRefreshToken
+
+
+# Consultas e tempo por rota (orçamentos em core/testes.py)
+class OrcamentoAPITests(OrcamentoTestCase):
+    def test_login_e_refresh(self):
+        resposta = self.assertOrcamento(
+            "api_login", metodo="post", dados={"username": "admin", "password": SENHA}, api=True,
+        )
+        self.assertOrcamento(
+            "api_refresh", metodo="post", dados={"refresh": resposta.data["refresh"]}, api=True,
+        )
+
+    def test_google_sem_token(self):
+        self.assertOrcamento("api_google_login", metodo="post", dados={}, status=400, api=True)
+
+    def test_categorias(self):
+        self.assertOrcamento("api_os_categorias", self.solicitante, api=True)
+
+    def test_lista(self):
+        self.assertOrcamento("api_os_lista", self.admin, api=True)
+        self.assertOrcamento("api_os_lista", self.solicitante, api=True)
+
+    def test_lote(self):
+        ordens = self.base["ordens"][:5]
+        self.assertOrcamento(
+            "api_os_lote", self.admin, "post", api=True,
+            dados={"operacoes": [
+                {"op": "andamento", "os_id": os_obj.pk, "texto": "Em deslocamento", "chave": f"and-{os_obj.pk}"}
+                for os_obj in ordens
+            ]},
+        )
+
+    def test_detalhe(self):
+        self.assertOrcamento("api_os_detalhe", self.admin, kwargs={"pk": self.base["ordens"][0].pk}, api=True)
+
+    def test_sync(self):
+        self.assertOrcamento("api_sync", self.admin, api=True)
+
+    def test_lojas(self):
+        self.assertOrcamento("api_lojas", self.admin, api=True)
+
+    def test_dashboard(self):
+        self.assertOrcamento("api_dashboard", self.admin, api=True)
+
+    def test_relatorio_os(self):
+        self.assertOrcamento("api_relatorio_os", self.admin, api=True)
+        self.assertOrcamento("api_relatorio_os", self.solicitante, status=403, api=True)
+
+
+class AutenticacaoTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_usuario_excluido_perde_o_token(self):
+        usuario = User.objects.create_user("temporario")
+        cliente = APIClient()
+        cliente.credentials(HTTP_AUTHORIZATION=f"Bearer {CromaRefreshToken.for_user(usuario).access_token}")
+        self.assertEqual(cliente.get("/api/lojas/").status_code, 200)
+
+        usuario.delete()
+        self.assertEqual(cliente.get("/api/lojas/").status_code, 401)
+
+
+    def test_usuario_do_token_tem_o_nome(self):
+        usuario = User.objects.create_user("ana", first_name="Ana", last_name="Souza")
+        loja = Loja.objects.create(nome="Loja 01")
+        cliente = APIClient()
+        cliente.credentials(HTTP_AUTHORIZATION=f"Bearer {CromaRefreshToken.for_user(usuario).access_token}")
+
+        resposta = cliente.post(
+            "/api/os/", {"descricao_problema": "Goteira", "loja_id": loja.pk}, format="json",
+        )
+        self.assertEqual(resposta.status_code, 201)
+        self.assertEqual(resposta.data["solicitante"], "Ana Souza")
+
+
+class SincronizacaoTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        loja = Loja.objects.create(nome="Loja 01")
+        self.tecnico_a = User.objects.create_user("tecnico_a")
+        self.tecnico_b = User.objects.create_user("tecnico_b")
+        self.os = OrdemServico.objects.create(
+            loja=loja, solicitante=User.objects.create_user("loja01"),
+            descricao_problema="Ar-condicionado parado", tecnico_responsavel=self.tecnico_a,
+        )
+        self.desde = gerar_token_sync(timezone.now())
+
+    def sync(self, usuario):
+        cliente = APIClient()
+        cliente.force_authenticate(usuario)
+        resposta = cliente.get("/api/sync/", {"since": self.desde})
+        self.assertEqual(resposta.status_code, 200)
+        return resposta.data
+
+    def test_os_excluida(self):
+        os_id = self.os.pk
+        self.os.delete()
+        self.assertEqual(self.sync(self.tecnico_a)["excluidas"], [os_id])
+
+    def test_os_reatribuida_sai_do_tecnico_anterior(self):
+        self.os.tecnico_responsavel = self.tecnico_b
+        self.os.save()
+
+        dados_a = self.sync(self.tecnico_a)
+        self.assertEqual(dados_a["excluidas"], [self.os.pk])
+        self.assertEqual(dados_a["ordens"], [])
+        dados_b = self.sync(self.tecnico_b)
+        self.assertEqual(dados_b["excluidas"], [])
+        self.assertEqual([o["id"] for o in dados_b["ordens"]], [self.os.pk])
+
+    def test_os_reatribuida_carregada_com_only(self):
+        os_obj = OrdemServico.objects.only("pk").get(pk=self.os.pk)
+        os_obj.tecnico_responsavel = self.tecnico_b
+        os_obj.save(update_fields=["tecnico_responsavel"])
+        self.assertEqual(self.sync(self.tecnico_a)["excluidas"], [self.os.pk])
+
+    def test_os_devolvida_ao_tecnico(self):
+        self.os.tecnico_responsavel = self.tecnico_b
+        self.os.save()
+        self.os.tecnico_responsavel = self.tecnico_a
+        self.os.save()
+
+        self.assertEqual(self.sync(self.tecnico_a)["excluidas"], [])
+        self.assertEqual(self.sync(self.tecnico_b)["excluidas"], [self.os.pk])
+
+
+class LoteTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.loja = Loja.objects.create(nome="Loja 01")
+        self.admin = User.objects.create_user("admin")
+        self.admin.groups.add(Group.objects.get(name="admin"))
+        self.os = OrdemServico.objects.create(
+            loja=self.loja, solicitante=User.objects.create_user("loja01"),
+            descricao_problema="Porta emperrada", tecnico_responsavel=self.admin, status="EM_EXECUCAO",
+        )
+        self.cliente = APIClient()
+        self.cliente.force_authenticate(self.admin)
+
+    def enviar(self, operacoes):
+        resposta = self.cliente.post("/api/os/batch/", {"operacoes": operacoes}, format="json")
+        self.assertEqual(resposta.status_code, 200)
+        return resposta.data["resultados"]
+
+    def test_ids_invalidos_na_criacao(self):
+        resultados = self.enviar([
+            {"op": "criar", "descricao_problema": "Goteira", "loja_id": "abc"},
+            {"op": "criar", "descricao_problema": "Goteira", "loja_id": self.loja.pk, "categoria_id": "abc"},
+        ])
+        self.assertEqual([r["erro"] for r in resultados], ["Loja não identificada.", "Categoria não encontrada."])
+        self.assertEqual(OrdemServico.objects.count(), 1)
+
+    def test_custo_invalido(self):
+        valores = ["NaN", "Infinity", "1e12", "100000000", "-100000000", "abc", "²"]
+        resultados = self.enviar(
+            [{"op": "custo", "os_id": self.os.pk, "custo_total": v} for v in valores]
+            + [{"op": "custo", "os_id": "²", "custo_total": "10"}]
+            + [{"op": "custo", "os_id": self.os.pk, "custo_total": "99999999.99"}]
+        )
+        self.assertEqual([r["ok"] for r in resultados], [False] * (len(valores) + 1) + [True])
+        self.os.refresh_from_db()
+        self.assertEqual(str(self.os.custo_total), "99999999.99")
+
+    def test_operacao_com_erro_desfaz_so_o_proprio_savepoint(self):
+        def criar_e_falhar(ctx, op):
+            OrdemServico.objects.create(loja=self.loja, solicitante=self.admin, descricao_problema="Parcial")
+            raise lote.OperacaoInvalida("Falhou no meio.")
+
+        with mock.patch.dict(lote.OPERACOES, {"falha": criar_e_falhar}):
+            resultados = self.enviar([
+                {"op": "andamento", "os_id": self.os.pk, "texto": "Chegando"},
+                {"op": "falha"},
+                {"op": "status", "os_id": self.os.pk, "status": "FINALIZADA"},
+                {"op": "custo", "os_id": self.os.pk, "custo_total": "80"},
+            ])
+
+        self.assertEqual([r["ok"] for r in resultados], [True, False, False, True])
+        self.assertFalse(OrdemServico.objects.filter(descricao_problema="Parcial").exists())
+        self.os.refresh_from_db()
+        self.assertEqual(self.os.status, "EM_EXECUCAO")
+        self.assertEqual(str(self.os.custo_total), "80.00")
+        self.assertEqual(AndamentoOS.objects.filter(os=self.os).count(), 1)
+
+    def test_reenvio_nao_repete_operacoes(self):
+        operacoes = [{"op": "andamento", "os_id": self.os.pk, "texto": "Chegando", "chave": "and-1"}]
+        primeira = self.enviar(operacoes)
+        segunda = self.enviar(operacoes)
+
+        self.assertTrue(segunda[0]["repetida"])
+        self.assertEqual(segunda[0]["os_id"], primeira[0]["os_id"])
+        self.assertEqual(AndamentoOS.objects.filter(os=self.os).count(), 1)
+
+    def test_reenvio_simultaneo_devolve_o_resultado_gravado(self):
+        # A outra requisição gravou a chave depois que esta já tinha lido as
+        # aplicadas: a primeira leitura não vê a chave, a unicidade barra
+        gravado = {"indice": 0, "op": "andamento", "chave": "and-1", "ok": True, "os_id": self.os.pk}
+        OperacaoLote.objects.create(usuario=self.admin, chave="and-1", resultado=gravado)
+        leituras = [{}]
+        original = lote._aplicadas
+
+        with mock.patch.object(lote, "_aplicadas", side_effect=lambda *a: leituras.pop() if leituras else original(*a)):
+            resultados = self.enviar([
+                {"op": "andamento", "os_id": self.os.pk, "texto": "Chegando", "chave": "and-1"},
+                {"op": "custo", "os_id": self.os.pk, "custo_total": "80"},
+            ])
+
+        self.assertTrue(resultados[0]["repetida"])
+        self.assertTrue(resultados[1]["ok"])
+        self.assertEqual(AndamentoOS.objects.filter(os=self.os).count(), 0)
+        self.assertEqual(OperacaoLote.objects.count(), 1)
+
+
+class GetCondicionalTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user("admin")
+        self.admin.groups.add(Group.objects.get(name="admin"))
+        self.os = OrdemServico.objects.create(
+            loja=Loja.objects.create(nome="Loja 01"), solicitante=User.objects.create_user("loja01"),
+            descricao_problema="Porta emperrada", categoria=CategoriaProblema.objects.create(nome="Portas"),
+        )
+        self.cliente = APIClient()
+        self.cliente.force_authenticate(self.admin)
+
+    def assertRevalida(self, url, alterar):
+        etag = self.cliente.get(url)["ETag"]
+        self.assertEqual(self.cliente.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        alterar()
+        resposta = self.cliente.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertNotEqual(resposta["ETag"], etag)
+
+    def test_lista_os(self):
+        def alterar():
+            self.os.descricao_problema = "Porta e janela emperradas"
+            self.os.save()
+        self.assertRevalida("/api/os/", alterar)
+
+    def test_lista_os_sem_last_modified(self):
+        # Com só If-Modified-Since, a exclusão de uma OS não daria 304 desatualizado
+        resposta = self.cliente.get("/api/os/")
+        self.assertNotIn("Last-Modified", resposta)
+        self.assertRevalida("/api/os/", self.os.delete)
+
+    def test_detalhe_os(self):
+        def alterar():
+            self.os.prioridade = "ALTA"
+            self.os.save()
+        self.assertRevalida(f"/api/os/{self.os.pk}/", alterar)
+
+    def test_lista_e_detalhe_com_loja_ou_categoria_renomeada(self):
+        def renomear_loja():
+            self.os.loja.nome = "Loja 01 - Centro"
+            self.os.loja.save()
+
+        def renomear_categoria():
+            self.os.categoria.nome = "Portas e janelas"
+            self.os.categoria.save()
+
+        for url in ("/api/os/", f"/api/os/{self.os.pk}/"):
+            with self.subTest(url=url):
+                self.assertRevalida(url, renomear_loja)
+                self.assertRevalida(url, renomear_categoria)
 
-# Create your tests here.
+    def test_lojas(self):
+        self.assertRevalida("/api/lojas/", lambda: Loja.objects.create(nome="Loja 02"))
@@ -0,0 +1,40 @@
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from contas.papeis import loja_do_usuario, usuario_is_admin, versao_permissoes
+
+User = get_user_model()
+
+
+def _preencher_claims(token, user):
+    token["username"] = user.username
+    token["first_name"] = user.first_name
+    token["last_name"] = user.last_name
+    token["is_admin"] = usuario_is_admin(user)
+    token["loja_id"] = loja_do_usuario(user)
+    token["perm_ver"] = versao_permissoes(user.pk)
+
+
+# Refresh token com papel e loja embutidos; o access token herda as claims.
+# Ao renovar, claims desatualizadas (perm_ver antigo) são recalculadas.
+class CromaRefreshToken(RefreshToken):
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        _preencher_claims(token, user)
+        return token
+
+    @property
+    def access_token(self):
+        user_id = self.payload.get(api_settings.USER_ID_CLAIM)
+        if user_id is not None and self.payload.get("perm_ver") != versao_permissoes(user_id):
+            user = User.objects.select_related("perfil").filter(pk=user_id).first()
+            if user is not None:
+                _preencher_claims(self, user)
+        return super().access_token
+
+
+class CromaTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = CromaRefreshToken
@@ -8,7 +8,10 @@ urlpatterns = [
     path("auth/google/", views.GoogleLoginAPIView.as_view(), name="api_google_login"),
     path("os/categorias/", views.OSCategoriasAPIView.as_view(), name="api_os_categorias"),
     path("os/", views.OSListaAPIView.as_view(), name="api_os_lista"),
+    path("os/batch/", views.OSLoteAPIView.as_view(), name="api_os_lote"),
     path("os/<int:pk>/", views.OSDetalheAPIView.as_view(), name="api_os_detalhe"),
+    path("sync/", views.SyncAPIView.as_view(), name="api_sync"),
     path("lojas/", views.LojasAPIView.as_view(), name="api_lojas"),
     path("dashboard/", views.DashboardAPIView.as_view(), name="api_dashboard"),
+    path("relatorios/os/", views.RelatorioOSAPIView.as_view(), name="api_relatorio_os"),
 ]
\ No newline at end of file
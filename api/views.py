@@ -2,16 +2,30 @@ import requests as req
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from ordens.models import OrdemServico, AndamentoOS, CategoriaProblema
 from estoque.models import Loja
-from django.db.models import Count
-from datetime import timedelta
-from django.db.models import Avg, F, ExpressionWrapper, DurationField
+from django.db.models import Count, Max, Q
+from ordens.indicadores import indicadores_os
+from contas.dashboard import widget
+from relatorios.graficos import graficos
+from contas.papeis import loja_do_usuario, usuario_is_admin
+from core.versoes import versao, versoes
+from .condicional import condicional, gerar_etag
+from .lote import OperacaoInvalida, processar_lote
+from .paginacao import CursorInvalido, ler_limite, paginar_keyset
+from .serializacao import CAMPOS_LISTA, CamposInvalidos, consulta_os, ler_campos, serializar_os
+from .tokens import CromaRefreshToken
+from .sincronizacao import (
+    TokenSyncInvalido,
+    coletar_alteracoes,
+    gerar_token_sync,
+    ler_token_sync,
+    serializar_andamento,
+)
 
 class LoginAPIView(APIView):
     permission_classes = [AllowAny]
@@ -31,7 +45,7 @@ class LoginAPIView(APIView):
         if not user.is_active:
             return Response({"erro": "Usuário inativo."}, status=403)
 
-        refresh = RefreshToken.for_user(user)
+        refresh = CromaRefreshToken.for_user(user)
         perfil = getattr(user, "perfil", None)
         loja = None
         if perfil and perfil.loja:
@@ -45,7 +59,7 @@ class LoginAPIView(APIView):
                 "username": user.username,
                 "nome": user.get_full_name() or user.username,
                 "email": user.email,
-                "is_admin": user.is_superuser or user.groups.filter(name="admin").exists(),
+                "is_admin": usuario_is_admin(user),
                 "loja": loja,
             }
         })
@@ -81,7 +95,7 @@ class GoogleLoginAPIView(APIView):
                 }
             )
 
-            refresh = RefreshToken.for_user(user)
+            refresh = CromaRefreshToken.for_user(user)
             perfil = getattr(user, "perfil", None)
             loja = None
             if perfil and perfil.loja:
@@ -95,7 +109,7 @@ class GoogleLoginAPIView(APIView):
                     "username": user.username,
                     "nome": user.get_full_name() or user.username,
                     "email": user.email,
-                    "is_admin": user.is_superuser or user.groups.filter(name="admin").exists(),
+                    "is_admin": usuario_is_admin(user),
                     "loja": loja,
                 }
             })
@@ -104,46 +118,109 @@ class GoogleLoginAPIView(APIView):
             return Response({"erro": "Erro ao validar token.", "detalhe": str(e)}, status=401)
 
 
-def serializar_os(os):
-    return {
-        "id": os.id,
-        "loja": {"id": os.loja.id, "nome": os.loja.nome} if os.loja else None,
-        "solicitante": os.solicitante.get_full_name() or os.solicitante.username,
-        "tecnico_responsavel": (
-            os.tecnico_responsavel.get_full_name() or os.tecnico_responsavel.username
-        ) if os.tecnico_responsavel else None,
-        "categoria": os.categoria.nome if os.categoria else None,
-        "descricao_problema": os.descricao_problema,
-        "prioridade": os.prioridade,
-        "status": os.status,
-        "observacoes": os.observacoes,
-        "solucao": os.solucao,
-        "motivo_cancelamento": os.motivo_cancelamento,
-        "custo_total": str(os.custo_total) if os.custo_total else None,
-        "data_abertura": os.data_abertura.isoformat(),
-        "data_fechamento": os.data_fechamento.isoformat() if os.data_fechamento else None,
-    }
+class FiltroInvalido(Exception):
+    pass
+
+
+# Filtros da listagem: status, loja, prioridade, categoria e tecnico
+def _filtrar_lista_os(qs, params, is_admin):
+    status = (params.get("status") or "").strip()
+    prioridade = (params.get("prioridade") or "").strip()
+
+    if status:
+        if status not in dict(OrdemServico.STATUS_CHOICES):
+            raise FiltroInvalido(f"Status inválido: {status}.")
+        qs = qs.filter(status=status)
+    if prioridade:
+        if prioridade not in dict(OrdemServico.PRIORIDADE_CHOICES):
+            raise FiltroInvalido(f"Prioridade inválida: {prioridade}.")
+        qs = qs.filter(prioridade=prioridade)
+
+    campos_id = {"loja": "loja_id", "categoria": "categoria_id"}
+    if is_admin:
+        # Usuário comum já vê apenas as OS em que é o técnico
+        campos_id["tecnico"] = "tecnico_responsavel_id"
+
+    for parametro, campo in campos_id.items():
+        valor = (params.get(parametro) or "").strip()
+        if not valor:
+            continue
+        try:
+            qs = qs.filter(**{campo: int(valor)})
+        except ValueError:
+            raise FiltroInvalido(f"Valor inválido para {parametro}: {valor}.")
+    return qs
+
+
+# Validadores do GET condicional: total + última alteração do conjunto
+# filtrado, mais as versões de lojas e categorias (nomes exibidos na OS).
+# Só ETag: o maior atualizado_em não avança quando uma OS sai do conjunto
+# (excluída ou reatribuída), então não serve como Last-Modified.
+def _validadores_lista_os(request):
+    user = request.user
+    is_admin = usuario_is_admin(user)
+
+    ordens = OrdemServico.objects.all()
+    if not is_admin:
+        ordens = ordens.filter(tecnico_responsavel=user)
+    try:
+        ordens = _filtrar_lista_os(ordens, request.query_params, is_admin)
+    except FiltroInvalido:
+        return None, None
+
+    resumo = ordens.aggregate(total=Count("id"), ultima=Max("atualizado_em"))
+    etag = gerar_etag(
+        "os-lista", user.pk, is_admin, request.query_params.urlencode(),
+        resumo["total"], resumo["ultima"].isoformat() if resumo["ultima"] else "",
+        *versoes("lojas", "categorias"),
+    )
+    return etag, None
+
+
+def _validadores_detalhe_os(request, pk):
+    user = request.user
+    is_admin = usuario_is_admin(user)
+
+    ordens = OrdemServico.objects.filter(pk=pk)
+    if not is_admin:
+        ordens = ordens.filter(Q(solicitante=user) | Q(tecnico_responsavel=user))
+    atualizado_em = ordens.values_list("atualizado_em", flat=True).first()
+    if atualizado_em is None:
+        # Inexistente ou sem acesso: a view responde 404/403
+        return None, None
+    etag = gerar_etag(
+        "os", pk, atualizado_em.isoformat(), request.query_params.get("fields", ""),
+        *versoes("lojas", "categorias"),
+    )
+    return etag, atualizado_em
 
 
 class OSListaAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @condicional(_validadores_lista_os)
     def get(self, request):
         user = request.user
-        is_admin = user.is_superuser or user.groups.filter(name="admin").exists()
+        is_admin = usuario_is_admin(user)
 
-        if is_admin:
-            ordens = OrdemServico.objects.select_related(
-                "loja", "solicitante", "tecnico_responsavel", "categoria"
-            ).order_by("-data_abertura")
-        else:
-            ordens = OrdemServico.objects.filter(
-                tecnico_responsavel=user
-            ).select_related(
-                "loja", "solicitante", "tecnico_responsavel", "categoria"
-            ).order_by("-data_abertura")
+        try:
+            campos = ler_campos(request.query_params.get("fields"), CAMPOS_LISTA)
+            ordens = consulta_os(campos)
+            if not is_admin:
+                ordens = ordens.filter(tecnico_responsavel=user)
+            ordens = _filtrar_lista_os(ordens, request.query_params, is_admin)
+            itens, proximo = paginar_keyset(
+                ordens,
+                request.query_params.get("cursor"),
+                ler_limite(request.query_params.get("limite")),
+            )
+        except (CamposInvalidos, FiltroInvalido, CursorInvalido) as e:
+            return Response({"erro": str(e)}, status=400)
 
-        return Response([serializar_os(os) for os in ordens])
+        return Response({
+            "resultados": [serializar_os(os, campos) for os in itens],
+            "proximo_cursor": proximo,
+        })
 
     def post(self, request):
         user = request.user
@@ -153,8 +230,7 @@ class OSListaAPIView(APIView):
         if not descricao:
             return Response({"erro": "Descrição do problema é obrigatória."}, status=400)
 
-        perfil = getattr(user, "perfil", None)
-        loja_id = data.get("loja_id") or (perfil.loja_id if perfil else None)
+        loja_id = data.get("loja_id") or loja_do_usuario(user)
         if not loja_id:
             return Response({"erro": "Loja não identificada."}, status=400)
 
@@ -177,22 +253,25 @@ class OSListaAPIView(APIView):
 class OSDetalheAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @condicional(_validadores_detalhe_os)
     def get(self, request, pk):
         user = request.user
-        is_admin = user.is_superuser or user.groups.filter(name="admin").exists()
-        os = get_object_or_404(
-            OrdemServico.objects.select_related("loja", "solicitante", "tecnico_responsavel", "categoria"),
-            pk=pk
-        )
+        is_admin = usuario_is_admin(user)
+        try:
+            campos = ler_campos(request.query_params.get("fields"))
+        except CamposInvalidos as e:
+            return Response({"erro": str(e)}, status=400)
 
-        if not (is_admin or os.solicitante == user or os.tecnico_responsavel == user):
+        os = get_object_or_404(consulta_os(campos), pk=pk)
+
+        if not (is_admin or user.pk in (os.solicitante_id, os.tecnico_responsavel_id)):
             return Response({"erro": "Acesso negado."}, status=403)
 
-        return Response(serializar_os(os))
+        return Response(serializar_os(os, campos))
 
     def put(self, request, pk):
         user = request.user
-        is_admin = user.is_superuser or user.groups.filter(name="admin").exists()
+        is_admin = usuario_is_admin(user)
         os = get_object_or_404(OrdemServico, pk=pk)
 
         if not (is_admin or os.tecnico_responsavel == user):
@@ -237,7 +316,7 @@ class OSDetalheAPIView(APIView):
 
     def delete(self, request, pk):
         user = request.user
-        is_admin = user.is_superuser or user.groups.filter(name="admin").exists()
+        is_admin = usuario_is_admin(user)
 
         if not is_admin:
             return Response({"erro": "Apenas administradores podem excluir OS."}, status=403)
@@ -247,9 +326,60 @@ class OSDetalheAPIView(APIView):
         return Response({"mensagem": "OS excluída com sucesso."}, status=200)
 
 
+# Reenvio da fila offline do app em uma única requisição
+class OSLoteAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        user = request.user
+        is_admin = usuario_is_admin(user)
+
+        try:
+            resultados, alteradas = processar_lote(user, is_admin, request.data.get("operacoes"))
+        except OperacaoInvalida as e:
+            return Response({"erro": str(e)}, status=400)
+
+        ordens = OrdemServico.objects.select_related(
+            "loja", "solicitante", "tecnico_responsavel", "categoria"
+        ).filter(pk__in=alteradas)
+
+        return Response({
+            "resultados": resultados,
+            "ordens": [serializar_os(os) for os in ordens],
+        })
+
+
+# Sincronização incremental do app: apenas o que mudou desde o último token
+class SyncAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        user = request.user
+        is_admin = usuario_is_admin(user)
+        agora = timezone.now()
+
+        since = request.query_params.get("since")
+        try:
+            desde = ler_token_sync(since) if since else None
+            campos = ler_campos(request.query_params.get("fields"))
+        except (TokenSyncInvalido, CamposInvalidos) as e:
+            return Response({"erro": str(e)}, status=400)
+
+        ordens, andamentos, excluidas = coletar_alteracoes(user, is_admin, desde, campos)
+
+        return Response({
+            "ordens": [serializar_os(os, campos) for os in ordens],
+            "andamentos": [serializar_andamento(a) for a in andamentos],
+            "excluidas": list(excluidas.values_list("os_id", flat=True)),
+            "completa": desde is None,
+            "token": gerar_token_sync(agora),
+        })
+
+
 class OSCategoriasAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @condicional(lambda request: (gerar_etag("categorias", versao("categorias")), None))
     def get(self, request):
         categorias = CategoriaProblema.objects.filter(ativo=True).values("id", "nome")
         return Response(list(categorias))
@@ -257,6 +387,7 @@ class OSCategoriasAPIView(APIView):
 class LojasAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @condicional(lambda request: (gerar_etag("lojas", versao("lojas")), None))
     def get(self, request):
         lojas = Loja.objects.all().values("id", "nome")
         return Response(list(lojas))
@@ -266,49 +397,27 @@ class DashboardAPIView(APIView):
 
     def get(self, request):
         user = request.user
-        is_admin = user.is_superuser or user.groups.filter(name="admin").exists()
-        agora = timezone.now()
-        inicio_mes = agora.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-
+        is_admin = usuario_is_admin(user)
         if is_admin:
-            qs = OrdemServico.objects.all()
+            # Mesmo cálculo do dashboard web, compartilhado entre os admins
+            indicadores = widget("indicadores")
         else:
-            qs = OrdemServico.objects.filter(tecnico_responsavel=user)
-
-        kpi_abertas = qs.filter(status="ABERTA").count()
-        kpi_execucao = qs.filter(status="EM_EXECUCAO").count()
-        kpi_finalizadas_mes = qs.filter(
-            status="FINALIZADA",
-            data_fechamento__gte=inicio_mes
-        ).count()
-        kpi_atrasadas = qs.filter(
-            status__in=["ABERTA", "EM_ANALISE", "EM_EXECUCAO"],
-            data_abertura__lt=agora - timedelta(days=3)
-        ).count()
-
-        dist_status = list(
-            qs.values("status").annotate(total=Count("id")).order_by()
-        )
+            indicadores = indicadores_os(OrdemServico.objects.filter(tecnico_responsavel=user))
+        return Response({
+            "kpi_abertas": indicadores["kpi_abertas"],
+            "kpi_execucao": indicadores["kpi_execucao"],
+            "kpi_finalizadas_mes": indicadores["kpi_finalizadas_mes"],
+            "kpi_atrasadas": indicadores["kpi_atrasadas"],
+            "mttr_horas": indicadores["mttr_horas"],
+            "dist_status": indicadores["dist_status"],
+        })
 
-        dur_expr = ExpressionWrapper(
-            F("data_fechamento") - F("data_abertura"),
-            output_field=DurationField()
-        )
-        mttr_qs = qs.filter(
-            status="FINALIZADA",
-            data_fechamento__gte=inicio_mes
-        ).annotate(dur=dur_expr).aggregate(media=Avg("dur"))
 
-        mttr_horas = None
-        if mttr_qs["media"]:
-            total_sec = mttr_qs["media"].total_seconds()
-            mttr_horas = round(total_sec / 3600.0, 1)
+# Totais do relatório de OS (mesmos filtros da tela: status, loja, dt_ini, dt_fim)
+class RelatorioOSAPIView(APIView):
+    permission_classes = [IsAuthenticated]
 
-        return Response({
-            "kpi_abertas": kpi_abertas,
-            "kpi_execucao": kpi_execucao,
-            "kpi_finalizadas_mes": kpi_finalizadas_mes,
-            "kpi_atrasadas": kpi_atrasadas,
-            "mttr_horas": mttr_horas,
-            "dist_status": dist_status,
-        })
\ No newline at end of file
+    def get(self, request):
+        if not usuario_is_admin(request.user):
+            return Response({"erro": "Apenas administradores."}, status=403)
+        return Response(graficos("os", request.query_params))
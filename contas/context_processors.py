@@ -0,0 +1,6 @@
+from .papeis import usuario_is_admin
+
+
+# Disponibiliza o papel do usuário para os templates (ex.: sidebar)
+def papel(request):
+    return {"user_is_admin": usuario_is_admin(getattr(request, "user", None))}
@@ -0,0 +1,123 @@
+from datetime import timedelta
+
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from core.filtros import intervalo_dias
+from core.versoes import em_cache
+from estoque.indicadores import situacao_estoque_central
+from ordens.indicadores import indicadores_os
+from ordens.models import OrdemServico, AndamentoOS
+from relatorios.resumo import resumo_os
+from viagens.models import Viagem
+
+
+# Cada widget do dashboard é calculado uma vez e compartilhado entre os admins.
+# As versões ("os", "andamentos", ...) mudam nos signals de cada app, então o
+# cache é descartado assim que os dados mudam; o TTL cobre o que depende só
+# do relógio (atrasos, viagens do dia, janela de 30 dias).
+# As listas vão para o cache como dicts de values(), só com o que o template
+# mostra; instâncias de model levariam junto o estado de carga (_carregado)
+# e os objetos relacionados de cada linha.
+TTL_CURTO = 60
+TTL_LONGO = 300
+
+
+def _indicadores():
+    return indicadores_os()
+
+
+def _pendencias():
+    agora = timezone.now()
+    sem_tecnico = (
+        OrdemServico.objects
+        .filter(tecnico_responsavel__isnull=True)
+        .order_by("-data_abertura")
+        .values("id", "loja__nome", "data_abertura")[:10]
+    )
+    analise_atraso = (
+        OrdemServico.objects
+        .filter(status="EM_ANALISE", data_abertura__lt=agora - timedelta(days=3))
+        .order_by("data_abertura")
+        .values("id", "loja__nome", "data_abertura")[:10]
+    )
+    return {"sem_tecnico": list(sem_tecnico), "analise_atraso": list(analise_atraso)}
+
+
+def _viagens_proximas():
+    hoje = timezone.localdate()
+    return list(
+        Viagem.objects
+        .filter(intervalo_dias("data_partida", hoje, hoje + timedelta(days=1)))
+        .order_by("data_partida")
+        .values("origem__nome", "destino__nome", "data_partida")[:10]
+    )
+
+
+def _atividade():
+    return list(
+        AndamentoOS.objects
+        .order_by("-criado_em")
+        .values("os_id", "autor__username", "criado_em", "texto")[:10]
+    )
+
+
+# Série temporal dos últimos 30 dias
+def _serie():
+    hoje = timezone.localdate()
+    inicio_janela = hoje - timedelta(days=29)
+
+    abertas_por_dia = (
+        resumo_os({"dt_ini": inicio_janela.isoformat()})
+        .values("dia").annotate(total=Sum("qtd")).order_by("dia")
+    )
+    finalizadas_por_dia = (
+        OrdemServico.objects.filter(status="FINALIZADA")
+        .filter(intervalo_dias("data_fechamento", inicio_janela))
+        .annotate(dia=TruncDate("data_fechamento"))
+        .values("dia").annotate(total=Count("id")).order_by("dia")
+    )
+
+    dias = []
+    cur = inicio_janela
+    while cur <= hoje:
+        dias.append(cur.isoformat())
+        cur += timedelta(days=1)
+
+    map_abertas = {r["dia"].isoformat(): r["total"] for r in abertas_por_dia}
+    map_final = {r["dia"].isoformat(): r["total"] for r in finalizadas_por_dia}
+    return {
+        "serie_dias": dias,
+        "serie_abertas": [map_abertas.get(d, 0) for d in dias],
+        "serie_final": [map_final.get(d, 0) for d in dias],
+    }
+
+
+# Ranking por loja
+def _ranking_lojas():
+    ranking_lojas = (
+        resumo_os().filter(status__in=["ABERTA", "EM_ANALISE", "EM_EXECUCAO"])
+        .values("loja__nome").annotate(total=Sum("qtd")).order_by("-total")[:5]
+    )
+    return {
+        "ranking_labels": [r["loja__nome"] for r in ranking_lojas],
+        "ranking_values": [r["total"] for r in ranking_lojas],
+    }
+
+
+# nome -> (assuntos que invalidam, TTL em segundos, função que calcula)
+WIDGETS = {
+    "indicadores": (("os",), TTL_CURTO, _indicadores),
+    "pendencias": (("os", "lojas"), TTL_CURTO, _pendencias),
+    "viagens": (("viagens", "lojas"), TTL_CURTO, _viagens_proximas),
+    "atividade": (("andamentos",), TTL_LONGO, _atividade),
+    "serie": (("os",), TTL_LONGO, _serie),
+    "ranking": (("os", "lojas"), TTL_LONGO, _ranking_lojas),
+    "estoque": (("estoque",), TTL_LONGO, situacao_estoque_central),
+}
+
+
+def widget(nome: str):
+    assuntos, ttl, calcular = WIDGETS[nome]
+    return em_cache(f"dashboard:{nome}", assuntos, calcular, ttl)
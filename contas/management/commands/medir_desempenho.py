@@ -0,0 +1,52 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.desempenho import CASOS, executar, regressoes
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede os caminhos quentes (dashboard, relatórios, estoque, API, movimentação, CSV) "
+        "e emite um JSON comparável; com --comparar falha se houver regressão"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeticoes", type=int, default=5)
+        parser.add_argument("--caso", action="append", choices=sorted(CASOS), help="Só estes casos (repetível)")
+        parser.add_argument("--saida", help="Grava o JSON neste arquivo em vez de imprimir")
+        parser.add_argument("--comparar", help="JSON de uma execução anterior (linha de base)")
+        parser.add_argument("--tolerancia", type=float, default=0.2, help="Piora aceita na mediana (0.2 = 20%%)")
+
+    def handle(self, *args, **opts):
+        if opts["repeticoes"] < 1:
+            raise CommandError("--repeticoes deve ser positivo.")
+
+        base = None
+        if opts["comparar"]:
+            try:
+                base = json.loads(Path(opts["comparar"]).read_text(encoding="utf-8"))
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Não foi possível ler a linha de base: {e}")
+
+        resultado = executar(
+            repeticoes=opts["repeticoes"],
+            nomes=set(opts["caso"] or ()),
+            avisar=lambda mensagem: self.stderr.write(mensagem) if opts["verbosity"] > 1 else None,
+        )
+
+        texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+        if opts["saida"]:
+            Path(opts["saida"]).write_text(texto + "\n", encoding="utf-8")
+            self.stderr.write(self.style.SUCCESS(f"Resultado gravado em {opts['saida']}"))
+        else:
+            self.stdout.write(texto)
+
+        if base is not None:
+            if base.get("volumes") != resultado["volumes"]:
+                self.stderr.write(self.style.WARNING("Volumes diferentes da linha de base; comparação aproximada."))
+            problemas = regressoes(resultado, base, opts["tolerancia"])
+            if problemas:
+                raise CommandError("Regressão em:\n  " + "\n  ".join(problemas))
+            self.stderr.write(self.style.SUCCESS("Sem regressões em relação à linha de base."))
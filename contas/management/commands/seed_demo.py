@@ -1,10 +1,27 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth.models import User, Group
 
+from core.gerador import ESCALAS, GeradorDados
+
+VOLUMES = ("lojas", "tecnicos", "produtos", "os", "viagens", "externas", "movimentacoes")
+
+
 class Command(BaseCommand):
-    help = "Cria grupos padrão e usuários de teste"
+    help = (
+        "Cria grupos padrão e usuários de teste. Com --escala (ou volumes avulsos) "
+        "também gera massa de dados sintética: lojas, produtos, saldos, OS, andamentos, "
+        "viagens, ordens externas e movimentações"
+    )
 
-    def handle(self, *args, **kwargs):
+    def add_arguments(self, parser):
+        parser.add_argument("--escala", choices=sorted(ESCALAS), help="Volumes pré-definidos")
+        for nome in VOLUMES:
+            parser.add_argument(f"--{nome}", type=int, help=f"Quantidade de {nome} (sobrepõe a escala)")
+        parser.add_argument("--dias", type=int, default=365, help="Janela de datas geradas, em dias")
+        parser.add_argument("--semente", type=int, default=42, help="Semente aleatória (mesma semente, mesmos dados)")
+        parser.add_argument("--lote", type=int, default=5000, help="Linhas por bulk_create")
+
+    def handle(self, *args, **opts):
         admin_group, _ = Group.objects.get_or_create(name="admin")
         user_group, _ = Group.objects.get_or_create(name="user")
 
@@ -19,3 +36,18 @@ class Command(BaseCommand):
             a.groups.add(admin_group)
 
         self.stdout.write(self.style.SUCCESS("Grupos e usuários de teste criados"))
+
+        volumes = dict(ESCALAS[opts["escala"]]) if opts["escala"] else {}
+        volumes.update({nome: opts[nome] for nome in VOLUMES if opts[nome] is not None})
+        if not volumes:
+            return
+        if any(v < 0 for v in volumes.values()) or opts["dias"] < 1 or opts["lote"] < 1:
+            raise CommandError("Volumes não podem ser negativos; --dias e --lote devem ser positivos.")
+
+        gerador = GeradorDados(
+            semente=opts["semente"], dias=opts["dias"], lote=opts["lote"],
+            avisar=lambda mensagem: self.stdout.write(f"  {mensagem}") if opts["verbosity"] > 1 else None,
+        )
+        criados = gerador.gerar(**volumes)
+        resumo = ", ".join(f"{qtd} {nome}" for nome, qtd in criados.items())
+        self.stdout.write(self.style.SUCCESS(f"Massa de dados gerada: {resumo}"))
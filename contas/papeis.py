@@ -0,0 +1,55 @@
+from django.core.cache import cache
+
+from core.versoes import nova_versao, versao
+
+
+# Resolução do papel "admin" sem consultar auth_user_groups a cada chamada:
+# memoizado no próprio objeto do usuário (vale pela requisição) e guardado
+# no cache compartilhado, invalidado pelos sinais de contas/signals.py. O
+# cache precisa ser em memória (ver CACHES nas settings): no banco, cada
+# leitura e gravação custaria mais consultas do que o EXISTS que evita.
+TEMPO_CACHE_PAPEL = 60 * 60
+
+
+def _chave_papel(user_id) -> str:
+    return f"papel:admin:{user_id}"
+
+
+def usuario_is_admin(user) -> bool:
+    if user is None or not getattr(user, "is_authenticated", False):
+        return False
+    if user.is_superuser:
+        return True
+
+    memo = getattr(user, "_croma_is_admin", None)
+    if memo is not None:
+        return memo
+
+    chave = _chave_papel(user.pk)
+    valor = cache.get(chave)
+    if valor is None:
+        valor = user.groups.filter(name="admin").exists()
+        cache.set(chave, valor, TEMPO_CACHE_PAPEL)
+    user._croma_is_admin = valor
+    return valor
+
+
+# Loja do perfil; usa o valor do token JWT quando disponível
+def loja_do_usuario(user):
+    if hasattr(user, "_croma_loja_id"):
+        return user._croma_loja_id
+    perfil = getattr(user, "perfil", None)
+    return perfil.loja_id if perfil else None
+
+
+# Versão das permissões do usuário (papel, loja, situação), usada para
+# validar as claims embutidas nos tokens JWT
+def versao_permissoes(user_id) -> int:
+    return versao(f"permissoes:{user_id}")
+
+
+def invalidar_papel(user_ids) -> None:
+    user_ids = list(user_ids)
+    if user_ids:
+        cache.delete_many([_chave_papel(pk) for pk in user_ids])
+        nova_versao(*[f"permissoes:{pk}" for pk in user_ids])
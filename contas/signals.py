@@ -1,9 +1,10 @@
-from django.db.models.signals import post_migrate, post_save
+from django.db.models.signals import m2m_changed, post_delete, post_migrate, post_save, pre_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import Group, Permission
 from django.apps import apps
 from django.contrib.auth import get_user_model
 from .models import Perfil
+from .papeis import invalidar_papel
 import os
 
 User = get_user_model()
@@ -22,4 +23,45 @@ def ensure_default_groups(sender, **kwargs):
 @receiver(post_save, sender=User)
 def criar_perfil(sender, instance, created, raw, **kwargs):
     if created and not raw:
-        Perfil.objects.get_or_create(user=instance)
\ No newline at end of file
+        Perfil.objects.get_or_create(user=instance)
+
+
+# Mudanças no usuário (ativo, superusuário, nome) ou na loja do perfil tornam
+# obsoletas as claims dos tokens já emitidos
+@receiver(post_save, sender=User)
+def usuario_alterado(sender, instance, created, update_fields, **kwargs):
+    if created or update_fields == frozenset({"last_login"}):
+        return
+    invalidar_papel([instance.pk])
+
+
+# Usuário excluído: tokens emitidos voltam para a busca no banco (401)
+@receiver(post_delete, sender=User)
+def usuario_excluido(sender, instance, **kwargs):
+    invalidar_papel([instance.pk])
+
+
+@receiver(post_save, sender=Perfil)
+def perfil_alterado(sender, instance, **kwargs):
+    invalidar_papel([instance.user_id])
+
+
+# Invalida o papel em cache quando a participação em grupos muda
+@receiver(m2m_changed, sender=User.groups.through)
+def grupos_usuario_alterados(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "pre_clear", "post_clear"):
+        return
+    if not reverse:
+        instance._croma_is_admin = None
+        invalidar_papel([instance.pk])
+    elif pk_set is not None:
+        invalidar_papel(pk_set)
+    else:
+        # group.user_set.clear(): coleta os usuários antes da limpeza
+        invalidar_papel(instance.user_set.values_list("pk", flat=True))
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def grupo_alterado(sender, instance, **kwargs):
+    invalidar_papel(instance.user_set.values_list("pk", flat=True))
@@ -1,3 +1,78 @@
-from django.test import TestCase
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
 
-# Create your tests here.
+from core.testes import CACHE_TESTES, ORCAMENTOS, OrcamentoTestCase
+from .dashboard import widget
+from .papeis import usuario_is_admin
+
+
+def _nomes_de_url(padroes, prefixo=""):
+    for padrao in padroes:
+        if isinstance(padrao, URLResolver):
+            if padrao.namespace == "admin":
+                continue
+            namespace = f"{prefixo}{padrao.namespace}:" if padrao.namespace else prefixo
+            yield from _nomes_de_url(padrao.url_patterns, namespace)
+        elif isinstance(padrao, URLPattern) and padrao.name:
+            yield prefixo + padrao.name
+
+
+# Toda rota nomeada precisa de um orçamento
+class CoberturaOrcamentosTests(OrcamentoTestCase):
+    def test_todas_as_rotas_tem_orcamento(self):
+        nomes = set(_nomes_de_url(get_resolver().url_patterns))
+        self.assertEqual(nomes - set(ORCAMENTOS), set())
+
+
+# Consultas e tempo por rota (orçamentos em core/testes.py)
+class OrcamentoContasTests(OrcamentoTestCase):
+    def test_home(self):
+        self.assertOrcamento("home", self.admin, status=302)
+
+    def test_login(self):
+        self.assertOrcamento("contas:login")
+
+    def test_logout(self):
+        self.assertOrcamento("contas:logout", self.admin, "post", status=302)
+
+    def test_dashboard(self):
+        self.assertOrcamento("contas:dashboard", self.admin)
+
+    # As listas vão para o cache como dicts, não como instâncias de model
+    def test_dashboard_cacheia_dicts(self):
+        resposta = self.cliente(self.admin).get(reverse("contas:dashboard"))
+        pendencias = widget("pendencias")
+        linhas = pendencias["sem_tecnico"] + pendencias["analise_atraso"] + widget("viagens") + widget("atividade")
+        self.assertTrue(linhas)
+        self.assertTrue(all(type(linha) is dict for linha in linhas))
+
+        viagem = widget("viagens")[0]
+        self.assertContains(resposta, f"{viagem['origem__nome']} → {viagem['destino__nome']}")
+        andamento = widget("atividade")[0]
+        self.assertContains(resposta, f"<strong>{andamento['autor__username']}</strong>", html=True)
+
+    def test_registrar(self):
+        self.assertOrcamento("contas:registrar", self.admin)
+
+    def test_admin_area(self):
+        self.assertOrcamento("contas:admin_area", self.admin)
+
+
+# O papel fica no cache compartilhado: outra requisição (outra instância do
+# usuário) não consulta os grupos de novo até o papel mudar
+@override_settings(CACHES=CACHE_TESTES)
+class PapelTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.usuario = User.objects.create_user("tecnico")
+
+    def test_papel_em_cache_entre_requisicoes(self):
+        self.assertFalse(usuario_is_admin(User.objects.get(pk=self.usuario.pk)))
+        with self.assertNumQueries(0):
+            self.assertFalse(usuario_is_admin(User(pk=self.usuario.pk, username="tecnico")))
+
+        self.usuario.groups.add(Group.objects.get(name="admin"))
+        with self.assertNumQueries(1):
+            self.assertTrue(usuario_is_admin(User(pk=self.usuario.pk, username="tecnico")))
@@ -0,0 +1,78 @@
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+
+logger = logging.getLogger(__name__)
+
+# Orçamento padrão de consultas por requisição; settings.ORCAMENTO_CONSULTAS_SQL
+# sobrepõe, e cada view pode declarar o seu com @orcamento_sql(n)
+ORCAMENTO_PADRAO = 30
+
+
+# Conta as consultas executadas e o tempo gasto nelas (sem depender de DEBUG)
+class MedidorConsultas:
+    def __init__(self):
+        self.total = 0
+        self.segundos = 0.0
+        self.sql = []
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.total += 1
+            self.segundos += time.perf_counter() - inicio
+            self.sql.append(sql)
+
+    @property
+    def milissegundos(self) -> float:
+        return self.segundos * 1000
+
+
+@contextmanager
+def medir_consultas(using=None):
+    medidor = MedidorConsultas()
+    with ExitStack() as pilha:
+        for alias in [using] if using else connections:
+            pilha.enter_context(connections[alias].execute_wrapper(medidor))
+        yield medidor
+
+
+def orcamento_sql(max_consultas: int):
+    def decorar(view):
+        view.orcamento_sql = max_consultas
+        return view
+    return decorar
+
+
+# Mede cada requisição e avisa no log quando passa do orçamento da view.
+# Em DEBUG também devolve o total no cabeçalho Server-Timing (aparece no
+# DevTools). Respostas em streaming consultam depois que o middleware já
+# retornou; essas consultas não entram na conta.
+class ConsultasMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with medir_consultas() as medidor:
+            response = self.get_response(request)
+
+        orcamento = getattr(request, "_orcamento_sql", None) or getattr(
+            settings, "ORCAMENTO_CONSULTAS_SQL", ORCAMENTO_PADRAO
+        )
+        if medidor.total > orcamento:
+            logger.warning(
+                "%s %s executou %d consultas (orçamento %d, %.1f ms)",
+                request.method, request.path, medidor.total, orcamento, medidor.milissegundos,
+            )
+        if settings.DEBUG:
+            response["Server-Timing"] = f'db;desc="{medidor.total} consultas";dur={medidor.milissegundos:.1f}'
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._orcamento_sql = getattr(view_func, "orcamento_sql", None)
@@ -0,0 +1,196 @@
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import F
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.views import OSListaAPIView
+from contas.dashboard import WIDGETS
+from core.consultas import medir_consultas
+from core.exportacao import gerar_csv
+from estoque.exportacao import filtrar_produtos, linhas_estoque
+from estoque.historico import saldos_em
+from estoque.indicadores import situacao_estoque_central
+from estoque.models import Loja, Movimentacao, Produto, SaldoEstoque
+from ordens.models import AndamentoOS, OrdemServico
+from prestadores.models import OrdemExterna
+from relatorios.exportacao import linhas_rel_os, linhas_rel_problemas
+from relatorios.graficos import RELATORIOS
+from relatorios.sla import sla_por_dimensao
+from viagens.models import Viagem
+
+# Benchmark dos caminhos quentes, chamando direto as funções que as telas
+# usam (sem o cache de relatórios e widgets, senão só se mede o cache).
+# Cada caso roda uma vez para aquecer e depois "repeticoes" vezes; o JSON de
+# saída tem mediana/mín/máx em ms e o número de consultas, e pode ser
+# comparado com um anterior para pegar regressões.
+#
+# As escritas (movimentação, sessão do login) acontecem dentro de uma
+# transação desfeita no final: a base não muda entre execuções.
+
+VERSAO_FORMATO = 1
+
+
+def _consumir_csv(linhas) -> int:
+    return sum(len(bloco) for bloco in gerar_csv(linhas))
+
+
+def _dashboard(ctx):
+    for _, _, calcular in WIDGETS.values():
+        calcular()
+
+
+def _relatorio(nome):
+    def caso(ctx):
+        especificacao, _, calcular = RELATORIOS[nome]
+        calcular(especificacao.ler({}))
+    return caso
+
+
+def _sla(ctx):
+    sla_por_dimensao()
+
+
+def _estoque_anotacoes(ctx):
+    qs = filtrar_produtos({})
+    list(qs.select_related("categoria")[:200])
+    qs.filter(saldo_central__lt=F("estoque_minimo")).count()
+    qs.filter(saldo_central=0).count()
+    situacao_estoque_central()
+
+
+def _saldo_historico(ctx):
+    # Fechamento de 30 dias atrás (snapshot mais próximo + movimentações)
+    saldos_em(timezone.localdate() - timedelta(days=30))
+
+
+def _api_lista_os(ctx):
+    request = APIRequestFactory().get("/api/os/", {"limite": 50})
+    force_authenticate(request, user=ctx["admin"])
+    resposta = OSListaAPIView.as_view()(request)
+    resposta.render()
+
+
+def _movimentacao(ctx):
+    resposta = ctx["cliente"].post(reverse("estoque:movimentar"), {
+        "tipo": "ENTRADA",
+        "produto": ctx["produto"].pk,
+        "destino": ctx["loja"].pk,
+        "quantidade": "1",
+        "observacao": "benchmark",
+    })
+    assert resposta.status_code == 302, resposta.status_code
+
+
+def _csv_os(ctx):
+    _consumir_csv(linhas_rel_os({}))
+
+
+def _csv_problemas(ctx):
+    _consumir_csv(linhas_rel_problemas({}))
+
+
+def _csv_estoque(ctx):
+    _consumir_csv(linhas_estoque({}))
+
+
+# nome -> (precisa de, função)
+CASOS = {
+    "dashboard": ((), _dashboard),
+    "relatorio_os": ((), _relatorio("os")),
+    "relatorio_problemas": ((), _relatorio("problemas")),
+    "relatorio_viagens": ((), _relatorio("viagens")),
+    "sla": ((), _sla),
+    "estoque_anotacoes": ((), _estoque_anotacoes),
+    "saldo_historico": ((), _saldo_historico),
+    "api_lista_os": (("admin",), _api_lista_os),
+    "movimentacao": (("admin", "produto", "loja"), _movimentacao),
+    "csv_os": ((), _csv_os),
+    "csv_problemas": ((), _csv_problemas),
+    "csv_estoque": ((), _csv_estoque),
+}
+
+
+def volumes() -> dict:
+    modelos = {
+        "lojas": Loja, "produtos": Produto, "saldos": SaldoEstoque, "movimentacoes": Movimentacao,
+        "os": OrdemServico, "andamentos": AndamentoOS, "viagens": Viagem, "externas": OrdemExterna,
+    }
+    return {nome: modelo.objects.count() for nome, modelo in modelos.items()}
+
+
+def _contexto():
+    ctx = {
+        "admin": User.objects.filter(groups__name="admin", is_active=True).order_by("pk").first(),
+        "produto": Produto.objects.filter(ativo=True).order_by("pk").first(),
+        "loja": Loja.objects.filter(is_central=True).first() or Loja.objects.order_by("pk").first(),
+    }
+    if ctx["admin"]:
+        ctx["cliente"] = Client()
+        ctx["cliente"].force_login(ctx["admin"])
+    return ctx
+
+
+def _medir(funcao, ctx, repeticoes):
+    funcao(ctx)  # aquecimento: conexões, imports, templates
+    tempos = []
+    for _ in range(repeticoes):
+        with medir_consultas() as medidor:
+            inicio = time.perf_counter()
+            funcao(ctx)
+            tempos.append((time.perf_counter() - inicio) * 1000)
+    return {
+        "mediana_ms": round(statistics.median(tempos), 2),
+        "min_ms": round(min(tempos), 2),
+        "max_ms": round(max(tempos), 2),
+        "consultas": medidor.total,
+    }
+
+
+def executar(repeticoes=5, nomes=None, avisar=None) -> dict:
+    avisar = avisar or (lambda mensagem: None)
+    resultado = {
+        "formato": VERSAO_FORMATO,
+        "gerado_em": timezone.now().isoformat(timespec="seconds"),
+        "banco": connection.vendor,
+        "repeticoes": repeticoes,
+        "volumes": volumes(),
+        "casos": {},
+    }
+
+    with override_settings(ALLOWED_HOSTS=["*"]), transaction.atomic():
+        ctx = _contexto()
+        for nome, (requisitos, funcao) in CASOS.items():
+            if nomes and nome not in nomes:
+                continue
+            faltando = [r for r in requisitos if not ctx.get(r)]
+            if faltando:
+                resultado["casos"][nome] = {"ignorado": f"sem dados: {', '.join(faltando)}"}
+                avisar(f"{nome}: ignorado (sem {', '.join(faltando)})")
+                continue
+            resultado["casos"][nome] = _medir(funcao, ctx, repeticoes)
+            avisar(f"{nome}: {resultado['casos'][nome]['mediana_ms']} ms")
+        transaction.set_rollback(True)
+    return resultado
+
+
+# Casos mais lentos que a base além da tolerância (fração; 0.2 = 20%) ou
+# com mais consultas. Diferenças abaixo de "folga_ms" são ruído.
+def regressoes(atual: dict, base: dict, tolerancia=0.2, folga_ms=2.0) -> list[str]:
+    problemas = []
+    for nome, medida in atual["casos"].items():
+        anterior = base.get("casos", {}).get(nome)
+        if not anterior or "mediana_ms" not in anterior or "mediana_ms" not in medida:
+            continue
+        limite = max(anterior["mediana_ms"] * (1 + tolerancia), anterior["mediana_ms"] + folga_ms)
+        if medida["mediana_ms"] > limite:
+            problemas.append(f"{nome}: {anterior['mediana_ms']} -> {medida['mediana_ms']} ms")
+        if medida["consultas"] > anterior["consultas"]:
+            problemas.append(f"{nome}: {anterior['consultas']} -> {medida['consultas']} consultas")
+    return problemas
@@ -0,0 +1,52 @@
+import csv
+
+from django.http import StreamingHttpResponse
+
+
+# Linhas lidas do banco por vez (cursor do lado do servidor no PostgreSQL)
+TAMANHO_LOTE = 2000
+
+# Tamanho aproximado de cada pedaço enviado ao cliente
+TAMANHO_BLOCO = 64 * 1024
+
+
+class _Eco:
+    # "Arquivo" do csv.writer que devolve a linha formatada em vez de gravá-la
+    def write(self, valor):
+        return valor
+
+
+def iterar_linhas(qs, *campos, chunk_size=TAMANHO_LOTE):
+    # Tuplas direto do banco, sem montar instâncias nem guardar o resultado
+    return qs.values_list(*campos).iterator(chunk_size=chunk_size)
+
+
+def gerar_csv(linhas, delimiter=",", bom=True):
+    writer = csv.writer(_Eco(), delimiter=delimiter, lineterminator="\n")
+    bloco = ["﻿"] if bom else []  # BOM UTF-8 para o Excel
+    tamanho = 0
+    for linha in linhas:
+        texto = writer.writerow(linha)
+        bloco.append(texto)
+        tamanho += len(texto)
+        if tamanho >= TAMANHO_BLOCO:
+            yield "".join(bloco)
+            bloco, tamanho = [], 0
+    if bloco:
+        yield "".join(bloco)
+
+
+# Resposta CSV em streaming: memória constante independente do número de
+# linhas, e o download começa antes de a consulta terminar.
+# "linhas" é qualquer iterável de listas/tuplas, consumido sob demanda.
+def resposta_csv(linhas, nome_arquivo: str, delimiter=","):
+    response = StreamingHttpResponse(
+        gerar_csv(linhas, delimiter=delimiter),
+        content_type="text/csv; charset=utf-8",
+    )
+    response["Content-Disposition"] = f'attachment; filename="{nome_arquivo}"'
+    return response
+
+
+def formatar_data_hora(valor, formato="%Y-%m-%d %H:%M"):
+    return valor.strftime(formato) if valor else ""
@@ -0,0 +1,126 @@
+import re
+from datetime import date, datetime, time, timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+
+
+# Filtros declarativos das telas (parâmetros do GET). Cada filtro valida o
+# valor bruto uma única vez e devolve sua forma canônica (string), usada
+# tanto nas chaves de cache/exportação quanto para montar a consulta.
+# Valor inválido é ignorado, como se o campo viesse vazio.
+#
+# Datas viram intervalos semiabertos no fuso local, [início do dia, início do
+# dia seguinte), comparando a coluna diretamente. "campo__date" converte cada
+# linha para o fuso antes de comparar e impede o banco de usar o índice.
+
+def inicio_do_dia(dia: date) -> datetime:
+    return timezone.make_aware(datetime.combine(dia, time.min))
+
+
+# [início de "desde", início do dia seguinte a "ate"), nas duas pontas opcionais
+def intervalo_dias(campo: str, desde: date | None = None, ate: date | None = None, com_hora=True) -> Q:
+    limite = inicio_do_dia if com_hora else (lambda dia: dia)
+    condicao = Q()
+    if desde:
+        condicao &= Q(**{f"{campo}__gte": limite(desde)})
+    if ate:
+        condicao &= Q(**{f"{campo}__lt": limite(ate + timedelta(days=1))})
+    return condicao
+
+
+class Filtro:
+    def __init__(self, campo: str):
+        self.campo = campo
+
+    # Valor canônico, ou None se o valor for inválido
+    def limpar(self, valor: str) -> str | None:
+        return valor
+
+    def condicao(self, valor: str) -> Q:
+        return Q(**{self.campo: valor})
+
+
+class Exato(Filtro):
+    def __init__(self, campo: str, escolhas=None):
+        super().__init__(campo)
+        self.escolhas = {codigo for codigo, _ in escolhas} if escolhas else None
+
+    def limpar(self, valor):
+        if self.escolhas is not None and valor not in self.escolhas:
+            return None
+        return valor
+
+
+class Id(Filtro):
+    def limpar(self, valor):
+        # isdigit() aceitaria "²", que int() recusa
+        return str(int(valor)) if re.fullmatch(r"[0-9]+", valor) and int(valor) > 0 else None
+
+
+class _Data(Filtro):
+    # com_hora=False para colunas DateField (ex.: resumo diário)
+    def __init__(self, campo: str, com_hora=True):
+        super().__init__(campo)
+        self.com_hora = com_hora
+
+    def limpar(self, valor):
+        try:
+            return date.fromisoformat(valor).isoformat()
+        except ValueError:
+            return None
+
+
+class DataInicial(_Data):
+    def condicao(self, valor):
+        return intervalo_dias(self.campo, desde=date.fromisoformat(valor), com_hora=self.com_hora)
+
+
+class DataFinal(_Data):
+    def condicao(self, valor):
+        return intervalo_dias(self.campo, ate=date.fromisoformat(valor), com_hora=self.com_hora)
+
+
+class Busca(Filtro):
+    def __init__(self, *campos: str):
+        self.campos = campos
+
+    def condicao(self, valor):
+        condicao = Q()
+        for campo in self.campos:
+            condicao |= Q(**{f"{campo}__icontains": valor})
+        return condicao
+
+
+# Valores fixos ("sim"/"nao", "abaixo"/"ok"...) mapeados para condições prontas
+class Opcoes(Filtro):
+    def __init__(self, opcoes: dict):
+        self.opcoes = opcoes
+
+    def limpar(self, valor):
+        return valor if valor in self.opcoes else None
+
+    def condicao(self, valor):
+        return self.opcoes[valor]
+
+
+# Conjunto de filtros de uma tela: Filtros(status=Exato(...), loja=Id("loja_id"))
+class Filtros:
+    def __init__(self, **filtros: Filtro):
+        self.filtros = filtros
+
+    # Só os filtros conhecidos, válidos e não vazios, em ordem fixa: a mesma
+    # combinação sempre gera o mesmo dict. Aceita o próprio resultado.
+    def ler(self, params) -> dict:
+        valores = {}
+        for nome, filtro in sorted(self.filtros.items()):
+            bruto = str(params.get(nome) or "").strip()
+            valor = filtro.limpar(bruto) if bruto else None
+            if valor:
+                valores[nome] = valor
+        return valores
+
+    def aplicar(self, qs, params):
+        for nome, valor in self.ler(params).items():
+            qs = qs.filter(self.filtros[nome].condicao(valor))
+        return qs
@@ -0,0 +1,416 @@
+import math
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, User
+from django.db import transaction
+from django.utils import timezone
+
+from contas.models import Perfil
+from core.filtros import inicio_do_dia
+from core.versoes import nova_versao
+from estoque.models import Categoria, Loja, Movimentacao, Produto, SaldoEstoque
+from estoque.saldos import reconciliar
+from ordens.models import AndamentoOS, CategoriaProblema, OrdemServico
+from prestadores.models import OrdemExterna, PrestadorServico
+from relatorios.models import ResumoDiarioOS
+from relatorios.resumo import reconstruir
+from viagens.models import Veiculo, Viagem
+
+
+# Gerador de massa de dados sintética com volumes e distribuições próximos
+# dos de produção, para reproduzir localmente problemas de desempenho.
+# Insere tudo com bulk_create em lotes (memória constante) e no fim refaz o
+# resumo diário, os totais de estoque dos produtos e as versões de cache,
+# que os signals não veem.
+#
+# Distribuições (aproximadas, o suficiente para os planos de consulta):
+# - poucas lojas concentram a maior parte das OS e movimentações (Zipf);
+# - aberturas no horário comercial, menos no fim de semana;
+# - OS antigas quase todas finalizadas, as recentes ainda em aberto;
+# - tempo de resolução log-normal, menor para prioridades altas.
+# Saldos e movimentações não são coerentes entre si.
+
+ESCALAS = {
+    "pequena": dict(
+        lojas=10, tecnicos=5, produtos=200, os=2_000, viagens=300, externas=100, movimentacoes=5_000,
+    ),
+    "media": dict(
+        lojas=50, tecnicos=20, produtos=2_000, os=50_000, viagens=5_000, externas=2_000, movimentacoes=200_000,
+    ),
+    "producao": dict(
+        lojas=150, tecnicos=40, produtos=8_000, os=400_000, viagens=30_000, externas=10_000,
+        movimentacoes=2_000_000,
+    ),
+}
+
+SENHA_PADRAO = "123456"
+
+CATEGORIAS_PROBLEMA = (
+    "Elétrica", "Hidráulica", "Refrigeração", "Informática", "Iluminação",
+    "Estrutura", "Equipamentos", "Segurança",
+)
+CATEGORIAS_ESTOQUE = (
+    "Cabos", "Lâmpadas", "Ferramentas", "Conexões", "Disjuntores", "Tubos",
+    "Filtros", "Periféricos", "Fixação", "Limpeza", "EPI", "Tintas",
+)
+
+_PESO_PRIORIDADE = {"BAIXA": 25, "MEDIA": 45, "ALTA": 22, "CRITICA": 8}
+# Multiplicador do tempo de resolução por prioridade
+_FATOR_PRIORIDADE = {"BAIXA": 1.8, "MEDIA": 1.0, "ALTA": 0.6, "CRITICA": 0.3}
+# Peso de cada hora do dia nas aberturas
+_PESO_HORA = [1, 1, 1, 1, 1, 2, 4, 8, 14, 16, 16, 14, 10, 12, 15, 15, 13, 10, 6, 4, 3, 2, 1, 1]
+# Segunda a domingo
+_PESO_DIA_SEMANA = [10, 10, 10, 10, 9, 5, 2]
+
+
+def _pesos_zipf(n: int, expoente=0.8) -> list[float]:
+    return [1 / (i + 1) ** expoente for i in range(n)]
+
+
+# bulk_create preenche auto_now/auto_now_add com "agora"; aqui as datas vêm do gerador
+@contextmanager
+def _datas_manuais(modelo, *campos):
+    fields = [modelo._meta.get_field(campo) for campo in campos]
+    originais = [(f.auto_now, f.auto_now_add) for f in fields]
+    for f in fields:
+        f.auto_now = f.auto_now_add = False
+    try:
+        yield
+    finally:
+        for f, (auto_now, auto_now_add) in zip(fields, originais):
+            f.auto_now, f.auto_now_add = auto_now, auto_now_add
+
+
+def _em_lotes(objetos, tamanho):
+    objetos = iter(objetos)
+    while lote := list(islice(objetos, tamanho)):
+        yield lote
+
+
+class GeradorDados:
+    def __init__(self, semente=42, dias=365, lote=5000, avisar=None):
+        self.rnd = random.Random(semente)
+        self.dias = dias
+        self.lote = lote
+        self.avisar = avisar or (lambda mensagem: None)
+        self.agora = timezone.now()
+
+    # Insere em lotes, cada um na sua transação; devolve os objetos com pk
+    def _inserir(self, modelo, objetos, descricao, total):
+        criados = []
+        for lote in _em_lotes(objetos, self.lote):
+            with transaction.atomic():
+                criados += modelo.objects.bulk_create(lote)
+            self.avisar(f"{descricao}: {len(criados)}/{total}")
+        return criados
+
+    def _inserir_sem_retorno(self, modelo, objetos, descricao, total):
+        inseridos = 0
+        for lote in _em_lotes(objetos, self.lote):
+            with transaction.atomic():
+                modelo.objects.bulk_create(lote)
+            inseridos += len(lote)
+            self.avisar(f"{descricao}: {inseridos}/{total}")
+        return inseridos
+
+    def _numero_inicial(self, qs) -> int:
+        return qs.count() + 1
+
+    def _momento(self):
+        # dia (com menos aberturas no fim de semana) e hora comercial
+        while True:
+            dias_atras = self.rnd.randrange(self.dias)
+            dia = (self.agora - timedelta(days=dias_atras)).date()
+            if self.rnd.random() * 10 < _PESO_DIA_SEMANA[dia.weekday()]:
+                break
+        hora = self.rnd.choices(range(24), weights=_PESO_HORA)[0]
+        momento = timezone.localtime(self.agora - timedelta(days=dias_atras)).replace(hour=hora, minute=self.rnd.randrange(60), second=self.rnd.randrange(60))
+        return min(momento, self.agora - timedelta(minutes=1))
+
+    # --- cadastros -----------------------------------------------------------
+
+    def lojas(self, quantidade):
+        inicio = self._numero_inicial(Loja.objects.filter(nome__startswith="Loja Demo "))
+        novas = [
+            Loja(nome=f"Loja Demo {inicio + i:04d}", endereco=f"Rua {inicio + i}, Centro")
+            for i in range(quantidade)
+        ]
+        if not Loja.objects.filter(is_central=True).exists() and novas:
+            novas[0].is_central = True
+            novas[0].nome = f"Central Demo {inicio:04d}"
+        self._inserir(Loja, novas, "lojas", quantidade)
+        return list(Loja.objects.filter(ativa=True).order_by("-is_central", "pk"))
+
+    def usuarios(self, prefixo, quantidade, grupo, lojas=None):
+        if not quantidade:
+            return []
+        inicio = self._numero_inicial(User.objects.filter(username__startswith=f"{prefixo}_"))
+        senha = make_password(SENHA_PADRAO)  # um hash só: o PBKDF2 é lento de propósito
+        usuarios = self._inserir(User, (
+            User(username=f"{prefixo}_{inicio + i:04d}", password=senha, is_staff=grupo.name == "admin")
+            for i in range(quantidade)
+        ), prefixo, quantidade)
+
+        User.groups.through.objects.bulk_create(
+            User.groups.through(user_id=u.pk, group_id=grupo.pk) for u in usuarios
+        )
+        Perfil.objects.bulk_create(
+            Perfil(user=u, loja=lojas[i % len(lojas)] if lojas else None) for i, u in enumerate(usuarios)
+        )
+        return usuarios
+
+    def categorias_problema(self):
+        for nome in CATEGORIAS_PROBLEMA:
+            CategoriaProblema.objects.get_or_create(nome=nome)
+        return list(CategoriaProblema.objects.filter(ativo=True))
+
+    def produtos(self, quantidade, lojas):
+        categorias = [Categoria.objects.get_or_create(nome=nome)[0] for nome in CATEGORIAS_ESTOQUE]
+        inicio = self._numero_inicial(Produto.objects.filter(nome__startswith="Produto Demo "))
+        produtos = self._inserir(Produto, (
+            Produto(
+                nome=f"Produto Demo {inicio + i:06d}",
+                categoria=self.rnd.choice(categorias),
+                unidade=self.rnd.choice(("un", "un", "un", "cx", "m", "kg")),
+                estoque_minimo=self.rnd.choice((0, 2, 5, 5, 10, 20)),
+                ativo=self.rnd.random() > 0.05,
+            )
+            for i in range(quantidade)
+        ), "produtos", quantidade)
+
+        # Todo produto tem saldo no Central; nas lojas, só uma parte
+        central = next((l for l in lojas if l.is_central), None)
+
+        def saldos():
+            for produto in produtos:
+                for loja in lojas:
+                    if loja is central:
+                        quantidade_loja = 0 if self.rnd.random() < 0.1 else self.rnd.randint(0, produto.estoque_minimo * 3 + 10)
+                    elif self.rnd.random() < 0.2:
+                        quantidade_loja = self.rnd.randint(0, 15)
+                    else:
+                        continue
+                    yield SaldoEstoque(produto=produto, loja=loja, quantidade=quantidade_loja)
+
+        self._inserir_sem_retorno(SaldoEstoque, saldos(), "saldos", "?")
+        self.avisar("atualizando os totais de estoque dos produtos")
+        reconciliar()
+        return produtos
+
+    # --- movimento -----------------------------------------------------------
+
+    def ordens(self, quantidade, lojas, solicitantes, tecnicos, categorias):
+        pesos_lojas = _pesos_zipf(len(lojas))
+        por_loja = {}
+        for s in solicitantes:
+            por_loja.setdefault(s.perfil.loja_id, []).append(s)
+        prioridades, pesos_prioridade = zip(*_PESO_PRIORIDADE.items())
+
+        def gerar():
+            for i in range(quantidade):
+                loja = self.rnd.choices(lojas, weights=pesos_lojas)[0]
+                abertura = self._momento()
+                idade = (self.agora - abertura).days
+                prioridade = self.rnd.choices(prioridades, weights=pesos_prioridade)[0]
+
+                # quanto mais antiga, maior a chance de já estar encerrada
+                if self.rnd.random() < math.exp(-idade / 15):
+                    status = self.rnd.choice(("ABERTA", "EM_ANALISE", "EM_EXECUCAO"))
+                else:
+                    status = "CANCELADA" if self.rnd.random() < 0.08 else "FINALIZADA"
+
+                fechamento = None
+                if status in ("FINALIZADA", "CANCELADA"):
+                    horas = self.rnd.lognormvariate(math.log(20), 1.1) * _FATOR_PRIORIDADE[prioridade]
+                    fechamento = min(abertura + timedelta(hours=horas), self.agora)
+
+                yield OrdemServico(
+                    loja=loja,
+                    solicitante=self.rnd.choice(por_loja.get(loja.pk) or solicitantes),
+                    descricao_problema=f"Problema gerado {i}",
+                    categoria=self.rnd.choice(categorias) if self.rnd.random() > 0.1 else None,
+                    prioridade=prioridade,
+                    status=status,
+                    data_abertura=abertura,
+                    data_fechamento=fechamento,
+                    atualizado_em=fechamento or abertura,
+                    tecnico_responsavel=self.rnd.choice(tecnicos) if status != "ABERTA" else None,
+                    solucao="Resolvido no local" if status == "FINALIZADA" else "",
+                    motivo_cancelamento="Aberta em duplicidade" if status == "CANCELADA" else "",
+                    custo_total=(
+                        Decimal(str(round(self.rnd.lognormvariate(math.log(150), 0.9), 2)))
+                        if status == "FINALIZADA" and self.rnd.random() < 0.6 else None
+                    ),
+                )
+
+        # Só o necessário para os andamentos, não as instâncias inteiras
+        resumo = []
+        with _datas_manuais(OrdemServico, "data_abertura", "atualizado_em"):
+            for lote in _em_lotes(gerar(), self.lote):
+                with transaction.atomic():
+                    criadas = OrdemServico.objects.bulk_create(lote)
+                resumo += [
+                    (o.pk, o.solicitante_id, o.tecnico_responsavel_id, o.status, o.data_abertura, o.data_fechamento)
+                    for o in criadas
+                ]
+                self.avisar(f"OS: {len(resumo)}/{quantidade}")
+        return resumo
+
+    def andamentos(self, ordens):
+        def gerar():
+            for os_id, solicitante_id, tecnico_id, status, abertura, fechamento in ordens:
+                fim = fechamento or self.agora
+                qtd = self.rnd.randint(1, 5) if fechamento else self.rnd.randint(0, 3)
+                for _ in range(qtd):
+                    autor = tecnico_id if tecnico_id and self.rnd.random() < 0.7 else solicitante_id
+                    yield AndamentoOS(
+                        os_id=os_id,
+                        autor_id=autor,
+                        criado_em=abertura + (fim - abertura) * self.rnd.random(),
+                        texto="Atualização gerada",
+                        visibilidade="INTERNO" if self.rnd.random() < 0.25 else "PUBLICO",
+                    )
+
+        with _datas_manuais(AndamentoOS, "criado_em"):
+            return self._inserir_sem_retorno(AndamentoOS, gerar(), "andamentos", "?")
+
+    def viagens(self, quantidade, lojas, tecnicos, ordens):
+        central = next((l for l in lojas if l.is_central), lojas[0])
+        inicio = self._numero_inicial(Veiculo.objects.filter(placa__startswith="DEM"))
+        self._inserir(Veiculo, (Veiculo(placa=f"DEM{inicio + i:04d}", descricao="Veículo demo") for i in range(5)), "veículos", 5)
+        veiculos = list(Veiculo.objects.filter(ativo=True))
+        pesos_lojas = _pesos_zipf(len(lojas))
+
+        def gerar():
+            for i in range(quantidade):
+                partida = self.agora + timedelta(hours=self.rnd.uniform(-24 * self.dias, 24 * 14))
+                if partida > self.agora:
+                    status, retorno = "PLANEJADA", None
+                elif self.agora - partida < timedelta(hours=8):
+                    status, retorno = "EM_ANDAMENTO", None
+                else:
+                    status = "CANCELADA" if self.rnd.random() < 0.1 else "FECHADA"
+                    retorno = partida + timedelta(hours=self.rnd.uniform(1, 10)) if status == "FECHADA" else None
+                yield Viagem(
+                    referencia_os_id=self.rnd.choice(ordens)[0] if ordens and self.rnd.random() < 0.5 else None,
+                    origem=central,
+                    destino=self.rnd.choices(lojas, weights=pesos_lojas)[0],
+                    responsavel=self.rnd.choice(tecnicos),
+                    veiculo=self.rnd.choice(veiculos) if veiculos else None,
+                    data_partida=partida,
+                    data_retorno=retorno,
+                    status=status,
+                    motivo=f"Atendimento gerado {i}",
+                )
+
+        return self._inserir_sem_retorno(Viagem, gerar(), "viagens", quantidade)
+
+    def externas(self, quantidade, lojas, admin, ordens):
+        inicio = self._numero_inicial(PrestadorServico.objects.filter(nome__startswith="Prestador Demo "))
+        self._inserir(PrestadorServico, (
+            PrestadorServico(nome=f"Prestador Demo {inicio + i:03d}", tipo_servico="Manutenção", cidade="Cidade")
+            for i in range(15)
+        ), "prestadores", 15)
+        prestadores = list(PrestadorServico.objects.filter(ativo=True))
+        status = [codigo for codigo, _ in OrdemExterna.STATUS_CHOICES]
+        pesos_status = [5, 8, 6, 6, 6, 4, 55, 10]
+        pesos_lojas = _pesos_zipf(len(lojas))
+
+        def gerar():
+            for i in range(quantidade):
+                envio = self._momento().date()
+                situacao = self.rnd.choices(status, weights=pesos_status)[0]
+                yield OrdemExterna(
+                    loja=self.rnd.choices(lojas, weights=pesos_lojas)[0],
+                    prestador=self.rnd.choice(prestadores),
+                    os_interna_id=self.rnd.choice(ordens)[0] if ordens and self.rnd.random() < 0.4 else None,
+                    equipamento=f"Equipamento {i}",
+                    descricao_defeito="Defeito gerado",
+                    status=situacao,
+                    prioridade=self.rnd.choice("BMMMAC"),
+                    data_envio=envio,
+                    data_retorno=envio + timedelta(days=self.rnd.randint(2, 30)) if situacao == "CONCLUIDA" else None,
+                    criado_por=admin,
+                    criado_em=inicio_do_dia(envio),
+                    atualizado_em=self.agora,
+                )
+
+        with _datas_manuais(OrdemExterna, "criado_em", "atualizado_em"):
+            return self._inserir_sem_retorno(OrdemExterna, gerar(), "ordens externas", quantidade)
+
+    def movimentacoes(self, quantidade, produtos, lojas, usuario):
+        central = next((l for l in lojas if l.is_central), lojas[0])
+        pesos_produtos = _pesos_zipf(len(produtos), 1.0)
+        pesos_lojas = _pesos_zipf(len(lojas))
+        # Transferências saem do Central para as demais lojas (nunca para ele mesmo)
+        destinos = [l for l in lojas if l is not central]
+        pesos_destinos = _pesos_zipf(len(destinos))
+        tipos, pesos_tipos = ("ENTRADA", "SAIDA", "TRANSFERENCIA"), (20, 30, 50 if destinos else 0)
+
+        def gerar():
+            for _ in range(quantidade):
+                tipo = self.rnd.choices(tipos, weights=pesos_tipos)[0]
+                loja = self.rnd.choices(lojas, weights=pesos_lojas)[0]
+                if tipo == "TRANSFERENCIA":
+                    loja = self.rnd.choices(destinos, weights=pesos_destinos)[0]
+                yield Movimentacao(
+                    produto=self.rnd.choices(produtos, weights=pesos_produtos)[0],
+                    tipo=tipo,
+                    origem=None if tipo == "ENTRADA" else (central if tipo == "TRANSFERENCIA" else loja),
+                    destino={"ENTRADA": central, "SAIDA": None, "TRANSFERENCIA": loja}[tipo],
+                    quantidade=self.rnd.choice((1, 1, 1, 2, 2, 5, 10, 50)),
+                    data_movimentacao=self._momento(),
+                    usuario=usuario,
+                )
+
+        with _datas_manuais(Movimentacao, "data_movimentacao"):
+            return self._inserir_sem_retorno(Movimentacao, gerar(), "movimentações", quantidade)
+
+    # --- tudo ----------------------------------------------------------------
+
+    def gerar(self, lojas=0, tecnicos=0, produtos=0, os=0, viagens=0, externas=0, movimentacoes=0) -> dict:
+        grupo_admin, _ = Group.objects.get_or_create(name="admin")
+        grupo_user, _ = Group.objects.get_or_create(name="user")
+        criados = {}
+
+        todas_lojas = self.lojas(lojas)
+        criados["lojas"] = lojas
+        lojas_comuns = [l for l in todas_lojas if not l.is_central] or todas_lojas
+        if not todas_lojas:
+            return criados
+
+        lista_tecnicos = self.usuarios("tecnico_demo", tecnicos, grupo_admin)
+        lista_tecnicos = lista_tecnicos or list(User.objects.filter(groups=grupo_admin)[:10])
+        solicitantes = self.usuarios("loja_demo", len(lojas_comuns) if os else 0, grupo_user, lojas_comuns)
+        solicitantes = list(
+            User.objects.filter(groups=grupo_user, perfil__loja__isnull=False).select_related("perfil")
+        )
+        criados["usuarios"] = len(lista_tecnicos) + len(solicitantes)
+        admin = lista_tecnicos[0] if lista_tecnicos else None
+
+        lista_produtos = self.produtos(produtos, todas_lojas) if produtos else []
+        criados["produtos"] = len(lista_produtos)
+
+        ordens = []
+        if os and solicitantes and lista_tecnicos:
+            ordens = self.ordens(os, lojas_comuns, solicitantes, lista_tecnicos, self.categorias_problema())
+            criados["os"] = len(ordens)
+            criados["andamentos"] = self.andamentos(ordens)
+            self.avisar("recalculando o resumo diário de OS")
+            reconstruir(OrdemServico, ResumoDiarioOS)
+
+        if viagens and lista_tecnicos:
+            criados["viagens"] = self.viagens(viagens, todas_lojas, lista_tecnicos, ordens)
+        if externas and admin:
+            criados["externas"] = self.externas(externas, todas_lojas, admin, ordens)
+        if movimentacoes and lista_produtos and admin:
+            criados["movimentacoes"] = self.movimentacoes(movimentacoes, lista_produtos, todas_lojas, admin)
+
+        # bulk_create não dispara os signals que invalidam os caches
+        nova_versao("os", "andamentos", "estoque", "viagens", "lojas", "categorias")
+        return criados
@@ -0,0 +1,208 @@
+import zlib
+
+from django.http import StreamingHttpResponse
+
+
+# Gerador de PDF mínimo, sem dependências: fontes padrão (Helvetica, com
+# WinAnsiEncoding para os acentos), texto, linhas e retângulos. Cada página
+# é gravada assim que fica pronta; só a lista de páginas e os offsets dos
+# objetos ficam em memória até o final (xref).
+
+A4_PAISAGEM = (842, 595)
+
+# Larguras da Helvetica (AFM padrão) para os caracteres ASCII 32..126, em 1/1000 do tamanho
+_LARGURAS_ASCII = (
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+)
+_LARGURAS = {chr(32 + i): largura for i, largura in enumerate(_LARGURAS_ASCII)}
+_LARGURA_PADRAO = 556  # letras acentuadas e demais símbolos
+_FATOR_NEGRITO = 1.06
+
+
+def largura_texto(texto: str, tamanho: float, negrito=False) -> float:
+    total = sum(_LARGURAS.get(c, _LARGURA_PADRAO) for c in texto)
+    if negrito:
+        total *= _FATOR_NEGRITO
+    return total * tamanho / 1000
+
+
+def cortar_texto(texto: str, largura_max: float, tamanho: float, negrito=False) -> str:
+    if largura_texto(texto, tamanho, negrito) <= largura_max:
+        return texto
+    while texto and largura_texto(texto + "…", tamanho, negrito) > largura_max:
+        texto = texto[:-1]
+    return texto + "…"
+
+
+def _literal(texto: str) -> bytes:
+    bruto = texto.replace("\r", " ").replace("\n", " ").encode("cp1252", errors="replace")
+    return b"(" + bruto.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+class EscritorPDF:
+    # Objetos fixos: 1 catálogo, 2 árvore de páginas (gravada no fim), 3 e 4 fontes
+    _CATALOGO, _PAGINAS, _FONTE, _FONTE_NEGRITO = 1, 2, 3, 4
+
+    def __init__(self, largura: int, altura: int):
+        self.largura = largura
+        self.altura = altura
+        self._posicao = 0
+        self._offsets = {}
+        self._proximo = 5
+        self._paginas = []
+
+    def _objeto(self, numero: int, corpo: bytes) -> bytes:
+        dados = b"%d 0 obj\n" % numero + corpo + b"\nendobj\n"
+        self._offsets[numero] = self._posicao
+        self._posicao += len(dados)
+        return dados
+
+    def _novo_numero(self) -> int:
+        numero = self._proximo
+        self._proximo += 1
+        return numero
+
+    def inicio(self) -> bytes:
+        cabecalho = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+        self._posicao = len(cabecalho)
+        fonte = b"<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>"
+        return (
+            cabecalho
+            + self._objeto(self._FONTE, fonte % b"Helvetica")
+            + self._objeto(self._FONTE_NEGRITO, fonte % b"Helvetica-Bold")
+        )
+
+    def pagina(self, conteudo: bytes) -> bytes:
+        comprimido = zlib.compress(conteudo)
+        n_conteudo, n_pagina = self._novo_numero(), self._novo_numero()
+        self._paginas.append(n_pagina)
+        stream = b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(comprimido) + comprimido + b"\nendstream"
+        pagina = (
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] "
+            b"/Resources << /Font << /F1 %d 0 R /F2 %d 0 R >> >> /Contents %d 0 R >>"
+            % (self._PAGINAS, self.largura, self.altura, self._FONTE, self._FONTE_NEGRITO, n_conteudo)
+        )
+        return self._objeto(n_conteudo, stream) + self._objeto(n_pagina, pagina)
+
+    def fim(self) -> bytes:
+        filhos = b" ".join(b"%d 0 R" % n for n in self._paginas)
+        dados = self._objeto(self._PAGINAS, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (filhos, len(self._paginas)))
+        dados += self._objeto(self._CATALOGO, b"<< /Type /Catalog /Pages %d 0 R >>" % self._PAGINAS)
+
+        inicio_xref = self._posicao
+        partes = [b"xref\n0 %d\n" % self._proximo, b"0000000000 65535 f \n"]
+        partes += [b"%010d 00000 n \n" % self._offsets[n] for n in range(1, self._proximo)]
+        partes.append(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                      % (self._proximo, self._CATALOGO, inicio_xref))
+        return dados + b"".join(partes)
+
+
+# Layout em fluxo: o cursor desce pela página e quebra automaticamente.
+# As páginas prontas ficam em espera até o gerador chamar descarregar(),
+# o que mantém a memória limitada a uma página por vez.
+class DocumentoPDF:
+    def __init__(self, titulo: str, tamanho=A4_PAISAGEM, margem=36):
+        self.titulo = titulo
+        self.largura, self.altura = tamanho
+        self.margem = margem
+        self.numero_pagina = 0
+        self._escritor = EscritorPDF(self.largura, self.altura)
+        self._prontas = [self._escritor.inicio()]
+        self._comandos = []
+        self._nova_pagina()
+
+    @property
+    def largura_util(self) -> float:
+        return self.largura - 2 * self.margem
+
+    def _nova_pagina(self):
+        self.numero_pagina += 1
+        self._comandos = []
+        self.y = self.altura - self.margem
+
+    def _fechar_pagina(self):
+        rodape = f"{self.titulo} — Página {self.numero_pagina}"
+        self.texto(self.margem, self.margem / 2, rodape, tamanho=7)
+        self._prontas.append(self._escritor.pagina(b"".join(self._comandos)))
+
+    def quebrar_pagina(self):
+        self._fechar_pagina()
+        self._nova_pagina()
+
+    def cabe(self, altura: float) -> bool:
+        return self.y - altura >= self.margem
+
+    def reservar(self, altura: float):
+        if not self.cabe(altura):
+            self.quebrar_pagina()
+
+    # Primitivas (coordenadas em pontos, origem no canto inferior esquerdo)
+    def texto(self, x, y, texto, tamanho=9, negrito=False):
+        fonte = b"F2" if negrito else b"F1"
+        self._comandos.append(
+            b"BT /%s %.1f Tf %.2f %.2f Td %s Tj ET\n" % (fonte, tamanho, x, y, _literal(str(texto)))
+        )
+
+    def linha(self, x1, y1, x2, y2, espessura=0.5):
+        self._comandos.append(b"%.2f w %.2f %.2f m %.2f %.2f l S\n" % (espessura, x1, y1, x2, y2))
+
+    def retangulo(self, x, y, largura, altura, cinza=0.92):
+        self._comandos.append(b"%.2f g %.2f %.2f %.2f %.2f re f 0 g\n" % (cinza, x, y, largura, altura))
+
+    # Blocos de fluxo
+    def paragrafo(self, texto, tamanho=9, negrito=False, espaco_depois=4):
+        altura = tamanho * 1.4
+        self.reservar(altura)
+        self.y -= altura
+        self.texto(self.margem, self.y, cortar_texto(str(texto), self.largura_util, tamanho, negrito), tamanho, negrito)
+        self.y -= espaco_depois
+
+    def espaco(self, altura):
+        self.y -= altura
+
+    def _linha_tabela(self, colunas, valores, tamanho, negrito, fundo):
+        altura = tamanho * 1.8
+        self.y -= altura
+        if fundo:
+            self.retangulo(self.margem, self.y, sum(l for _, l in colunas), altura)
+        x = self.margem
+        for (_, largura), valor in zip(colunas, valores):
+            texto = cortar_texto(str(valor), largura - 4, tamanho, negrito)
+            self.texto(x + 2, self.y + tamanho * 0.55, texto, tamanho, negrito)
+            x += largura
+
+    # Tabela paginada: repete o cabeçalho a cada página e entrega as páginas
+    # prontas conforme avança (use com "yield from")
+    def tabela(self, colunas, linhas, tamanho=8):
+        altura_linha = tamanho * 1.8
+        cabecalho = [titulo for titulo, _ in colunas]
+
+        self.reservar(altura_linha * 2)
+        self._linha_tabela(colunas, cabecalho, tamanho, True, True)
+        for valores in linhas:
+            if not self.cabe(altura_linha):
+                self.quebrar_pagina()
+                yield from self.descarregar()
+                self._linha_tabela(colunas, cabecalho, tamanho, True, True)
+            self._linha_tabela(colunas, valores, tamanho, False, False)
+        self.y -= altura_linha / 2
+
+    def descarregar(self):
+        prontas, self._prontas = self._prontas, []
+        yield from prontas
+
+    def finalizar(self):
+        self._fechar_pagina()
+        self._prontas.append(self._escritor.fim())
+        yield from self.descarregar()
+
+
+def resposta_pdf(blocos, nome_arquivo: str):
+    response = StreamingHttpResponse(blocos, content_type="application/pdf")
+    response["Content-Disposition"] = f'attachment; filename="{nome_arquivo}"'
+    return response
@@ -0,0 +1,299 @@
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from contas.models import Perfil
+from core.consultas import medir_consultas
+from estoque.models import Categoria, Loja, Movimentacao, Produto, SaldoEstoque
+from estoque.saldos import reconciliar
+from ordens.models import AndamentoOS, CategoriaProblema, OrdemServico
+from prestadores.models import OrdemExterna, PrestadorServico
+from relatorios.models import ExportacaoJob, ParteExportacao, ResumoDiarioOS
+from relatorios.resumo import reconstruir
+from viagens.models import Veiculo, Viagem
+
+
+# Orçamento de cada rota (nome da URL): (máximo de consultas, máximo de ms).
+# O máximo de consultas é o valor medido com a base de popular_base() mais uma
+# pequena folga; listas precisam ficar dentro dele com muitas linhas na tela,
+# então um N+1 novo estoura o teste. O tempo é da requisição inteira (com o
+# corpo em streaming) e só pega regressões grosseiras; por variar com a
+# máquina, só é conferido com ORCAMENTO_TEMPO=1.
+ORCAMENTOS = {
+    "home": (5, 500),
+    "contas:login": (2, 500),
+    "contas:logout": (6, 500),
+    "contas:dashboard": (14, 1000),
+    "contas:registrar": (6, 500),
+    "contas:admin_area": (5, 500),
+    "ordens:os_nova": (6, 500),
+    "ordens:os_sucesso": (5, 500),
+    "ordens:os_listar": (6, 1000),
+    "ordens:os_minhas": (6, 1000),
+    "ordens:os_detalhe": (13, 1000),
+    "ordens:os_comentario": (7, 500),
+    "ordens:os_anexo": (7, 500),
+    "ordens:os_acao_status": (14, 500),
+    "ordens:os_atribuir": (16, 500),
+    "viagens:viagem_nova": (11, 1000),
+    "viagens:nova": (11, 1000),
+    "viagens:viagem_nova_os": (13, 1000),
+    "viagens:viagem_detalhe": (7, 500),
+    "viagens:detalhe": (7, 500),
+    "relatorios:viagens": (14, 1000),
+    "relatorios:os": (8, 1000),
+    "relatorios:os_csv": (12, 2000),
+    "relatorios:os_pdf": (8, 2000),
+    "relatorios:problemas": (13, 1000),
+    "relatorios:problemas_csv": (14, 2000),
+    "relatorios:exportacoes": (6, 500),
+    "relatorios:exportacao_download": (6, 500),
+    "estoque:home": (12, 1000),
+    "estoque:exportar_csv": (7, 2000),
+    "estoque:movimentar": (9, 500),
+    "estoque:importar": (16, 2000),
+    "estoque:romaneios": (6, 500),
+    "estoque:romaneio_novo": (20, 2000),
+    "estoque:romaneio_detalhe": (6, 500),
+    "prestadores:ordem_externa_lista": (8, 1000),
+    "prestadores:ordem_externa_nova": (8, 1000),
+    "prestadores:ordem_externa_detalhe": (10, 1000),
+    "prestadores:contatos_lista": (6, 500),
+    "api_login": (5, 500),
+    "api_refresh": (3, 500),
+    "api_google_login": (2, 500),
+    "api_os_categorias": (3, 500),
+    "api_os_lista": (5, 1000),
+    "api_os_lote": (20, 1000),  # 5 operações; cada uma abre um savepoint
+    "api_os_detalhe": (5, 500),
+    "api_sync": (5, 1000),
+    "api_lojas": (3, 500),
+    "api_dashboard": (4, 1000),
+    "api_relatorio_os": (4, 500),
+}
+
+CONFERIR_TEMPO = os.environ.get("ORCAMENTO_TEMPO") == "1"
+
+# Cache em memória, como o da produção (Redis ou LocMem): as contagens não
+# dependem das settings com que a suíte roda
+CACHE_TESTES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "orcamento"}}
+
+SENHA = "senha-de-teste"
+
+_STATUS_OS = ("ABERTA", "EM_ANALISE", "EM_EXECUCAO", "FINALIZADA", "FINALIZADA", "CANCELADA")
+_PRIORIDADES = ("BAIXA", "MEDIA", "MEDIA", "ALTA", "CRITICA")
+
+
+# Base parecida com a de produção, em escala pequena: várias lojas, usuários
+# de cada papel, OS em todos os status com andamentos, viagens, estoque,
+# prestadores e uma exportação pronta. Devolve um dict com os objetos usados
+# nos testes.
+def popular_base(qtd_os=60) -> dict:
+    agora = timezone.now()
+    grupo_admin = Group.objects.get(name="admin")
+
+    lojas = [Loja.objects.create(nome="Central", is_central=True)]
+    lojas += [Loja.objects.create(nome=f"Loja {i:02d}") for i in range(1, 6)]
+
+    admin = User.objects.create_user("admin", password=SENHA, is_staff=True)
+    admin.groups.add(grupo_admin)
+    tecnicos = []
+    for i in range(3):
+        tecnico = User.objects.create_user(f"tecnico{i}", password=SENHA)
+        tecnico.groups.add(grupo_admin)
+        tecnicos.append(tecnico)
+    solicitantes = []
+    for i, loja in enumerate(lojas[1:]):
+        solicitante = User.objects.create_user(f"loja{i}", password=SENHA)
+        Perfil.objects.update_or_create(user=solicitante, defaults={"loja": loja})
+        solicitantes.append(solicitante)
+
+    categorias = [
+        CategoriaProblema.objects.create(nome=nome)
+        for nome in ("Elétrica", "Hidráulica", "Refrigeração", "Informática")
+    ]
+
+    ordens = []
+    for i in range(qtd_os):
+        status = _STATUS_OS[i % len(_STATUS_OS)]
+        ordens.append(OrdemServico.objects.create(
+            loja=lojas[1 + i % len(solicitantes)],
+            solicitante=solicitantes[i % len(solicitantes)],
+            descricao_problema=f"Problema {i}",
+            categoria=categorias[i % len(categorias)] if i % 7 else None,
+            prioridade=_PRIORIDADES[i % len(_PRIORIDADES)],
+            status=status,
+            tecnico_responsavel=tecnicos[i % len(tecnicos)] if status != "ABERTA" else None,
+            custo_total=Decimal(50 + i) if status == "FINALIZADA" else None,
+            solucao="Resolvido" if status == "FINALIZADA" else "",
+            motivo_cancelamento="Duplicada" if status == "CANCELADA" else "",
+        ))
+
+    # Espalha as aberturas pelos últimos dias e refaz o resumo diário
+    for i, os_obj in enumerate(ordens):
+        abertura = agora - timedelta(days=i % 30, hours=i % 24)
+        fechamento = abertura + timedelta(hours=1 + (i * 7) % 200) if os_obj.status == "FINALIZADA" else None
+        OrdemServico.objects.filter(pk=os_obj.pk).update(data_abertura=abertura, data_fechamento=fechamento)
+    reconstruir(OrdemServico, ResumoDiarioOS)
+
+    AndamentoOS.objects.bulk_create(
+        AndamentoOS(
+            os=os_obj,
+            autor=tecnicos[j % len(tecnicos)] if j else os_obj.solicitante,
+            texto=f"Andamento {j}",
+            visibilidade="INTERNO" if j == 2 else "PUBLICO",
+        )
+        for os_obj in ordens for j in range(3)
+    )
+
+    veiculo = Veiculo.objects.create(placa="ABC1D23", descricao="Utilitário")
+    viagens = [
+        Viagem.objects.create(
+            referencia_os=ordens[i] if i % 2 else None,
+            origem=lojas[0],
+            destino=lojas[1 + i % 5],
+            responsavel=tecnicos[i % len(tecnicos)],
+            veiculo=veiculo,
+            data_partida=agora - timedelta(days=i),
+            status=("PLANEJADA", "EM_ANDAMENTO", "FECHADA", "CANCELADA")[i % 4],
+            motivo=f"Atendimento {i}",
+        )
+        for i in range(20)
+    ]
+
+    categorias_estoque = [Categoria.objects.create(nome=n) for n in ("Cabos", "Lâmpadas", "Ferramentas")]
+    produtos = [
+        Produto.objects.create(
+            nome=f"Produto {i:02d}",
+            categoria=categorias_estoque[i % 3],
+            unidade="un",
+            estoque_minimo=5,
+        )
+        for i in range(30)
+    ]
+    SaldoEstoque.objects.bulk_create(
+        SaldoEstoque(produto=produto, loja=loja, quantidade=(i * 3 + j) % 12)
+        for i, produto in enumerate(produtos) for j, loja in enumerate(lojas)
+    )
+    reconciliar()
+    Movimentacao.objects.bulk_create(
+        Movimentacao(
+            produto=produtos[i % len(produtos)],
+            tipo="TRANSFERENCIA",
+            origem=lojas[0],
+            destino=lojas[1 + i % 5],
+            quantidade=1,
+            usuario=admin,
+        )
+        for i in range(20)
+    )
+
+    prestadores = [
+        PrestadorServico.objects.create(nome=f"Prestador {i}", tipo_servico="Manutenção", cidade="Cidade")
+        for i in range(4)
+    ]
+    externas = [
+        OrdemExterna.objects.create(
+            loja=lojas[i % len(lojas)],
+            prestador=prestadores[i % len(prestadores)],
+            os_interna=ordens[i],
+            equipamento=f"Equipamento {i}",
+            descricao_defeito="Não liga",
+            criado_por=admin,
+        )
+        for i in range(20)
+    ]
+
+    exportacao = ExportacaoJob.objects.create(
+        tipo="os", chave="teste", status="CONCLUIDA", solicitante=admin, nome_arquivo="os.csv",
+        concluido_em=agora,
+    )
+    ParteExportacao.objects.create(job=exportacao, ordem=0, dados=b"id;loja\n")
+
+    return {
+        "admin": admin,
+        "tecnicos": tecnicos,
+        "solicitantes": solicitantes,
+        "lojas": lojas,
+        "categorias": categorias,
+        "ordens": ordens,
+        "viagens": viagens,
+        "produtos": produtos,
+        "prestadores": prestadores,
+        "externas": externas,
+        "exportacao": exportacao,
+    }
+
+
+# Base dos testes de orçamento: popula a base uma vez por classe e mede cada
+# requisição com assertOrcamento(nome_da_url, usuario, ...)
+class OrcamentoTestCase(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._media = tempfile.mkdtemp()
+        # Hash rápido: o PBKDF2 sozinho gastaria boa parte do orçamento do login
+        cls._settings_override = override_settings(
+            CACHES=CACHE_TESTES,
+            MEDIA_ROOT=cls._media,
+            PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+        )
+        cls._settings_override.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls._settings_override.disable()
+        shutil.rmtree(cls._media, ignore_errors=True)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.base = popular_base()
+        cls.admin = cls.base["admin"]
+        cls.solicitante = cls.base["solicitantes"][0]
+
+    def setUp(self):
+        cache.clear()
+
+    def cliente(self, usuario=None, api=False):
+        cliente = APIClient() if api else self.client_class()
+        if usuario is not None:
+            if api:
+                cliente.force_authenticate(usuario)
+            else:
+                cliente.force_login(usuario)
+        return cliente
+
+    def assertOrcamento(self, nome, usuario=None, metodo="get", kwargs=None, dados=None,
+                        status=200, api=False, **extra):
+        max_consultas, max_ms = ORCAMENTOS[nome]
+        cliente = self.cliente(usuario, api)
+        url = reverse(nome, kwargs=kwargs)
+        if api and metodo != "get":
+            extra.setdefault("format", "json")
+
+        inicio = time.perf_counter()
+        with medir_consultas() as medidor:
+            resposta = getattr(cliente, metodo)(url, dados, **extra)
+            if resposta.streaming:
+                b"".join(resposta.streaming_content)
+        ms = (time.perf_counter() - inicio) * 1000
+
+        self.assertEqual(resposta.status_code, status, f"{nome}: status {resposta.status_code}")
+        self.assertLessEqual(
+            medidor.total, max_consultas,
+            f"{nome}: {medidor.total} consultas (orçamento {max_consultas})\n" + "\n".join(medidor.sql),
+        )
+        if CONFERIR_TEMPO:
+            self.assertLessEqual(ms, max_ms, f"{nome}: {ms:.0f} ms (orçamento {max_ms} ms)")
+        return resposta
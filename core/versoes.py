@@ -0,0 +1,58 @@
+import time
+
+from django.core.cache import cache
+
+
+# Versões por assunto ("lojas", "categorias", ...) guardadas no cache compartilhado.
+# Cada mudança grava um valor novo (time_ns), nunca reaproveitado mesmo se o
+# cache for limpo, então quem compara versões nunca confunde estado antigo com novo.
+PREFIXO = "versao:"
+
+# Quanto tempo quem não pegou a trava espera pelo cálculo de outro processo
+TEMPO_TRAVA = 5
+INTERVALO_ESPERA = 0.1
+
+_AUSENTE = object()
+
+
+def versao(nome: str) -> int:
+    return cache.get_or_set(PREFIXO + nome, time.time_ns, timeout=None)
+
+
+def versoes(*nomes: str) -> list[int]:
+    atuais = cache.get_many([PREFIXO + nome for nome in nomes])
+    return [atuais.get(PREFIXO + nome) or versao(nome) for nome in nomes]
+
+
+def nova_versao(*nomes: str) -> None:
+    agora = time.time_ns()
+    cache.set_many({PREFIXO + nome: agora for nome in nomes}, timeout=None)
+
+
+# Valor calculado uma vez e compartilhado entre processos até expirar ou até
+# uma das versões de "assuntos" mudar (a chave inclui as versões atuais).
+# Enquanto um processo calcula, os demais aguardam o resultado em vez de
+# repetir a mesma consulta.
+def em_cache(chave: str, assuntos, calcular, timeout: int):
+    chave = f"{chave}:{'.'.join(str(v) for v in versoes(*assuntos))}"
+    valor = cache.get(chave, _AUSENTE)
+    if valor is not _AUSENTE:
+        return valor
+
+    trava = f"trava:{chave}"
+    dono = cache.add(trava, 1, timeout=TEMPO_TRAVA)
+    if not dono:
+        limite = time.monotonic() + TEMPO_TRAVA
+        while time.monotonic() < limite:
+            time.sleep(INTERVALO_ESPERA)
+            valor = cache.get(chave, _AUSENTE)
+            if valor is not _AUSENTE:
+                return valor
+
+    try:
+        valor = calcular()
+        cache.set(chave, valor, timeout)
+    finally:
+        if dono:
+            cache.delete(trava)
+    return valor
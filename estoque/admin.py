@@ -1,9 +1,8 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from django.db.models import F, Sum, Q, Count
-from django.db.models.functions import Coalesce
+from django.db.models import F, Q, Count
 
-from .models import Categoria, Produto, Loja, SaldoEstoque
+from .models import Categoria, ItemRomaneio, Produto, Loja, Romaneio, SaldoEstoque, SnapshotEstoque
 
 
 class MinimoCentralFilter(admin.SimpleListFilter):
@@ -17,14 +16,9 @@ class MinimoCentralFilter(admin.SimpleListFilter):
             ("zerado_central", "Central zerado"),
         ]
 
-    # Anota o saldo do CENTRAL por produto
+    # saldo_central é coluna do Produto (mantida pelos signals de SaldoEstoque)
     def queryset(self, request, queryset):
-        qs = queryset.annotate(
-            saldo_central=Coalesce(
-                Sum("saldos__quantidade", filter=Q(saldos__loja__is_central=True)),
-                0,
-            )
-        )
+        qs = queryset
         val = self.value()
         if val == "baixo":
             return qs.filter(saldo_central__lt=F("estoque_minimo"))
@@ -87,21 +81,18 @@ class ProdutoAdmin(admin.ModelAdmin):
     search_fields = ("nome", "modelo", "fabricante")
     inlines = [SaldoInline]
 
-    def saldo_central_val(self, obj):
-        return obj.saldos.filter(loja__is_central=True).aggregate(
-            t=Coalesce(Sum("quantidade"), 0)
-        )["t"]
-
     def saldo_central_colored(self, obj):
-        sc = self.saldo_central_val(obj)
+        sc = obj.saldo_central
         if sc < obj.estoque_minimo:
             return format_html('<span style="color:red;font-weight:bold;">{}</span>', sc)
         return sc
     saldo_central_colored.short_description = "Saldo no Central"
+    saldo_central_colored.admin_order_field = "saldo_central"
 
     def estoque_total(self, obj):
-        return obj.saldos.aggregate(t=Coalesce(Sum("quantidade"), 0))["t"]
+        return obj.saldo_total
     estoque_total.short_description = "Total (todas as lojas)"
+    estoque_total.admin_order_field = "saldo_total"
 
 
 @admin.register(Categoria)
@@ -121,3 +112,51 @@ class SaldoEstoqueAdmin(admin.ModelAdmin):
         "loja__nome",
     )
     autocomplete_fields = ("produto", "loja")
+
+
+# Romaneios só são criados pela tela (estoque:romaneio_novo), que move os
+# saldos; no admin ficam apenas para consulta
+class ItemRomaneioInline(admin.TabularInline):
+    model = ItemRomaneio
+    extra = 0
+    fields = ("produto", "quantidade")
+    readonly_fields = fields
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Romaneio)
+class RomaneioAdmin(admin.ModelAdmin):
+    list_display = ("id", "criado_em", "origem", "destino", "viagem", "criado_por")
+    list_filter = ("origem", "destino")
+    list_select_related = ("origem", "destino", "viagem", "criado_por")
+    readonly_fields = ("origem", "destino", "viagem", "observacao", "criado_em", "criado_por")
+    inlines = [ItemRomaneioInline]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+# Gerados pelo comando snapshot_estoque
+@admin.register(SnapshotEstoque)
+class SnapshotEstoqueAdmin(admin.ModelAdmin):
+    list_display = ("data", "criado_em", "qtd_saldos")
+    date_hierarchy = "data"
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(_saldos=Count("saldos"))
+
+    @admin.display(description="Saldos")
+    def qtd_saldos(self, obj):
+        return obj._saldos
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 class EstoqueConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'estoque'
+
+    def ready(self):
+        from . import signals  # noqa
@@ -0,0 +1,85 @@
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core.exportacao import iterar_linhas
+from core.filtros import Filtros, Id, Opcoes
+from .models import Produto, Categoria
+
+
+# Filtros da tela de estoque; "situacao_central" usa a coluna saldo_central
+FILTROS_PRODUTOS = Filtros(
+    categoria=Id("categoria_id"),
+    ativo=Opcoes({"sim": Q(ativo=True), "nao": Q(ativo=False)}),
+    situacao_central=Opcoes({
+        "abaixo": Q(saldo_central__lt=F("estoque_minimo")),
+        "ok": Q(saldo_central__gte=F("estoque_minimo"), saldo_central__gt=0),
+        "zerado": Q(saldo_central=0),
+    }),
+)
+
+
+# Produtos (com saldo do Central e total geral já gravados no Produto), com os
+# mesmos filtros da tela. "params" é o request.GET ou um dict equivalente
+def filtrar_produtos(params):
+    qs = FILTROS_PRODUTOS.aplicar(Produto.objects.all(), params)
+    return qs.order_by("nome")
+
+
+def nome_arquivo_estoque(params) -> str:
+    filtros = FILTROS_PRODUTOS.ler(params)
+    categoria_id = filtros.get("categoria", "")
+    ativo = filtros.get("ativo", "")
+    situacao = filtros.get("situacao_central", "")
+
+    partes = ["estoque"]
+
+    if categoria_id:
+        try:
+            cat_nome = Categoria.objects.get(pk=categoria_id).nome
+            partes.append(cat_nome.replace(" ", "_"))
+        except Categoria.DoesNotExist:
+            partes.append(f"cat_{categoria_id}")
+
+    if ativo == "sim":
+        partes.append("ativos")
+    elif ativo == "nao":
+        partes.append("inativos")
+
+    if situacao:
+        partes.append(situacao)
+
+    return "_".join(partes).replace("__", "_").lower() + ".csv"
+
+
+def linhas_estoque(params):
+    qs = filtrar_produtos(params)
+
+    # Cabeçalho
+    yield ["RELATÓRIO DE ESTOQUE"]
+    yield ["Gerado em", timezone.now().strftime("%Y-%m-%d %H:%M")]
+    yield []
+
+    # Colunas
+    yield [
+        "ID", "Nome", "Categoria", "Unidade",
+        "Saldo no Central", "Saldo mínimo (Central)",
+        "Total (todas as lojas)",
+        "Fabricante", "Modelo", "Ativo",
+    ]
+
+    colunas = ("id", "nome", "categoria__nome", "unidade", "saldo_central",
+               "estoque_minimo", "saldo_total", "fabricante", "modelo", "ativo")
+    for (p_id, nome, categoria, unidade, saldo_central, minimo,
+         saldo_total, fabricante, modelo, ativo) in iterar_linhas(qs, *colunas):
+        yield [
+            p_id,
+            nome,
+            categoria or "",
+            unidade or "",
+            saldo_central or 0,
+            minimo,
+            saldo_total or 0,
+            fabricante or "",
+            modelo or "",
+            "Sim" if ativo else "Não",
+        ]
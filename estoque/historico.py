@@ -0,0 +1,127 @@
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import Movimentacao, SaldoEstoque, SnapshotEstoque, SnapshotSaldo
+
+
+# Saldo de (produto, loja) no fim de um dia passado. Em vez de repassar todo
+# o histórico de Movimentacao, parte do ponto conhecido mais próximo da data
+# (um SnapshotEstoque antes ou depois dela, ou o saldo atual) e soma ou
+# desconta só as movimentações entre os dois: o custo depende da distância
+# até o snapshot, não do tamanho do histórico.
+#
+# Os snapshots são gerados pelo comando snapshot_estoque (rodar todo dia,
+# depois da meia-noite). Ajustes de saldo feitos fora de uma Movimentacao
+# (admin, importações antigas) não estão no histórico; por isso o snapshot
+# parte do saldo atual, que os inclui.
+
+TAMANHO_LOTE = 2000
+
+
+def fim_do_dia(dia: date) -> datetime:
+    # Meia-noite (fuso local) do dia seguinte: movimentações antes dela contam no dia
+    return timezone.make_aware(datetime.combine(dia + timedelta(days=1), time.min))
+
+
+# {(produto_id, loja_id): entradas - saídas} das movimentações em [inicio, fim)
+def variacoes(inicio=None, fim=None, lojas=None, produtos=None) -> dict:
+    qs = Movimentacao.objects.order_by()
+    if inicio is not None:
+        qs = qs.filter(data_movimentacao__gte=inicio)
+    if fim is not None:
+        qs = qs.filter(data_movimentacao__lt=fim)
+    if produtos is not None:
+        qs = qs.filter(produto_id__in=produtos)
+
+    resultado = defaultdict(int)
+    for campo, sinal in (("destino", 1), ("origem", -1)):
+        parcial = qs.filter(**{f"{campo}__isnull": False})
+        if lojas is not None:
+            parcial = parcial.filter(**{f"{campo}_id__in": lojas})
+        for produto_id, loja_id, total in parcial.values_list("produto_id", campo).annotate(t=Sum("quantidade")):
+            resultado[(produto_id, loja_id)] += sinal * total
+    return resultado
+
+
+def _base(qs, lojas, produtos) -> dict:
+    if lojas is not None:
+        qs = qs.filter(loja_id__in=lojas)
+    if produtos is not None:
+        qs = qs.filter(produto_id__in=produtos)
+    return {(p, l): q for p, l, q in qs.values_list("produto_id", "loja_id", "quantidade").iterator(TAMANHO_LOTE)}
+
+
+# Resultado negativo só acontece com ajuste fora do histórico: conta como
+# zero, como no snapshot (que grava só quantidades positivas)
+def _somar(base, delta, sinal) -> dict:
+    for chave, valor in delta.items():
+        base[chave] = base.get(chave, 0) + sinal * valor
+    return {chave: q for chave, q in base.items() if q > 0}
+
+
+# Saldos no fim do dia "dia": {(produto_id, loja_id): quantidade}, só os
+# positivos. "lojas"/"produtos" (listas de ids) restringem a consulta.
+def saldos_em(dia: date, lojas=None, produtos=None) -> dict:
+    hoje = timezone.localdate()
+    if dia >= hoje:
+        return _somar(_base(SaldoEstoque.objects.all(), lojas, produtos), {}, 1)
+
+    anterior = SnapshotEstoque.objects.filter(data__lte=dia).order_by("-data").first()
+    posterior = SnapshotEstoque.objects.filter(data__gt=dia).order_by("data").first()
+
+    # Ponto de partida mais próximo da data (em dias)
+    candidatos = [((hoje - dia).days, None)]
+    if anterior:
+        candidatos.append(((dia - anterior.data).days, anterior))
+    if posterior:
+        candidatos.append(((posterior.data - dia).days, posterior))
+    _, snapshot = min(candidatos, key=lambda c: c[0])
+
+    if snapshot is None:
+        base = _base(SaldoEstoque.objects.all(), lojas, produtos)
+        return _somar(base, variacoes(inicio=fim_do_dia(dia), lojas=lojas, produtos=produtos), -1)
+
+    base = _base(SnapshotSaldo.objects.filter(snapshot=snapshot), lojas, produtos)
+    if snapshot.data == dia:
+        return base
+    if snapshot.data < dia:
+        delta = variacoes(fim_do_dia(snapshot.data), fim_do_dia(dia), lojas, produtos)
+        return _somar(base, delta, 1)
+    delta = variacoes(fim_do_dia(dia), fim_do_dia(snapshot.data), lojas, produtos)
+    return _somar(base, delta, -1)
+
+
+def saldo_em(produto_id, loja_id, dia: date) -> int:
+    return saldos_em(dia, lojas=[loja_id], produtos=[produto_id]).get((produto_id, loja_id), 0)
+
+
+# Grava (ou refaz) o snapshot do dia: saldo atual menos o que foi movimentado
+# depois do fim do dia. Devolve o snapshot.
+def gerar_snapshot(dia: date) -> SnapshotEstoque:
+    if dia >= timezone.localdate():
+        raise ValueError("Só é possível gerar snapshot de dias já encerrados.")
+
+    isolar = connection.vendor == "postgresql" and not connection.in_atomic_block
+    with transaction.atomic():
+        # Saldos e movimentações lidos do mesmo estado do banco: no READ
+        # COMMITTED uma movimentação entre as duas leituras entraria numa só
+        if isolar:
+            with connection.cursor() as cursor:
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+        saldos = _base(SaldoEstoque.objects.all(), None, None)
+        saldos = _somar(saldos, variacoes(inicio=fim_do_dia(dia)), -1)
+
+        SnapshotEstoque.objects.filter(data=dia).delete()
+        snapshot = SnapshotEstoque.objects.create(data=dia)
+        SnapshotSaldo.objects.bulk_create(
+            (
+                SnapshotSaldo(snapshot=snapshot, produto_id=produto_id, loja_id=loja_id, quantidade=quantidade)
+                for (produto_id, loja_id), quantidade in saldos.items()
+            ),
+            batch_size=TAMANHO_LOTE,
+        )
+    return snapshot
@@ -0,0 +1,134 @@
+import csv
+import io
+import re
+import unicodedata
+
+from django.db import transaction
+
+from .models import Loja, Produto
+from .movimentos import MovimentacaoInvalida, conferir, em_lotes, movimentar_em_lote
+
+
+# Importação de movimentações em lote (CSV exportado de planilha), para
+# entregas de fornecedor e redistribuição entre lojas. Colunas: produto, tipo,
+# origem, destino, quantidade, observacao. Produto e lojas pelo nome ou id.
+#
+# O arquivo é validado inteiro antes de gravar: produtos e lojas resolvidos
+# em poucas consultas por conjunto, cada linha com as regras da tela, e os
+# saldos conferidos e gravados de uma vez por movimentar_em_lote. Havendo
+# erro em qualquer linha nada é gravado e todas as linhas com erro são
+# listadas.
+
+MAX_LINHAS = 20000
+
+COLUNAS = ("produto", "tipo", "origem", "destino", "quantidade", "observacao")
+OBRIGATORIAS = ("produto", "tipo", "quantidade")
+
+
+class ArquivoInvalido(Exception):
+    pass
+
+
+def _sem_acento(texto: str) -> str:
+    normalizado = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in normalizado if not unicodedata.combining(c))
+
+
+def _chave(texto) -> str:
+    return _sem_acento((texto or "").strip()).lower()
+
+
+# [(número da linha no arquivo, {coluna: valor})]; aceita "," ";" ou tab
+def ler_linhas(arquivo) -> list[tuple[int, dict]]:
+    conteudo = arquivo.read()
+    if isinstance(conteudo, bytes):
+        try:
+            conteudo = conteudo.decode("utf-8-sig")
+        except UnicodeDecodeError:
+            conteudo = conteudo.decode("latin-1")  # CSV salvo pelo Excel em português
+    if not conteudo.strip():
+        raise ArquivoInvalido("Arquivo vazio.")
+
+    try:
+        dialeto = csv.Sniffer().sniff(conteudo.split("\n", 1)[0], delimiters=",;\t")
+    except csv.Error:
+        dialeto = csv.excel
+    leitor = csv.reader(io.StringIO(conteudo), dialeto)
+
+    cabecalho = [_chave(c) for c in next(leitor)]
+    faltando = [c for c in OBRIGATORIAS if c not in cabecalho]
+    if faltando:
+        raise ArquivoInvalido(f"Colunas obrigatórias ausentes: {', '.join(faltando)}.")
+
+    linhas = []
+    for valores in leitor:
+        if not any(v.strip() for v in valores):
+            continue
+        if len(linhas) >= MAX_LINHAS:
+            raise ArquivoInvalido(f"Máximo de {MAX_LINHAS} linhas por arquivo.")
+        linha = dict(zip(cabecalho, (v.strip() for v in valores)))
+        linhas.append((leitor.line_num, {c: linha.get(c, "") for c in COLUNAS}))
+    if not linhas:
+        raise ArquivoInvalido("Nenhuma movimentação no arquivo.")
+    return linhas
+
+
+def _mapa_produtos(referencias) -> dict:
+    ids = {r for r in referencias if re.fullmatch(r"[0-9]+", r)}  # isdigit() aceitaria "²"
+    nomes = referencias - ids
+    mapa = {}
+    for lote in em_lotes(nomes):
+        mapa.update(Produto.objects.filter(nome__in=lote).values_list("nome", "pk"))
+    for lote in em_lotes(ids):
+        mapa.update((str(pk), pk) for pk in Produto.objects.filter(pk__in=lote).values_list("pk", flat=True))
+    return mapa
+
+
+# Resolve nomes e confere as regras de cada linha, sem olhar saldos.
+# Devolve (movimentos, erros); movimento = (linha, tipo, produto_id,
+# quantidade, origem_id, destino_id, observacao)
+def validar(linhas) -> tuple[list, list]:
+    produtos = _mapa_produtos({d["produto"] for _, d in linhas if d["produto"]})
+    lojas = {}
+    for pk, nome in Loja.objects.values_list("pk", "nome"):
+        lojas[str(pk)] = pk
+        lojas[_chave(nome)] = pk
+
+    movimentos, erros = [], []
+    for numero, dados in linhas:
+        tipo = _chave(dados["tipo"]).upper()  # "Saída" -> "SAIDA"
+        try:
+            produto_id = produtos.get(dados["produto"])
+            if not produto_id:
+                raise MovimentacaoInvalida(f"Produto não encontrado: {dados['produto'] or '(vazio)'}.")
+            for coluna in ("origem", "destino"):
+                if dados[coluna] and _chave(dados[coluna]) not in lojas:
+                    raise MovimentacaoInvalida(f"Loja não encontrada: {dados[coluna]}.")
+            quantidade, origem_id, destino_id = conferir(
+                tipo, dados["quantidade"],
+                origem_id=lojas.get(_chave(dados["origem"])),
+                destino_id=lojas.get(_chave(dados["destino"])),
+            )
+        except MovimentacaoInvalida as e:
+            erros.append((numero, str(e)))
+            continue
+        movimentos.append((numero, tipo, produto_id, quantidade, origem_id, destino_id, dados["observacao"] or None))
+    return movimentos, erros
+
+
+# Grava o arquivo inteiro ou nada. Devolve (movimentações gravadas, erros),
+# erros = [(linha, mensagem)]. Com "simular" confere tudo (inclusive saldos)
+# e desfaz no final.
+def importar_movimentacoes(usuario, arquivo, simular=False) -> tuple[int, list]:
+    movimentos, erros = validar(ler_linhas(arquivo))
+    if erros:
+        return 0, erros
+
+    with transaction.atomic():
+        try:
+            erros = movimentar_em_lote(usuario, movimentos)
+        except MovimentacaoInvalida as e:
+            raise ArquivoInvalido(str(e))
+        if simular:
+            transaction.set_rollback(True)
+    return (0, erros) if erros else (len(movimentos), [])
@@ -0,0 +1,12 @@
+from django.db.models import Count, F, Q
+
+from .models import Produto
+
+
+# Situação dos produtos ativos no Estoque Central em uma única consulta
+def situacao_estoque_central() -> dict:
+    return Produto.objects.filter(ativo=True).aggregate(
+        ok=Count("id", filter=Q(saldo_central__gte=F("estoque_minimo"), saldo_central__gt=0)),
+        abaixo=Count("id", filter=Q(saldo_central__lt=F("estoque_minimo"), saldo_central__gt=0)),
+        zerado=Count("id", filter=Q(saldo_central=0)),
+    )
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from estoque.saldos import divergentes, reconciliar
+
+
+class Command(BaseCommand):
+    help = "Confere Produto.saldo_central/saldo_total com a soma dos saldos por loja e corrige as diferenças"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--verificar", action="store_true", help="Só relata; sai com erro se houver diferença")
+
+    def handle(self, *args, **opts):
+        if opts["verificar"]:
+            linhas = list(divergentes().values_list(
+                "pk", "nome", "saldo_central", "central_calculado", "saldo_total", "total_calculado",
+            )[:20])
+            if not linhas:
+                self.stdout.write(self.style.SUCCESS("Totais de estoque conferem com os saldos"))
+                return
+            for pk, nome, central, central_calc, total, total_calc in linhas:
+                self.stdout.write(f"#{pk} {nome}: central {central} (soma {central_calc}), total {total} (soma {total_calc})")
+            raise CommandError(f"{divergentes().count()} produto(s) com totais divergentes")
+
+        corrigidos = reconciliar()
+        self.stdout.write(self.style.SUCCESS(f"Totais de estoque reconciliados ({corrigidos} produto(s) corrigido(s))"))
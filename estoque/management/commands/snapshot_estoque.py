@@ -0,0 +1,36 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from estoque.historico import gerar_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Grava o snapshot dos saldos no fim do dia (padrão: ontem), base das consultas de saldo "
+        "em data passada. Rodar todo dia depois da meia-noite; --desde preenche um intervalo"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--data", help="Dia do snapshot (AAAA-MM-DD); padrão: ontem")
+        parser.add_argument("--desde", help="Gera também os dias desde esta data até --data (AAAA-MM-DD)")
+
+    def handle(self, *args, **opts):
+        ontem = timezone.localdate() - timedelta(days=1)
+        try:
+            ate = date.fromisoformat(opts["data"]) if opts["data"] else ontem
+            desde = date.fromisoformat(opts["desde"]) if opts["desde"] else ate
+        except ValueError:
+            raise CommandError("Datas devem estar no formato AAAA-MM-DD.")
+        if ate > ontem:
+            raise CommandError("Só é possível gerar snapshot de dias já encerrados.")
+        if desde > ate:
+            raise CommandError("--desde deve ser anterior a --data.")
+
+        dia = desde
+        while dia <= ate:
+            snapshot = gerar_snapshot(dia)
+            self.stdout.write(f"{dia:%d/%m/%Y}: {snapshot.saldos.count()} saldo(s)")
+            dia += timedelta(days=1)
+        self.stdout.write(self.style.SUCCESS("Snapshots de estoque gravados"))
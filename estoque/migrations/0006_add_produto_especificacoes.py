@@ -1,20 +1,13 @@
-from django.db import migrations, models
+from django.db import migrations
 
 
+# "especificacoes" já é criado na 0002. Esta migração repetia o AddField e
+# quebrava qualquer banco criado do zero (inclusive o de testes); fica vazia
+# para manter o histórico dos bancos que já a aplicaram.
 class Migration(migrations.Migration):
 
     dependencies = [
         ("estoque", "0005_loja_saldoestoque"),
     ]
 
-    operations = [
-        migrations.AddField(
-            model_name="produto",
-            name="especificacoes",
-            field=models.TextField(
-                blank=True,
-                null=True,
-                help_text="Detalhes técnicos, voltagem, dimensões, etc.",
-            ),
-        ),
-    ]
+    operations = []
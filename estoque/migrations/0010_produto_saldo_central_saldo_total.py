@@ -0,0 +1,43 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:30
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def preencher_saldos(apps, schema_editor):
+    Produto = apps.get_model("estoque", "Produto")
+    SaldoEstoque = apps.get_model("estoque", "SaldoEstoque")
+
+    def soma(filtro=Q()):
+        return Coalesce(Subquery(
+            SaldoEstoque.objects.filter(filtro, produto=OuterRef("pk"))
+            .order_by().values("produto").annotate(t=Sum("quantidade")).values("t")
+        ), 0)
+
+    Produto.objects.update(saldo_central=soma(Q(loja__is_central=True)), saldo_total=soma())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estoque', '0009_movimentacao'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='produto',
+            name='saldo_central',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Saldo no Central'),
+        ),
+        migrations.AddField(
+            model_name='produto',
+            name='saldo_total',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Total (todas as lojas)'),
+        ),
+        migrations.AddIndex(
+            model_name='produto',
+            index=models.Index(fields=['ativo', 'saldo_central'], name='estoque_pro_ativo_c0944e_idx'),
+        ),
+        migrations.RunPython(preencher_saldos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estoque', '0010_produto_saldo_central_saldo_total'),
+        ('viagens', '0006_viagem_status_partida_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Romaneio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('observacao', models.TextField(blank=True, null=True)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('criado_por', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='romaneios', to=settings.AUTH_USER_MODEL)),
+                ('destino', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='romaneios_destino', to='estoque.loja')),
+                ('origem', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='romaneios_origem', to='estoque.loja')),
+                ('viagem', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='romaneios', to='viagens.viagem')),
+            ],
+            options={
+                'ordering': ['-criado_em'],
+            },
+        ),
+        migrations.AddField(
+            model_name='movimentacao',
+            name='romaneio',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='movimentacoes', to='estoque.romaneio'),
+        ),
+        migrations.CreateModel(
+            name='ItemRomaneio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantidade', models.PositiveIntegerField()),
+                ('produto', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='itens_romaneio', to='estoque.produto')),
+                ('romaneio', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='itens', to='estoque.romaneio')),
+            ],
+            options={
+                'verbose_name': 'Item do romaneio',
+                'verbose_name_plural': 'Itens do romaneio',
+                'constraints': [models.UniqueConstraint(fields=('romaneio', 'produto'), name='uniq_romaneio_produto')],
+            },
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:39
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estoque', '0011_romaneio'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SnapshotEstoque',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField(unique=True)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Snapshot de estoque',
+                'verbose_name_plural': 'Snapshots de estoque',
+                'ordering': ['-data'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SnapshotSaldo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantidade', models.PositiveIntegerField()),
+            ],
+            options={
+                'verbose_name': 'Saldo do snapshot',
+                'verbose_name_plural': 'Saldos do snapshot',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='movimentacao',
+            index=models.Index(fields=['data_movimentacao'], name='estoque_mov_data_mo_e97f8a_idx'),
+        ),
+        migrations.AddField(
+            model_name='snapshotsaldo',
+            name='loja',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='estoque.loja'),
+        ),
+        migrations.AddField(
+            model_name='snapshotsaldo',
+            name='produto',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='estoque.produto'),
+        ),
+        migrations.AddField(
+            model_name='snapshotsaldo',
+            name='snapshot',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saldos', to='estoque.snapshotestoque'),
+        ),
+        migrations.AddConstraint(
+            model_name='snapshotsaldo',
+            constraint=models.UniqueConstraint(fields=('snapshot', 'loja', 'produto'), name='uniq_snapshot_loja_produto'),
+        ),
+    ]
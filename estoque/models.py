@@ -25,8 +25,15 @@ class Produto(models.Model):
         )
     ativo = models.BooleanField(default=True)
 
+    # Somas de SaldoEstoque mantidas pelos signals (ver estoque/saldos.py)
+    saldo_central = models.PositiveIntegerField("Saldo no Central", default=0, editable=False)
+    saldo_total = models.PositiveIntegerField("Total (todas as lojas)", default=0, editable=False)
+
     class Meta:
         ordering = ["nome"]
+        indexes = [
+            models.Index(fields=["ativo", "saldo_central"]),
+        ]
 
     def __str__(self):
         return self.nome
@@ -89,9 +96,81 @@ class Movimentacao(models.Model):
 
     data_movimentacao = models.DateTimeField(auto_now_add=True)
     usuario = models.ForeignKey("auth.User", on_delete=models.PROTECT)
+    romaneio = models.ForeignKey(
+        "Romaneio", on_delete=models.PROTECT, related_name="movimentacoes", null=True, blank=True
+    )
 
     class Meta:
         ordering = ["-data_movimentacao"]
+        indexes = [
+            models.Index(fields=["data_movimentacao"]),  # saldos históricos (estoque/historico.py)
+        ]
 
     def __str__(self):
         return f"{self.tipo} - {self.produto.nome} ({self.quantidade})"
+
+
+# Documento de transferência: vários produtos de uma loja para outra de uma
+# vez (ex.: a carga de um caminhão), opcionalmente ligado a uma Viagem.
+# Cada item gera uma Movimentacao do tipo TRANSFERENCIA (ver estoque/movimentos.py).
+class Romaneio(models.Model):
+    origem = models.ForeignKey(Loja, on_delete=models.PROTECT, related_name="romaneios_origem")
+    destino = models.ForeignKey(Loja, on_delete=models.PROTECT, related_name="romaneios_destino")
+    viagem = models.ForeignKey(
+        "viagens.Viagem", on_delete=models.PROTECT, related_name="romaneios", null=True, blank=True
+    )
+    observacao = models.TextField(blank=True, null=True)
+
+    criado_em = models.DateTimeField(auto_now_add=True)
+    criado_por = models.ForeignKey("auth.User", on_delete=models.PROTECT, related_name="romaneios")
+
+    class Meta:
+        ordering = ["-criado_em"]
+
+    def __str__(self):
+        return f"Romaneio {self.pk}: {self.origem} → {self.destino}"
+
+class ItemRomaneio(models.Model):
+    romaneio = models.ForeignKey(Romaneio, on_delete=models.CASCADE, related_name="itens")
+    produto = models.ForeignKey(Produto, on_delete=models.PROTECT, related_name="itens_romaneio")
+    quantidade = models.PositiveIntegerField()
+
+    class Meta:
+        verbose_name = "Item do romaneio"
+        verbose_name_plural = "Itens do romaneio"
+        constraints = [
+            models.UniqueConstraint(fields=["romaneio", "produto"], name="uniq_romaneio_produto")
+        ]
+
+    def __str__(self):
+        return f"{self.produto} ({self.quantidade})"
+
+
+# Foto dos saldos no fim de um dia, base das consultas de saldo em data
+# passada (estoque/historico.py). Só as quantidades diferentes de zero são
+# gravadas; sem linha para (produto, loja) o saldo era zero.
+class SnapshotEstoque(models.Model):
+    data = models.DateField(unique=True)
+    criado_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Snapshot de estoque"
+        verbose_name_plural = "Snapshots de estoque"
+        ordering = ["-data"]
+
+    def __str__(self):
+        return f"Snapshot {self.data:%d/%m/%Y}"
+
+class SnapshotSaldo(models.Model):
+    snapshot = models.ForeignKey(SnapshotEstoque, on_delete=models.CASCADE, related_name="saldos")
+    produto = models.ForeignKey(Produto, on_delete=models.CASCADE, related_name="+")
+    loja = models.ForeignKey(Loja, on_delete=models.CASCADE, related_name="+")
+    quantidade = models.PositiveIntegerField()
+
+    class Meta:
+        verbose_name = "Saldo do snapshot"
+        verbose_name_plural = "Saldos do snapshot"
+        constraints = [
+            # Também serve de índice para os filtros por loja dentro do snapshot
+            models.UniqueConstraint(fields=["snapshot", "loja", "produto"], name="uniq_snapshot_loja_produto")
+        ]
@@ -0,0 +1,287 @@
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from core.versoes import nova_versao
+from viagens.models import Viagem
+from .models import ItemRomaneio, Loja, Movimentacao, Produto, Romaneio, SaldoEstoque
+from .saldos import aplicar_variacoes
+
+
+# Entrada, saída e transferência de estoque, para a tela de movimentação e
+# para a API. Cada saldo muda num UPDATE condicional com F() (a checagem de
+# saldo suficiente fica no WHERE, no banco), tudo numa transação só com a
+# Movimentacao: ou grava tudo ou nada. Sem ler-alterar-gravar em Python, duas
+# movimentações simultâneas não perdem atualização nem deixam saldo negativo.
+#
+# Ordem das travas: os saldos em ordem de (produto_id, loja_id) e, por
+# último, os produtos (saldo_central/saldo_total). Transferências opostas
+# entre as mesmas lojas esperam uma pela outra em vez de travar.
+
+TAMANHO_LOTE = 1000
+
+
+class MovimentacaoInvalida(Exception):
+    pass
+
+
+class SaldoInsuficiente(MovimentacaoInvalida):
+    pass
+
+
+# Erros por item (romaneio): erros = [(produto_id, mensagem)]
+class ItensInvalidos(MovimentacaoInvalida):
+    def __init__(self, erros):
+        self.erros = erros
+        super().__init__(f"{len(erros)} item(ns) com erro.")
+
+
+# tipo -> (precisa de origem, precisa de destino)
+_LOJAS_POR_TIPO = {
+    "ENTRADA": (False, True),
+    "SAIDA": (True, False),
+    "TRANSFERENCIA": (True, True),
+}
+
+MENSAGEM_INSUFICIENTE = {
+    "SAIDA": "Quantidade insuficiente para saída.",
+    "TRANSFERENCIA": "Saldo insuficiente para transferência.",
+}
+
+
+def _retirar(produto_id, loja_id, quantidade) -> bool:
+    return SaldoEstoque.objects.filter(
+        produto_id=produto_id, loja_id=loja_id, quantidade__gte=quantidade,
+    ).update(quantidade=F("quantidade") - quantidade) == 1
+
+
+def _somar(produto_id, loja_id, quantidade) -> None:
+    filtro = SaldoEstoque.objects.filter(produto_id=produto_id, loja_id=loja_id)
+    if filtro.update(quantidade=F("quantidade") + quantidade):
+        return
+    # Primeiro saldo do produto na loja. Se outra transação criou o mesmo
+    # saldo no meio tempo, a unicidade (produto, loja) barra e somamos nele.
+    try:
+        with transaction.atomic():
+            SaldoEstoque.objects.bulk_create([
+                SaldoEstoque(produto_id=produto_id, loja_id=loja_id, quantidade=quantidade),
+            ])
+    except IntegrityError:
+        filtro.update(quantidade=F("quantidade") + quantidade)
+
+
+def _inteiro(valor, mensagem):
+    if valor in (None, ""):
+        return None
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        raise MovimentacaoInvalida(mensagem)
+
+
+# Regras comuns à tela, à API e à importação: devolve (quantidade, origem_id,
+# destino_id) normalizados, só com as lojas que o tipo usa
+def conferir(tipo, quantidade, origem_id=None, destino_id=None) -> tuple[int, int | None, int | None]:
+    if tipo not in _LOJAS_POR_TIPO:
+        raise MovimentacaoInvalida("Tipo de movimentação inválido.")
+    quantidade = _inteiro(quantidade, "Quantidade inválida.")
+    if not quantidade or quantidade <= 0:
+        raise MovimentacaoInvalida("A quantidade deve ser maior que zero.")
+
+    precisa_origem, precisa_destino = _LOJAS_POR_TIPO[tipo]
+    origem_id = _inteiro(origem_id, "Loja inválida.") if precisa_origem else None
+    destino_id = _inteiro(destino_id, "Loja inválida.") if precisa_destino else None
+    if precisa_origem and not origem_id:
+        raise MovimentacaoInvalida("Informe a loja de origem.")
+    if precisa_destino and not destino_id:
+        raise MovimentacaoInvalida("Informe a loja de destino.")
+    if origem_id == destino_id:
+        raise MovimentacaoInvalida("Origem e destino não podem ser iguais.")
+    return quantidade, origem_id, destino_id
+
+
+def movimentar(usuario, tipo, produto_id, quantidade, origem_id=None, destino_id=None, observacao=None) -> Movimentacao:
+    quantidade, origem_id, destino_id = conferir(tipo, quantidade, origem_id, destino_id)
+
+    produto_id = _inteiro(produto_id, "Produto inválido.")
+    if not produto_id or not Produto.objects.filter(pk=produto_id).exists():
+        raise MovimentacaoInvalida("Produto inválido.")
+    lojas = {origem_id, destino_id} - {None}
+    if Loja.objects.filter(pk__in=lojas).count() != len(lojas):
+        raise MovimentacaoInvalida("Loja inválida.")
+
+    # (loja_id, delta) na ordem das travas
+    variacoes = sorted(
+        [(origem_id, -quantidade)] * bool(origem_id) + [(destino_id, quantidade)] * bool(destino_id)
+    )
+
+    with transaction.atomic():
+        for loja_id, delta in variacoes:
+            if delta > 0:
+                _somar(produto_id, loja_id, delta)
+            elif not _retirar(produto_id, loja_id, -delta):
+                raise SaldoInsuficiente(MENSAGEM_INSUFICIENTE[tipo])
+
+        # update() e bulk_create não disparam os signals de SaldoEstoque
+        aplicar_variacoes([(produto_id, loja_id, delta) for loja_id, delta in variacoes])
+
+        movimentacao = Movimentacao.objects.create(
+            tipo=tipo,
+            produto_id=produto_id,
+            origem_id=origem_id,
+            destino_id=destino_id,
+            quantidade=quantidade,
+            usuario=usuario,
+            observacao=observacao,
+        )
+    nova_versao("estoque")
+    return movimentacao
+
+
+def em_lotes(itens, tamanho=TAMANHO_LOTE):
+    itens = list(itens)
+    for inicio in range(0, len(itens), tamanho):
+        yield itens[inicio:inicio + tamanho]
+
+
+def _travar_saldos(pares) -> dict:
+    produto_ids = sorted({p for p, _ in pares})
+    loja_ids = {l for _, l in pares}
+    saldos = {}
+    for lote in em_lotes(produto_ids):
+        qs = (
+            SaldoEstoque.objects.select_for_update()
+            .filter(produto_id__in=lote, loja_id__in=loja_ids)
+            .order_by("produto_id", "loja_id")
+            .only("pk", "produto_id", "loja_id", "quantidade")
+        )
+        saldos.update(((s.produto_id, s.loja_id), s) for s in qs)
+    return saldos
+
+
+# Muitos movimentos já conferidos (ver conferir) de uma vez, para importação
+# e romaneio. movimentos = [(referencia, tipo, produto_id, quantidade,
+# origem_id, destino_id, observacao)]. O saldo de cada um é conferido contra
+# os saldos travados, na ordem da lista (um pode usar o que o anterior deu
+# entrada). Havendo saldo insuficiente nada é gravado e a função devolve
+# [(referencia, mensagem)]; senão grava saldos, totais dos produtos e
+# movimentações com bulk_update/bulk_create, sem uma consulta por movimento.
+def movimentar_em_lote(usuario, movimentos, romaneio=None) -> list:
+    centrais = set(Loja.objects.filter(is_central=True).values_list("pk", flat=True))
+    variacoes = defaultdict(int)   # (produto_id, loja_id) -> delta acumulado
+    erros = []
+
+    with transaction.atomic():
+        saldos = _travar_saldos({(m[2], loja) for m in movimentos for loja in m[4:6] if loja})
+
+        for referencia, tipo, produto_id, quantidade, origem_id, destino_id, _ in movimentos:
+            if origem_id:
+                atual = saldos.get((produto_id, origem_id))
+                disponivel = (atual.quantidade if atual else 0) + variacoes[(produto_id, origem_id)]
+                if disponivel < quantidade:
+                    erros.append((referencia, f"{MENSAGEM_INSUFICIENTE[tipo]} Disponível: {disponivel}."))
+                    continue
+                variacoes[(produto_id, origem_id)] -= quantidade
+            if destino_id:
+                variacoes[(produto_id, destino_id)] += quantidade
+        if erros:
+            return erros
+
+        alterados, novos = [], []
+        totais = defaultdict(lambda: [0, 0])   # produto_id -> [central, total]
+        for (produto_id, loja_id), delta in variacoes.items():
+            if not delta:
+                continue
+            saldo = saldos.get((produto_id, loja_id))
+            if saldo:
+                saldo.quantidade += delta
+                alterados.append(saldo)
+            else:
+                novos.append(SaldoEstoque(produto_id=produto_id, loja_id=loja_id, quantidade=delta))
+            totais[produto_id][1] += delta
+            if loja_id in centrais:
+                totais[produto_id][0] += delta
+
+        # bulk_update/bulk_create não disparam os signals: totais ajustados
+        # aqui, com os produtos travados
+        SaldoEstoque.objects.bulk_update(alterados, ["quantidade"], batch_size=TAMANHO_LOTE)
+        if novos:
+            try:
+                with transaction.atomic():
+                    SaldoEstoque.objects.bulk_create(novos, batch_size=TAMANHO_LOTE)
+            except IntegrityError:
+                raise MovimentacaoInvalida("O estoque mudou durante a gravação. Tente novamente.")
+
+        produtos = []
+        for lote in em_lotes(sorted(totais)):
+            for produto in Produto.objects.select_for_update().filter(pk__in=lote).order_by("pk").only(
+                "pk", "saldo_central", "saldo_total"
+            ):
+                central, total = totais[produto.pk]
+                produto.saldo_central += central
+                produto.saldo_total += total
+                produtos.append(produto)
+        Produto.objects.bulk_update(produtos, ["saldo_central", "saldo_total"], batch_size=TAMANHO_LOTE)
+
+        Movimentacao.objects.bulk_create(
+            (
+                Movimentacao(
+                    tipo=tipo, produto_id=produto_id, origem_id=origem_id, destino_id=destino_id,
+                    quantidade=quantidade, usuario=usuario, observacao=observacao, romaneio=romaneio,
+                )
+                for _, tipo, produto_id, quantidade, origem_id, destino_id, observacao in movimentos
+            ),
+            batch_size=TAMANHO_LOTE,
+        )
+    nova_versao("estoque")
+    return []
+
+
+# Romaneio com todos os itens numa transação: cabeçalho, itens e uma
+# transferência por item, com os saldos gravados em lote. itens =
+# [(produto_id, quantidade)]; o mesmo produto repetido é somado.
+def criar_romaneio(usuario, origem_id, destino_id, itens, viagem_id=None, observacao=None) -> Romaneio:
+    _, origem_id, destino_id = conferir("TRANSFERENCIA", 1, origem_id, destino_id)
+    if Loja.objects.filter(pk__in=(origem_id, destino_id)).count() != 2:
+        raise MovimentacaoInvalida("Loja inválida.")
+    viagem_id = _inteiro(viagem_id, "Viagem inválida.")
+    if viagem_id and not Viagem.objects.filter(pk=viagem_id).exists():
+        raise MovimentacaoInvalida("Viagem inválida.")
+
+    quantidades = defaultdict(int)
+    erros = []
+    for produto_id, quantidade in itens:
+        try:
+            produto_id = _inteiro(produto_id, "Produto inválido.")
+            quantidade, _, _ = conferir("TRANSFERENCIA", quantidade, origem_id, destino_id)
+        except MovimentacaoInvalida as e:
+            erros.append((produto_id, str(e)))
+            continue
+        quantidades[produto_id] += quantidade
+    existentes = set(Produto.objects.filter(pk__in=[p for p in quantidades if p]).values_list("pk", flat=True))
+    erros += [(p, "Produto inválido.") for p in quantidades if p not in existentes]
+    if erros:
+        raise ItensInvalidos(erros)
+    if not quantidades:
+        raise MovimentacaoInvalida("Informe ao menos um item.")
+
+    with transaction.atomic():
+        romaneio = Romaneio.objects.create(
+            origem_id=origem_id, destino_id=destino_id, viagem_id=viagem_id,
+            observacao=observacao, criado_por=usuario,
+        )
+        ItemRomaneio.objects.bulk_create(
+            ItemRomaneio(romaneio=romaneio, produto_id=p, quantidade=q) for p, q in quantidades.items()
+        )
+        erros = movimentar_em_lote(
+            usuario,
+            [
+                (p, "TRANSFERENCIA", p, q, origem_id, destino_id, f"Romaneio {romaneio.pk}")
+                for p, q in quantidades.items()
+            ],
+            romaneio=romaneio,
+        )
+        if erros:
+            raise ItensInvalidos(erros)   # desfaz o cabeçalho e os itens
+    return romaneio
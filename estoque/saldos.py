@@ -0,0 +1,89 @@
+from collections import defaultdict
+
+from django.db.models import Case, Exists, F, IntegerField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from .models import Loja, Produto, SaldoEstoque
+
+
+# Produto.saldo_central e Produto.saldo_total são cópias da soma dos saldos
+# (do Central e de todas as lojas). Cada gravação de SaldoEstoque soma a
+# diferença com F() num único UPDATE na mesma transação: atualizações
+# concorrentes do mesmo produto não se perdem. Quem grava saldos sem signals
+# (bulk_create, queryset.update) chama aplicar_variacoes ou reconciliar.
+
+# (produto_id, loja_id, quantidade) gravados no banco; "travar" segura a
+# linha até o fim da transação (select_for_update)
+def valores_saldo_do_banco(pk, using=None, travar=False):
+    qs = SaldoEstoque._base_manager.using(using).filter(pk=pk)
+    if travar:
+        qs = qs.select_for_update()
+    return qs.values_list("produto_id", "loja_id", "quantidade").first()
+
+
+# variacoes: [(produto_id, loja_id, delta)]; um UPDATE por produto afetado
+def aplicar_variacoes(variacoes) -> None:
+    por_produto = defaultdict(lambda: defaultdict(int))
+    for produto_id, loja_id, delta in variacoes:
+        if delta:
+            por_produto[produto_id][loja_id] += delta
+
+    for produto_id, por_loja in por_produto.items():
+        total = sum(por_loja.values())
+        # O que é Central é decidido no próprio UPDATE
+        central = sum(
+            (
+                Case(
+                    When(Exists(Loja.objects.filter(pk=loja_id, is_central=True)), then=Value(delta)),
+                    default=Value(0),
+                    output_field=IntegerField(),
+                )
+                for loja_id, delta in por_loja.items() if delta
+            ),
+            Value(0),
+        )
+        Produto.objects.filter(pk=produto_id).update(
+            saldo_total=F("saldo_total") + total,
+            saldo_central=F("saldo_central") + central,
+        )
+
+
+def registrar_mudanca_saldo(anterior, atual) -> None:
+    variacoes = []
+    if anterior:
+        produto_id, loja_id, quantidade = anterior
+        variacoes.append((produto_id, loja_id, -quantidade))
+    if atual:
+        variacoes.append(atual)
+    aplicar_variacoes(variacoes)
+
+
+def _soma(filtro=Q()):
+    somas = (
+        SaldoEstoque.objects.filter(filtro, produto=OuterRef("pk"))
+        .order_by().values("produto").annotate(t=Sum("quantidade")).values("t")
+    )
+    return Coalesce(Subquery(somas), 0)
+
+
+def saldos_calculados(qs=None):
+    qs = Produto.objects.all() if qs is None else qs
+    return qs.annotate(
+        central_calculado=_soma(Q(loja__is_central=True)),
+        total_calculado=_soma(),
+    )
+
+
+def divergentes(qs=None):
+    return saldos_calculados(qs).exclude(saldo_central=F("central_calculado"), saldo_total=F("total_calculado"))
+
+
+# Recalcula as colunas a partir dos saldos; devolve quantos produtos mudaram
+def reconciliar(qs=None) -> int:
+    ids = list(divergentes(qs).values_list("pk", flat=True))
+    for inicio in range(0, len(ids), 1000):
+        Produto.objects.filter(pk__in=ids[inicio:inicio + 1000]).update(
+            saldo_central=_soma(Q(loja__is_central=True)),
+            saldo_total=_soma(),
+        )
+    return len(ids)
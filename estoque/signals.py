@@ -0,0 +1,60 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from core.versoes import nova_versao
+from .models import Loja, Produto, SaldoEstoque
+from .saldos import reconciliar, registrar_mudanca_saldo, valores_saldo_do_banco
+
+
+# Invalida os validadores (ETag) da listagem de lojas
+@receiver(post_save, sender=Loja)
+@receiver(post_delete, sender=Loja)
+def loja_alterada(sender, **kwargs):
+    nova_versao("lojas")
+
+
+# Invalida o widget de estoque central do dashboard
+@receiver(post_save, sender=SaldoEstoque)
+@receiver(post_delete, sender=SaldoEstoque)
+@receiver(post_save, sender=Produto)
+@receiver(post_delete, sender=Produto)
+def estoque_alterado(sender, **kwargs):
+    nova_versao("estoque")
+
+
+# Mantém Produto.saldo_central/saldo_total. A contribuição a descontar é a
+# que está no banco na hora de gravar, não a de quando a instância foi
+# carregada: uma movimentar() no meio tempo já ajustou os totais. Dentro de
+# transação a linha fica travada até o UPDATE dos totais.
+@receiver(pre_save, sender=SaldoEstoque)
+@receiver(pre_delete, sender=SaldoEstoque)
+def guardar_valores_saldo(sender, instance, using, **kwargs):
+    instance._saldo_valores = None
+    if instance.pk and not instance._state.adding:
+        travar = transaction.get_connection(using).in_atomic_block
+        instance._saldo_valores = valores_saldo_do_banco(instance.pk, using, travar)
+
+
+@receiver(post_save, sender=SaldoEstoque)
+def atualizar_totais_produto(sender, instance, created, **kwargs):
+    atual = (instance.produto_id, instance.loja_id, instance.quantidade)
+    registrar_mudanca_saldo(None if created else instance._saldo_valores, atual)
+
+
+@receiver(post_delete, sender=SaldoEstoque)
+def descontar_totais_produto(sender, instance, **kwargs):
+    registrar_mudanca_saldo(instance._saldo_valores, None)
+
+
+# Trocar o Central muda o saldo_central de todos os produtos
+@receiver(post_init, sender=Loja)
+def guardar_central(sender, instance, **kwargs):
+    instance._era_central = instance.__dict__.get("is_central") if instance.pk else None
+
+
+@receiver(post_save, sender=Loja)
+def central_alterado(sender, instance, created, **kwargs):
+    if not created and instance._era_central is not None and instance._era_central != instance.is_central:
+        reconciliar()
+    instance._era_central = instance.is_central
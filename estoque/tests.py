@@ -1,3 +1,283 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
 from django.test import TestCase
+from django.utils import timezone
+
+from core.testes import OrcamentoTestCase
+from .historico import fim_do_dia, gerar_snapshot, saldo_em, saldos_em
+from .importacao import importar_movimentacoes
+from .models import Categoria, Loja, Movimentacao, Produto, Romaneio, SaldoEstoque, SnapshotEstoque
+from .movimentos import ItensInvalidos, MovimentacaoInvalida, SaldoInsuficiente, criar_romaneio, movimentar
+
+
+# Consultas e tempo por rota (orçamentos em core/testes.py)
+class OrcamentoEstoqueTests(OrcamentoTestCase):
+    def test_home(self):
+        self.assertOrcamento("estoque:home", self.admin)
+        self.assertOrcamento("estoque:home", self.admin, dados={"situacao_central": "abaixo"})
+
+    def test_exportar_csv(self):
+        self.assertOrcamento("estoque:exportar_csv", self.admin)
+
+    def test_movimentar(self):
+        self.assertOrcamento("estoque:movimentar", self.admin)
+        self.assertOrcamento(
+            "estoque:movimentar", self.admin, "post",
+            dados={
+                "tipo": "ENTRADA",
+                "produto": self.base["produtos"][0].pk,
+                "destino": self.base["lojas"][0].pk,
+                "quantidade": "3",
+            },
+            status=302,
+        )
+
+    def test_importar(self):
+        # Consultas constantes: o lote todo em poucas consultas por conjunto
+        produtos, lojas = self.base["produtos"], self.base["lojas"]
+        linhas = ["produto;tipo;origem;destino;quantidade;observacao"]
+        linhas += [f"{p.nome};Entrada;;{lojas[0].nome};5;nota 123" for p in produtos]
+        linhas += [f"{p.pk};Transferência;{lojas[0].pk};{lojas[1].nome};2;" for p in produtos]
+        arquivo = SimpleUploadedFile("entrega.csv", "\n".join(linhas).encode())
+
+        self.assertOrcamento("estoque:importar", self.admin)
+        self.assertOrcamento("estoque:importar", self.admin, "post", dados={"arquivo": arquivo}, status=302)
+        self.assertEqual(Movimentacao.objects.filter(observacao="nota 123").count(), len(produtos))
+
+    def test_romaneio(self):
+        # Consultas constantes no número de itens
+        produtos, lojas = self.base["produtos"], self.base["lojas"]
+        viagem = self.base["viagens"][0]
+        dados = {
+            "origem": lojas[2].pk,
+            "destino": lojas[3].pk,
+            "viagem": viagem.pk,
+            "produto": [p.nome for p in produtos],
+            "quantidade": ["1"] * len(produtos),
+        }
+        self.assertOrcamento("estoque:romaneios", self.admin)
+        self.assertOrcamento("estoque:romaneio_novo", self.admin, dados={"viagem": viagem.pk})
+        self.assertOrcamento("estoque:romaneio_novo", self.admin, "post", dados=dados, status=302)
+
+        romaneio = Romaneio.objects.get()
+        self.assertEqual(romaneio.movimentacoes.count(), len(produtos))
+        self.assertOrcamento("estoque:romaneio_detalhe", self.admin, kwargs={"pk": romaneio.pk})
+        self.assertOrcamento("estoque:romaneios", self.admin)
+
+
+class EstoqueTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user("estoquista")
+        cls.central = Loja.objects.create(nome="Central", is_central=True)
+        cls.loja = Loja.objects.create(nome="Loja 1")
+        cls.produto = Produto.objects.create(nome="Cabo", unidade="un", categoria=Categoria.objects.create(nome="Cabos"))
+
+    def saldo(self, loja):
+        return SaldoEstoque.objects.filter(produto=self.produto, loja=loja).values_list("quantidade", flat=True).first()
+
+
+class MovimentarTests(EstoqueTestCase):
+    def test_entrada_e_transferencia(self):
+        movimentar(self.usuario, "ENTRADA", self.produto.pk, 10, destino_id=self.central.pk)
+        movimentar(self.usuario, "TRANSFERENCIA", self.produto.pk, "4", origem_id=self.central.pk, destino_id=self.loja.pk)
+
+        self.assertEqual((self.saldo(self.central), self.saldo(self.loja)), (6, 4))
+        self.produto.refresh_from_db()
+        self.assertEqual((self.produto.saldo_central, self.produto.saldo_total), (6, 10))
+        self.assertEqual(Movimentacao.objects.count(), 2)
+
+    def test_saldo_insuficiente_nao_grava_nada(self):
+        movimentar(self.usuario, "ENTRADA", self.produto.pk, 3, destino_id=self.central.pk)
+        with self.assertRaises(SaldoInsuficiente):
+            movimentar(self.usuario, "TRANSFERENCIA", self.produto.pk, 5, origem_id=self.central.pk, destino_id=self.loja.pk)
+        with self.assertRaises(SaldoInsuficiente):
+            movimentar(self.usuario, "SAIDA", self.produto.pk, 1, origem_id=self.loja.pk)
+
+        self.assertEqual((self.saldo(self.central), self.saldo(self.loja)), (3, None))
+        self.produto.refresh_from_db()
+        self.assertEqual((self.produto.saldo_central, self.produto.saldo_total), (3, 3))
+        self.assertEqual(Movimentacao.objects.count(), 1)
+
+    def test_dados_invalidos(self):
+        casos = [
+            ("DEVOLUCAO", self.produto.pk, 1, None, self.loja.pk),
+            ("ENTRADA", self.produto.pk, 0, None, self.loja.pk),
+            ("ENTRADA", self.produto.pk, "x", None, self.loja.pk),
+            ("ENTRADA", self.produto.pk, 1, None, None),
+            ("ENTRADA", 0, 1, None, self.loja.pk),
+            ("TRANSFERENCIA", self.produto.pk, 1, self.loja.pk, self.loja.pk),
+            ("SAIDA", self.produto.pk, 1, 999999, None),
+        ]
+        for tipo, produto_id, quantidade, origem_id, destino_id in casos:
+            with self.subTest(tipo=tipo, quantidade=quantidade, origem=origem_id, destino=destino_id):
+                with self.assertRaises(MovimentacaoInvalida):
+                    movimentar(self.usuario, tipo, produto_id, quantidade, origem_id=origem_id, destino_id=destino_id)
+        self.assertFalse(Movimentacao.objects.exists())
+
+
+class ImportarMovimentacoesTests(EstoqueTestCase):
+    def importar(self, *linhas, simular=False):
+        texto = "\n".join(("produto,tipo,origem,destino,quantidade,observacao",) + linhas)
+        return importar_movimentacoes(self.usuario, SimpleUploadedFile("m.csv", texto.encode()), simular=simular)
+
+    def test_importa_em_ordem_e_atualiza_totais(self):
+        resultado = self.importar(
+            "Cabo,Entrada,,Central,10,",
+            "Cabo,Transferência,Central,Loja 1,4,",
+            "Cabo,saida,Loja 1,,1,",
+        )
+        self.assertEqual(resultado, (3, []))
+        self.assertEqual((self.saldo(self.central), self.saldo(self.loja)), (6, 3))
+        self.produto.refresh_from_db()
+        self.assertEqual((self.produto.saldo_central, self.produto.saldo_total), (6, 9))
+
+    def test_erro_em_uma_linha_nao_grava_nada(self):
+        quantidade, erros = self.importar(
+            "Cabo,Entrada,,Central,3,",
+            "Cabo,Saída,Central,,5,",
+            "Fio,Entrada,,Central,1,",
+            "Cabo,Entrada,,Depósito,1,",
+            "²,Entrada,,Central,1,",
+        )
+        self.assertEqual(quantidade, 0)
+        self.assertEqual([linha for linha, _ in erros], [4, 5, 6])
+
+        quantidade, erros = self.importar("Cabo,Entrada,,Central,3,", "Cabo,Saída,Central,,5,")
+        self.assertEqual((quantidade, [linha for linha, _ in erros]), (0, [3]))
+        self.assertIn("Disponível: 3", erros[0][1])
+
+        self.assertFalse(SaldoEstoque.objects.exists())
+        self.assertFalse(Movimentacao.objects.exists())
+
+    def test_simular(self):
+        self.assertEqual(self.importar("Cabo,Entrada,,Central,3,", simular=True), (1, []))
+        self.assertFalse(SaldoEstoque.objects.exists())
+        self.produto.refresh_from_db()
+        self.assertEqual(self.produto.saldo_total, 0)
+
+
+class RomaneioTests(EstoqueTestCase):
+    def test_transfere_todos_os_itens(self):
+        outro = Produto.objects.create(nome="Fio", unidade="m", categoria=self.produto.categoria)
+        movimentar(self.usuario, "ENTRADA", self.produto.pk, 10, destino_id=self.central.pk)
+        movimentar(self.usuario, "ENTRADA", outro.pk, 5, destino_id=self.central.pk)
+
+        romaneio = criar_romaneio(
+            self.usuario, self.central.pk, self.loja.pk,
+            [(self.produto.pk, 4), (outro.pk, "5"), (self.produto.pk, 1)],
+        )
+        self.assertEqual(
+            sorted(romaneio.itens.values_list("produto__nome", "quantidade")), [("Cabo", 5), ("Fio", 5)]
+        )
+        self.assertEqual((self.saldo(self.central), self.saldo(self.loja)), (5, 5))
+        self.assertEqual(romaneio.movimentacoes.filter(tipo="TRANSFERENCIA").count(), 2)
+        self.produto.refresh_from_db()
+        self.assertEqual((self.produto.saldo_central, self.produto.saldo_total), (5, 10))
+
+    def test_item_sem_saldo_nao_grava_nada(self):
+        movimentar(self.usuario, "ENTRADA", self.produto.pk, 2, destino_id=self.central.pk)
+        with self.assertRaises(ItensInvalidos) as erro:
+            criar_romaneio(self.usuario, self.central.pk, self.loja.pk, [(self.produto.pk, 3)])
+        self.assertEqual([p for p, _ in erro.exception.erros], [self.produto.pk])
+
+        with self.assertRaises(MovimentacaoInvalida):
+            criar_romaneio(self.usuario, self.central.pk, self.central.pk, [(self.produto.pk, 1)])
+        with self.assertRaises(MovimentacaoInvalida):
+            criar_romaneio(self.usuario, self.central.pk, self.loja.pk, [])
+
+        self.assertFalse(Romaneio.objects.exists())
+        self.assertEqual((self.saldo(self.central), self.saldo(self.loja)), (2, None))
+
+
+class TotaisProdutoTests(EstoqueTestCase):
+    def setUp(self):
+        movimentar(self.usuario, "ENTRADA", self.produto.pk, 20, destino_id=self.central.pk)
+        movimentar(self.usuario, "ENTRADA", self.produto.pk, 5, destino_id=self.loja.pk)
+
+    def totais(self):
+        self.produto.refresh_from_db()
+        return self.produto.saldo_central, self.produto.saldo_total
+
+    def test_instancia_carregada_antes_de_movimentar(self):
+        antigo = SaldoEstoque.objects.get(produto=self.produto, loja=self.central)
+        movimentar(self.usuario, "SAIDA", self.produto.pk, 3, origem_id=self.central.pk)
+
+        antigo.quantidade += 1
+        antigo.save()
+        self.assertEqual(self.totais(), (21, 26))
+
+        antigo = SaldoEstoque.objects.only("pk").get(produto=self.produto, loja=self.loja)
+        movimentar(self.usuario, "SAIDA", self.produto.pk, 2, origem_id=self.loja.pk)
+        antigo.delete()
+        self.assertEqual(self.totais(), (21, 21))
+
+    def test_troca_de_loja(self):
+        saldo = SaldoEstoque.objects.get(produto=self.produto, loja=self.central)
+        saldo.loja = Loja.objects.create(nome="Loja 2")
+        saldo.save()
+        self.assertEqual(self.totais(), (0, 25))
+
+    def test_reconciliar_estoque(self):
+        Produto.objects.filter(pk=self.produto.pk).update(saldo_central=0, saldo_total=99)
+
+        with self.assertRaises(CommandError):
+            call_command("reconciliar_estoque", "--verificar", stdout=StringIO())
+        saida = StringIO()
+        call_command("reconciliar_estoque", stdout=saida)
+        self.assertIn("1 produto(s) corrigido(s)", saida.getvalue())
+        self.assertEqual(self.totais(), (20, 25))
+        call_command("reconciliar_estoque", "--verificar", stdout=StringIO())
+
+
+class SaldoHistoricoTests(EstoqueTestCase):
+    def setUp(self):
+        self.hoje = timezone.localdate()
+        # (dias atrás, tipo, quantidade, origem, destino)
+        for dias, tipo, quantidade, origem, destino in (
+            (10, "ENTRADA", 10, None, self.central),
+            (5, "SAIDA", 3, self.central, None),
+            (2, "TRANSFERENCIA", 2, self.central, self.loja),
+            (0, "ENTRADA", 4, None, self.loja),
+        ):
+            movimentacao = movimentar(
+                self.usuario, tipo, self.produto.pk, quantidade,
+                origem_id=origem and origem.pk, destino_id=destino and destino.pk,
+            )
+            # Fim da tarde do dia (data_movimentacao é auto_now_add)
+            momento = fim_do_dia(self.hoje - timedelta(days=dias)) - timedelta(hours=6)
+            Movimentacao.objects.filter(pk=movimentacao.pk).update(data_movimentacao=momento)
+
+    def conferir(self):
+        esperado = {11: (0, 0), 7: (10, 0), 4: (7, 0), 1: (5, 2), 0: (5, 6)}
+        for dias, (central, loja) in esperado.items():
+            dia = self.hoje - timedelta(days=dias)
+            with self.subTest(dia=dia):
+                self.assertEqual(saldo_em(self.produto.pk, self.central.pk, dia), central)
+                self.assertEqual(saldo_em(self.produto.pk, self.loja.pk, dia), loja)
+
+    def test_sem_snapshot_parte_do_saldo_atual(self):
+        self.conferir()
+
+    def test_com_snapshots(self):
+        gerar_snapshot(self.hoje - timedelta(days=6))
+        self.conferir()
+        gerar_snapshot(self.hoje - timedelta(days=3))
+        self.conferir()
+        self.assertEqual(
+            saldos_em(self.hoje - timedelta(days=3)), {(self.produto.pk, self.central.pk): 7}
+        )
 
-# Create your tests here.
+    def test_comando(self):
+        call_command("snapshot_estoque", "--desde", str(self.hoje - timedelta(days=4)), stdout=StringIO())
+        self.assertEqual(SnapshotEstoque.objects.count(), 4)  # até ontem
+        ontem = SnapshotEstoque.objects.get(data=self.hoje - timedelta(days=1))
+        self.assertEqual(
+            sorted(ontem.saldos.values_list("loja_id", "quantidade")),
+            sorted([(self.central.pk, 5), (self.loja.pk, 2)]),
+        )
+        self.conferir()
@@ -7,4 +7,8 @@ urlpatterns = [
     path("", views.estoque_home, name="home"),
     path("exportar-csv/", views.estoque_exportar_csv, name="exportar_csv"),
     path("movimentar/", views.movimentacao_form, name="movimentar"),
+    path("movimentar/importar/", views.movimentacao_importar, name="importar"),
+    path("romaneios/", views.romaneio_lista, name="romaneios"),
+    path("romaneios/novo/", views.romaneio_novo, name="romaneio_novo"),
+    path("romaneios/<int:pk>/", views.romaneio_detalhe, name="romaneio_detalhe"),
 ]
@@ -1,14 +1,16 @@
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.shortcuts import render, redirect
-from django.http import HttpResponse
+from django.shortcuts import get_object_or_404, render, redirect
 
-from django.db.models import Sum, F, Q
+from django.db.models import Count, Sum, F
 from django.db.models.functions import Coalesce
 from django.contrib import messages
 
-import csv
-
-from .models import Produto, SaldoEstoque, Loja, Categoria, Movimentacao
+from relatorios.jobs import exportar
+from viagens.models import Viagem
+from .exportacao import FILTROS_PRODUTOS
+from .models import Produto, Loja, Categoria, Romaneio
+from .importacao import MAX_LINHAS, ArquivoInvalido, importar_movimentacoes
+from .movimentos import ItensInvalidos, MovimentacaoInvalida, criar_romaneio, movimentar
 from contas.views import is_admin
 
 
@@ -16,46 +18,15 @@ from contas.views import is_admin
 @login_required
 @user_passes_test(is_admin)
 def estoque_home(request):
-    # Base de produtos
+    # Base de produtos (saldo_central e saldo_total são colunas do Produto)
     base_qs = Produto.objects.select_related("categoria")
 
-    # Anota saldo do Central e total geral (todas as lojas)
-    qs_anotado = base_qs.annotate(
-        saldo_central=Coalesce(
-            Sum(
-                "saldos__quantidade",
-                filter=Q(saldos__loja__is_central=True),
-            ),
-            0,
-        ),
-        total_geral=Coalesce(
-            Sum("saldos__quantidade"),
-            0,
-        ),
-    )
-
     # Filtros da Tela
     categoria_id = (request.GET.get("categoria") or "").strip()
     ativo = (request.GET.get("ativo") or "").strip()  # "", "sim", "nao"
     situacao = (request.GET.get("situacao_central") or "").strip()  # "", "abaixo", "ok", "zerado"
 
-    qs = qs_anotado
-
-    if categoria_id:
-        qs = qs.filter(categoria_id=categoria_id)
-
-    if ativo == "sim":
-        qs = qs.filter(ativo=True)
-    elif ativo == "nao":
-        qs = qs.filter(ativo=False)
-
-    # Situação em relação ao Central
-    if situacao == "abaixo":
-        qs = qs.filter(saldo_central__lt=F("estoque_minimo"))
-    elif situacao == "ok":
-        qs = qs.filter(saldo_central__gte=F("estoque_minimo"), saldo_central__gt=0)
-    elif situacao == "zerado":
-        qs = qs.filter(saldo_central=0)
+    qs = FILTROS_PRODUTOS.aplicar(base_qs, request.GET)
 
     # Limite de segurança na tela
     produtos = qs.order_by("nome")[:200]
@@ -71,14 +42,14 @@ def estoque_home(request):
     kpi_ativos = base_qs.filter(ativo=True).count()
 
     # Produtos abaixo do mínimo (Central) em toda a base
-    kpi_abaixo_min = qs_anotado.filter(saldo_central__lt=F("estoque_minimo")).count()
+    kpi_abaixo_min = base_qs.filter(saldo_central__lt=F("estoque_minimo")).count()
 
     # Produtos com Central zerado
-    kpi_central_zerado = qs_anotado.filter(saldo_central=0).count()
+    kpi_central_zerado = base_qs.filter(saldo_central=0).count()
 
     # Total geral de itens (somando saldos de todas as lojas)
-    kpi_total_geral = SaldoEstoque.objects.aggregate(
-        total=Coalesce(Sum("quantidade"), 0)
+    kpi_total_geral = Produto.objects.aggregate(
+        total=Coalesce(Sum("saldo_total"), 0)
     )["total"]
 
     context = {
@@ -103,100 +74,17 @@ def estoque_home(request):
 @login_required
 @user_passes_test(is_admin)
 def estoque_exportar_csv(request):
-    base_qs = Produto.objects.select_related("categoria")
-
-    qs = base_qs.annotate(
-        saldo_central=Coalesce(
-            Sum(
-                "saldos__quantidade",
-                filter=Q(saldos__loja__is_central=True),
-            ),
-            0,
-        ),
-        total_geral=Coalesce(
-            Sum("saldos__quantidade"),
-            0,
-        ),
-    )
-
-    # Mesmos filtros da tela
-    categoria_id = (request.GET.get("categoria") or "").strip()
-    ativo = (request.GET.get("ativo") or "").strip()  # "", "sim", "nao"
-    situacao = (request.GET.get("situacao_central") or "").strip()  # "", "abaixo", "ok", "zerado"
+    return exportar(request, "estoque")
 
-    if categoria_id:
-        qs = qs.filter(categoria_id=categoria_id)
 
-    if ativo == "sim":
-        qs = qs.filter(ativo=True)
-    elif ativo == "nao":
-        qs = qs.filter(ativo=False)
+MENSAGENS_SUCESSO = {
+    "ENTRADA": "Entrada registrada com sucesso!",
+    "SAIDA": "Saída registrada com sucesso!",
+    "TRANSFERENCIA": "Transferência realizada com sucesso!",
+}
 
-    if situacao == "abaixo":
-        qs = qs.filter(saldo_central__lt=F("estoque_minimo"))
-    elif situacao == "ok":
-        qs = qs.filter(saldo_central__gte=F("estoque_minimo"), saldo_central__gt=0)
-    elif situacao == "zerado":
-        qs = qs.filter(saldo_central=0)
-
-    qs = qs.order_by("nome")
-
-    # Nome do arquivo
-    partes = ["estoque"]
-
-    if categoria_id:
-        try:
-            cat_nome = Categoria.objects.get(pk=categoria_id).nome
-            partes.append(cat_nome.replace(" ", "_"))
-        except Categoria.DoesNotExist:
-            partes.append(f"cat_{categoria_id}")
-
-    if ativo == "sim":
-        partes.append("ativos")
-    elif ativo == "nao":
-        partes.append("inativos")
-
-    if situacao:
-        partes.append(situacao)
-
-    fname = "_".join(partes).replace("__", "_").lower() + ".csv"
-
-    # Response CSV
-    response = HttpResponse(content_type="text/csv; charset=utf-8")
-    response["Content-Disposition"] = f'attachment; filename="{fname}"'
-    response.write("\ufeff")  # BOM UTF-8 para Excel
-    w = csv.writer(response, lineterminator="\n")
-
-    # Cabeçalho
-    w.writerow(["RELATÓRIO DE ESTOQUE"])
-    from django.utils import timezone
-    w.writerow(["Gerado em", timezone.now().strftime("%Y-%m-%d %H:%M")])
-    w.writerow([])
-
-    # Colunas
-    w.writerow([
-        "ID", "Nome", "Categoria", "Unidade",
-        "Saldo no Central", "Saldo mínimo (Central)",
-        "Total (todas as lojas)",
-        "Fabricante", "Modelo", "Ativo",
-    ])
-
-    for p in qs:
-        w.writerow([
-            p.id,
-            p.nome,
-            p.categoria.nome if p.categoria_id else "",
-            p.unidade or "",
-            p.saldo_central or 0,
-            p.estoque_minimo,
-            p.total_geral or 0,
-            p.fabricante or "",
-            p.modelo or "",
-            "Sim" if p.ativo else "Não",
-        ])
-
-    return response
 
+# Regras e gravação em estoque/movimentos.py
 @login_required
 @user_passes_test(is_admin)
 def movimentacao_form(request):
@@ -206,100 +94,135 @@ def movimentacao_form(request):
 
     if request.method == "POST":
         tipo = request.POST.get("tipo")
-        produto_id = request.POST.get("produto")
-        origem_id = request.POST.get("origem")
-        destino_id = request.POST.get("destino")
-        qtd = int(request.POST.get("quantidade"))
-        observacao = request.POST.get("observacao")
-
         try:
-            produto = Produto.objects.get(id=produto_id)
-        except Produto.DoesNotExist:
-            messages.error(request, "Produto inválido.")
+            movimentar(
+                request.user,
+                tipo,
+                produto_id=request.POST.get("produto"),
+                quantidade=request.POST.get("quantidade"),
+                origem_id=request.POST.get("origem"),
+                destino_id=request.POST.get("destino"),
+                observacao=request.POST.get("observacao"),
+            )
+        except MovimentacaoInvalida as e:
+            messages.error(request, str(e))
             return redirect("estoque:movimentar")
 
-        origem = Loja.objects.filter(id=origem_id).first() if origem_id else None
-        destino = Loja.objects.filter(id=destino_id).first() if destino_id else None
-
-        # Buscar/Criar Saldos
-        def get_saldo(prod, loja):
-            saldo, created = SaldoEstoque.objects.get_or_create(produto=prod, loja=loja)
-            return saldo
-
-        # Entrada
-        if tipo == "ENTRADA":
-            saldo = get_saldo(produto, destino)
-            saldo.quantidade += qtd
-            saldo.save()
-
-            Movimentacao.objects.create(
-                tipo="ENTRADA",
-                produto=produto,
-                destino=destino,
-                quantidade=qtd,
-                usuario=request.user,
-                observacao=observacao
-            )
+        messages.success(request, MENSAGENS_SUCESSO[tipo])
+        return redirect("estoque:home")
 
-            messages.success(request, "Entrada registrada com sucesso!")
-            return redirect("estoque:home")
+    context = {
+        "produtos": produtos,
+        "lojas": lojas,
+    }
+    return render(request, "estoque/movimentacao_form.html", context)
 
-        # Saída
-        if tipo == "SAIDA":
-            saldo = get_saldo(produto, origem)
+# Importação de movimentações por CSV (regras em estoque/importacao.py)
+@login_required
+@user_passes_test(is_admin)
+def movimentacao_importar(request):
+    erros = []
+    if request.method == "POST":
+        arquivo = request.FILES.get("arquivo")
+        simular = bool(request.POST.get("simular"))
+        if not arquivo:
+            messages.error(request, "Selecione um arquivo CSV.")
+            return redirect("estoque:importar")
+        try:
+            quantidade, erros = importar_movimentacoes(request.user, arquivo, simular=simular)
+        except ArquivoInvalido as e:
+            messages.error(request, str(e))
+            return redirect("estoque:importar")
+
+        if not erros:
+            if simular:
+                messages.success(request, f"Arquivo válido: {quantidade} movimentações. Nada foi gravado.")
+                return redirect("estoque:importar")
+            messages.success(request, f"{quantidade} movimentações importadas com sucesso!")
+            return redirect("estoque:home")
+        messages.error(request, f"Nenhuma movimentação gravada: {len(erros)} linha(s) com erro.")
 
-            if saldo.quantidade < qtd:
-                messages.error(request, "Quantidade insuficiente para saída.")
-                return redirect("estoque:movimentar")
+    context = {
+        "erros": erros[:500],
+        "erros_ocultos": max(0, len(erros) - 500),
+        "max_linhas": MAX_LINHAS,
+    }
+    return render(request, "estoque/movimentacao_importar.html", context)
 
-            saldo.quantidade -= qtd
-            saldo.save()
 
-            Movimentacao.objects.create(
-                tipo="SAIDA",
-                produto=produto,
-                origem=origem,
-                quantidade=qtd,
-                usuario=request.user,
-                observacao=observacao
-            )
+# Romaneios (transferência de vários produtos de uma vez)
+@login_required
+@user_passes_test(is_admin)
+def romaneio_lista(request):
+    romaneios = (
+        Romaneio.objects.select_related("origem", "destino", "viagem", "criado_por")
+        .annotate(qtd_itens=Count("itens"))
+        .order_by("-criado_em")[:100]
+    )
+    return render(request, "estoque/romaneio_lista.html", {"romaneios": romaneios})
 
-            messages.success(request, "Saída registrada com sucesso!")
-            return redirect("estoque:home")
 
-        # Transferência
-        if tipo == "TRANSFERENCIA":
-            if origem == destino:
-                messages.error(request, "Origem e destino não podem ser iguais.")
-                return redirect("estoque:movimentar")
-
-            saldo_origem = get_saldo(produto, origem)
-            saldo_destino = get_saldo(produto, destino)
-
-            if saldo_origem.quantidade < qtd:
-                messages.error(request, "Saldo insuficiente para transferência.")
-                return redirect("estoque:movimentar")
-
-            saldo_origem.quantidade -= qtd
-            saldo_destino.quantidade += qtd
-            saldo_origem.save()
-            saldo_destino.save()
-
-            Movimentacao.objects.create(
-                tipo="TRANSFERENCIA",
-                produto=produto,
-                origem=origem,
-                destino=destino,
-                quantidade=qtd,
-                usuario=request.user,
-                observacao=observacao
-            )
+@login_required
+@user_passes_test(is_admin)
+def romaneio_novo(request):
+    viagens = (
+        Viagem.objects.filter(status__in=("PLANEJADA", "EM_ANDAMENTO"))
+        .select_related("origem", "destino").order_by("-data_partida")[:100]
+    )
+    dados = request.POST if request.method == "POST" else request.GET
+    # Linhas do formulário: produto pelo nome (datalist) e quantidade
+    linhas = [
+        {"produto": p.strip(), "quantidade": q.strip()}
+        for p, q in zip(dados.getlist("produto"), dados.getlist("quantidade"))
+        if p.strip() or q.strip()
+    ]
+    erros = []
 
-            messages.success(request, "Transferência realizada com sucesso!")
-            return redirect("estoque:home")
+    if request.method == "POST":
+        ids = dict(Produto.objects.filter(nome__in=[l["produto"] for l in linhas]).values_list("nome", "pk"))
+        nomes = {pk: nome for nome, pk in ids.items()}
+        erros = [(l["produto"] or "(vazio)", "Produto não encontrado.") for l in linhas if l["produto"] not in ids]
+        if not erros:
+            try:
+                romaneio = criar_romaneio(
+                    request.user,
+                    dados.get("origem"),
+                    dados.get("destino"),
+                    [(ids[l["produto"]], l["quantidade"]) for l in linhas],
+                    viagem_id=dados.get("viagem"),
+                    observacao=dados.get("observacao"),
+                )
+            except ItensInvalidos as e:
+                erros = [(nomes.get(p, p), mensagem) for p, mensagem in e.erros]
+            except MovimentacaoInvalida as e:
+                messages.error(request, str(e))
+            else:
+                messages.success(request, f"Romaneio {romaneio.pk} registrado com sucesso!")
+                return redirect("estoque:romaneio_detalhe", pk=romaneio.pk)
+        if erros:
+            messages.error(request, "Romaneio não registrado: corrija os itens abaixo.")
+    else:
+        # Vindo de uma viagem: origem e destino dela
+        viagem = next((v for v in viagens if str(v.pk) == dados.get("viagem")), None)
+        if viagem:
+            dados = {"viagem": str(viagem.pk), "origem": str(viagem.origem_id), "destino": str(viagem.destino_id)}
 
     context = {
-        "produtos": produtos,
-        "lojas": lojas,
+        "produtos": Produto.objects.filter(ativo=True).order_by("nome").values_list("nome", flat=True),
+        "lojas": Loja.objects.order_by("nome"),
+        "viagens": viagens,
+        "dados": dados,
+        "linhas": linhas + [{"produto": "", "quantidade": ""}] * max(5, 10 - len(linhas)),
+        "erros": erros,
     }
-    return render(request, "estoque/movimentacao_form.html", context)
\ No newline at end of file
+    return render(request, "estoque/romaneio_form.html", context)
+
+
+@login_required
+@user_passes_test(is_admin)
+def romaneio_detalhe(request, pk: int):
+    romaneio = get_object_or_404(
+        Romaneio.objects.select_related("origem", "destino", "viagem", "criado_por"), pk=pk
+    )
+    itens = romaneio.itens.select_related("produto").order_by("produto__nome")
+    return render(request, "estoque/romaneio_detalhe.html", {"romaneio": romaneio, "itens": itens})
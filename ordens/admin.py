@@ -2,6 +2,7 @@ from django.contrib import admin, messages
 from django.utils.translation import gettext_lazy as _
 from django.db.models import Q
 from django.contrib.auth import get_user_model
+from contas.papeis import usuario_is_admin
 from .models import OrdemServico, AndamentoOS, AnexoOS, CategoriaProblema  # <-- adicionado CategoriaProblema
 
 User = get_user_model()
@@ -78,22 +79,22 @@ class OrdemServicoAdmin(admin.ModelAdmin):
 
     def get_queryset(self, request):
         qs = super().get_queryset(request)
-        if request.user.is_superuser or request.user.groups.filter(name="admin").exists():
+        if usuario_is_admin(request.user):
             return qs
         return qs.filter(solicitante=request.user)
 
     def has_view_permission(self, request, obj=None):
-        if request.user.is_superuser or request.user.groups.filter(name="admin").exists():
+        if usuario_is_admin(request.user):
             return True
         return request.user.is_authenticated
 
     def has_change_permission(self, request, obj=None):
-        if request.user.is_superuser or request.user.groups.filter(name="admin").exists():
+        if usuario_is_admin(request.user):
             return True
         return False
 
     def has_delete_permission(self, request, obj=None):
-        return request.user.is_superuser or request.user.groups.filter(name="admin").exists()
+        return usuario_is_admin(request.user)
 
     def _alterar_status_em_massa(self, request, queryset, novo_status, texto):
         sucesso, falha = 0, 0
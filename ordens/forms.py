@@ -5,6 +5,7 @@ from django.contrib.auth import get_user_model
 from django.db.models import Q
 from django.forms import ModelChoiceField
 
+from contas.papeis import usuario_is_admin
 from .models import OrdemServico, AndamentoOS, AnexoOS, CategoriaProblema
 
 User = get_user_model()
@@ -40,12 +41,7 @@ class OrdemServicoForm(forms.ModelForm):
         self.fields["descricao_problema"].required = True
 
         # Checa admin com segurança mesmo se user=None
-        is_admin = bool(
-            user and (
-                getattr(user, "is_superuser", False) or
-                (hasattr(user, "groups") and user.groups.filter(name="admin").exists())
-            )
-        )
+        is_admin = usuario_is_admin(user)
 
         # Usuário comum não escolhe a loja manualmente
         if user and not is_admin:
@@ -152,6 +148,6 @@ class AtribuirTecnicoForm(forms.ModelForm):
         u = self.cleaned_data.get("tecnico_responsavel")
         if u is None:
             return None  # permitir sem responsável
-        if not (u.is_superuser or u.groups.filter(name="admin").exists()):
+        if not usuario_is_admin(u):
             raise forms.ValidationError("Apenas administradores podem ser técnicos responsáveis.")
         return u
@@ -0,0 +1,59 @@
+from datetime import timedelta
+
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F, Q
+from django.utils import timezone
+
+from .models import OrdemServico
+
+
+STATUS_EM_ABERTO = ("ABERTA", "EM_ANALISE", "EM_EXECUCAO")
+DIAS_ATRASO = 3
+
+
+# KPIs, MTTR do mês e distribuições por status/prioridade em uma única
+# consulta (COUNT/AVG com FILTER), usada pelo dashboard web e pela API
+def indicadores_os(qs=None, agora=None) -> dict:
+    qs = OrdemServico.objects.all() if qs is None else qs
+    agora = agora or timezone.now()
+    inicio_mes = agora.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+    finalizadas_mes = Q(status="FINALIZADA", data_fechamento__gte=inicio_mes)
+    duracao = ExpressionWrapper(F("data_fechamento") - F("data_abertura"), output_field=DurationField())
+
+    agregados = {
+        "kpi_abertas": Count("id", filter=Q(status="ABERTA")),
+        "kpi_execucao": Count("id", filter=Q(status="EM_EXECUCAO")),
+        "kpi_finalizadas_mes": Count("id", filter=finalizadas_mes),
+        "kpi_atrasadas": Count("id", filter=Q(
+            status__in=STATUS_EM_ABERTO,
+            data_abertura__lt=agora - timedelta(days=DIAS_ATRASO),
+        )),
+        "mttr_mes": Avg(duracao, filter=finalizadas_mes),
+    }
+    for status, _ in OrdemServico.STATUS_CHOICES:
+        agregados[f"status__{status}"] = Count("id", filter=Q(status=status))
+    for prioridade, _ in OrdemServico.PRIORIDADE_CHOICES:
+        agregados[f"prioridade__{prioridade}"] = Count("id", filter=Q(prioridade=prioridade))
+
+    r = qs.aggregate(**agregados)
+
+    mttr_horas = None
+    if r["mttr_mes"]:
+        mttr_horas = round(r["mttr_mes"].total_seconds() / 3600.0, 1)
+
+    return {
+        "kpi_abertas": r["kpi_abertas"],
+        "kpi_execucao": r["kpi_execucao"],
+        "kpi_finalizadas_mes": r["kpi_finalizadas_mes"],
+        "kpi_atrasadas": r["kpi_atrasadas"],
+        "mttr_horas": mttr_horas,
+        # Apenas valores presentes, como no GROUP BY anterior
+        "dist_status": [
+            {"status": s, "total": r[f"status__{s}"]}
+            for s, _ in OrdemServico.STATUS_CHOICES if r[f"status__{s}"]
+        ],
+        "dist_prioridade": [
+            {"prioridade": p, "total": r[f"prioridade__{p}"]}
+            for p, _ in OrdemServico.PRIORIDADE_CHOICES if r[f"prioridade__{p}"]
+        ],
+    }
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estoque', '0009_movimentacao'),
+        ('ordens', '0003_categoriaproblema_ordemservico_categoria'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ordemservico',
+            index=models.Index(fields=['data_abertura', 'id'], name='ordens_orde_data_ab_c9038e_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ordens', '0004_ordemservico_keyset_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ordemservico',
+            name='atualizado_em',
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.CreateModel(
+            name='OSExcluida',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('os_id', models.BigIntegerField()),
+                ('tecnico_responsavel_id', models.BigIntegerField(blank=True, null=True)),
+                ('excluida_em', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'OS excluída',
+                'verbose_name_plural': 'OS excluídas',
+                'ordering': ('-excluida_em',),
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estoque', '0009_movimentacao'),
+        ('ordens', '0005_ordemservico_atualizado_em_osexcluida'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ordemservico',
+            index=models.Index(fields=['loja', 'status', 'data_abertura'], name='ordens_orde_loja_id_522dc8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ordemservico',
+            index=models.Index(fields=['status', 'data_fechamento'], name='ordens_orde_status_bfda4e_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ordens', '0006_ordemservico_filtros_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='osexcluida',
+            name='motivo',
+            field=models.CharField(choices=[('EXCLUIDA', 'Excluída'), ('REATRIBUIDA', 'Reatribuída a outro técnico')], default='EXCLUIDA', max_length=15),
+        ),
+    ]
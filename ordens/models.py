@@ -77,6 +77,7 @@ class OrdemServico(models.Model):
     solucao = models.TextField(blank=True, default="")
     motivo_cancelamento = models.TextField(blank=True, default="")
     custo_total = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    atualizado_em = models.DateTimeField(auto_now=True, db_index=True)  # Base da sincronização incremental
 
     class Meta:
         verbose_name = "Ordem de Serviço"
@@ -85,12 +86,44 @@ class OrdemServico(models.Model):
             models.Index(fields=["status"]),
             models.Index(fields=["prioridade"]),
             models.Index(fields=["data_abertura"]),
+            models.Index(fields=["data_abertura", "id"]),  # Paginação por keyset da API
+            # Filtros dos relatórios: igualdade na frente, intervalo de datas por último
+            models.Index(fields=["loja", "status", "data_abertura"]),
+            models.Index(fields=["status", "data_fechamento"]),
         ]
         ordering = ("-data_abertura",)
 
     def __str__(self):
         return f"OS-{self.id} | {self.loja} | {self.status}"
 
+    # Campos cujo valor de carga os signals comparam ao salvar ou excluir:
+    # resumo diário (relatorios/signals.py) e reatribuição (ordens/signals.py)
+    CAMPOS_CARREGADOS = (
+        "data_abertura", "data_fechamento", "loja_id", "categoria_id", "status", "prioridade", "custo_total",
+        "tecnico_responsavel_id",
+    )
+
+    # Guarda os valores com que a OS veio do banco em "_carregado". from_db e
+    # não post_init: roda só para linhas lidas do banco, sem despachar um
+    # signal por instância nas listas, exportações e relatórios.
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        valores = instance.__dict__
+        instance._carregado = {c: valores[c] for c in cls.CAMPOS_CARREGADOS if c in valores}
+        return instance
+
+    # Valores de carga completos; os que não vieram na consulta (.only()) são
+    # lidos do banco. None para OS nova ou que não existe mais.
+    def valores_carregados(self) -> dict | None:
+        if self._state.adding or not self.pk:
+            return None
+        carregado = self.__dict__.setdefault("_carregado", {})
+        faltando = [c for c in self.CAMPOS_CARREGADOS if c not in carregado]
+        if faltando:
+            carregado.update(type(self)._base_manager.filter(pk=self.pk).values(*faltando).first() or {})
+        return carregado if len(carregado) == len(self.CAMPOS_CARREGADOS) else None
+
     # Propriedades
     @property
     def titulo_auto(self) -> str:
@@ -112,7 +145,7 @@ class OrdemServico(models.Model):
             self.tecnico_responsavel = tecnico
         if observacoes:
             self.observacoes = (self.observacoes + "\n" if self.observacoes else "") + observacoes
-        self.save(update_fields=["status", "data_fechamento", "tecnico_responsavel", "observacoes"])
+        self.save(update_fields=["status", "data_fechamento", "tecnico_responsavel", "observacoes", "atualizado_em"])
 
     # Fluxo de status
     STATUS_FLOW = {
@@ -129,13 +162,20 @@ class OrdemServico(models.Model):
     class CamposObrigatorios(Exception):
         pass
 
-    def mudar_status(self, novo_status: str, autor: User, texto_andamento: str = "", visibilidade: str = "INTERNO"):
+    def mudar_status(
+        self,
+        novo_status: str,
+        autor: User,
+        texto_andamento: str = "",
+        visibilidade: str = "INTERNO",
+        salvar_andamento: bool = True,
+    ) -> "AndamentoOS":
         atual = self.status
         if novo_status not in self.STATUS_FLOW.get(atual, set()):
             raise OrdemServico.TransicaoInvalida(f"Transição {atual} → {novo_status} não é permitida.")
 
         # Regras específicas
-        if novo_status == "EM_EXECUCAO" and not self.tecnico_responsavel:
+        if novo_status == "EM_EXECUCAO" and not self.tecnico_responsavel_id:
             raise OrdemServico.CamposObrigatorios("Defina o técnico responsável antes de iniciar a execução.")
         if novo_status == "FINALIZADA" and not self.solucao.strip():
             raise OrdemServico.CamposObrigatorios("Informe a solução antes de finalizar.")
@@ -146,9 +186,9 @@ class OrdemServico(models.Model):
         self.status = novo_status
         if novo_status == "FINALIZADA":
             self.data_fechamento = timezone.now()
-        self.save()
+        self.save(update_fields=["status", "data_fechamento", "solucao", "motivo_cancelamento", "atualizado_em"])
 
-        AndamentoOS.objects.create(
+        andamento = AndamentoOS(
             os=self,
             autor=autor,
             texto=texto_andamento,
@@ -156,6 +196,10 @@ class OrdemServico(models.Model):
             status_de=atual,
             status_para=novo_status,
         )
+        # salvar_andamento=False: quem chama insere em lote (bulk_create)
+        if salvar_andamento:
+            andamento.save()
+        return andamento
 
 
 # Histórico de Andamentos
@@ -180,6 +224,29 @@ class AndamentoOS(models.Model):
         return f"Andamento {self.os.id} por {self.autor}"
 
 
+# Registro de OS excluídas (tombstones para a sincronização do app).
+# REATRIBUIDA: a OS passou para outro técnico e deve sair do aparelho do
+# anterior (tecnico_responsavel_id), mas continua existindo.
+class OSExcluida(models.Model):
+    MOTIVO_CHOICES = [
+        ("EXCLUIDA", "Excluída"),
+        ("REATRIBUIDA", "Reatribuída a outro técnico"),
+    ]
+
+    os_id = models.BigIntegerField()
+    tecnico_responsavel_id = models.BigIntegerField(null=True, blank=True)
+    excluida_em = models.DateTimeField(auto_now_add=True, db_index=True)
+    motivo = models.CharField(max_length=15, choices=MOTIVO_CHOICES, default="EXCLUIDA")
+
+    class Meta:
+        verbose_name = "OS excluída"
+        verbose_name_plural = "OS excluídas"
+        ordering = ("-excluida_em",)
+
+    def __str__(self):
+        return f"OS-{self.os_id} excluída em {self.excluida_em:%d/%m/%Y %H:%M}"
+
+
 # Anexos
 def os_upload_path(instance, filename):
     return f"os/{instance.os_id}/{filename}"
@@ -0,0 +1,54 @@
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from core.versoes import nova_versao
+from .models import AndamentoOS, CategoriaProblema, OrdemServico, OSExcluida
+
+
+# Guarda a exclusão para que o app remova a OS na próxima sincronização
+@receiver(post_delete, sender=OrdemServico)
+def registrar_exclusao_os(sender, instance, **kwargs):
+    OSExcluida.objects.create(
+        os_id=instance.pk,
+        tecnico_responsavel_id=instance._tecnico_anterior,
+    )
+
+
+# OS reatribuída: o técnico anterior recebe um tombstone para tirá-la do
+# aparelho. O técnico com que a OS foi carregada (valores_carregados) fica
+# em "_tecnico_anterior".
+@receiver(pre_save, sender=OrdemServico)
+@receiver(pre_delete, sender=OrdemServico)
+def guardar_tecnico_os(sender, instance, **kwargs):
+    carregado = instance.valores_carregados()
+    instance._tecnico_anterior = carregado["tecnico_responsavel_id"] if carregado else None
+
+
+@receiver(post_save, sender=OrdemServico)
+def registrar_reatribuicao_os(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and not {"tecnico_responsavel", "tecnico_responsavel_id"} & set(update_fields):
+        return
+    anterior = None if created else instance._tecnico_anterior
+    if anterior is not None and anterior != instance.tecnico_responsavel_id:
+        OSExcluida.objects.create(os_id=instance.pk, tecnico_responsavel_id=anterior, motivo="REATRIBUIDA")
+    instance.__dict__.setdefault("_carregado", {})["tecnico_responsavel_id"] = instance.tecnico_responsavel_id
+
+
+# Invalida os validadores (ETag) da listagem de categorias
+@receiver(post_save, sender=CategoriaProblema)
+@receiver(post_delete, sender=CategoriaProblema)
+def categoria_alterada(sender, **kwargs):
+    nova_versao("categorias")
+
+
+# Invalida os widgets do dashboard que dependem das OS e dos andamentos
+@receiver(post_save, sender=OrdemServico)
+@receiver(post_delete, sender=OrdemServico)
+def os_alterada(sender, **kwargs):
+    nova_versao("os")
+
+
+@receiver(post_save, sender=AndamentoOS)
+@receiver(post_delete, sender=AndamentoOS)
+def andamento_alterado(sender, **kwargs):
+    nova_versao("andamentos")
@@ -1,3 +1,52 @@
-from django.test import TestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
 
-# Create your tests here.
+from core.testes import OrcamentoTestCase
+
+
+# Consultas e tempo por rota (orçamentos em core/testes.py)
+class OrcamentoOrdensTests(OrcamentoTestCase):
+    def setUp(self):
+        super().setUp()
+        self.os_aberta = next(o for o in self.base["ordens"] if o.status == "ABERTA")
+
+    def test_nova(self):
+        self.assertOrcamento("ordens:os_nova", self.solicitante)
+
+    def test_sucesso(self):
+        self.assertOrcamento("ordens:os_sucesso", self.solicitante)
+
+    def test_listar(self):
+        self.assertOrcamento("ordens:os_listar", self.admin)
+
+    def test_minhas(self):
+        self.assertOrcamento("ordens:os_minhas", self.solicitante)
+
+    def test_detalhe(self):
+        self.assertOrcamento("ordens:os_detalhe", self.admin, kwargs={"pk": self.os_aberta.pk})
+
+    def test_comentario(self):
+        self.assertOrcamento(
+            "ordens:os_comentario", self.admin, "post", kwargs={"pk": self.os_aberta.pk},
+            dados={"texto": "Verificado no local", "visibilidade": "PUBLICO"}, status=302,
+        )
+
+    def test_anexo(self):
+        arquivo = SimpleUploadedFile("foto.txt", b"conteudo", content_type="text/plain")
+        self.assertOrcamento(
+            "ordens:os_anexo", self.admin, "post", kwargs={"pk": self.os_aberta.pk},
+            dados={"arquivo": arquivo}, status=302,
+        )
+
+    def test_acao_status(self):
+        self.assertOrcamento(
+            "ordens:os_acao_status", self.admin, "post", kwargs={"pk": self.os_aberta.pk},
+            dados={"acao": "EM_ANALISE"}, status=302,
+        )
+        self.os_aberta.refresh_from_db()
+        self.assertEqual(self.os_aberta.status, "EM_ANALISE")
+
+    def test_atribuir(self):
+        self.assertOrcamento(
+            "ordens:os_atribuir", self.admin, "post", kwargs={"pk": self.os_aberta.pk},
+            dados={"tecnico_responsavel": self.base["tecnicos"][0].pk, "prioridade": "ALTA"}, status=302,
+        )
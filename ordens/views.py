@@ -83,12 +83,12 @@ def detalhe_os(request, pk):
         pk=pk
     )
 
+    is_admin_flag = is_admin(request.user)
+
     # Permissão: admin, solicitante ou técnico
-    if not (is_admin(request.user) or os_obj.solicitante == request.user or os_obj.tecnico_responsavel == request.user):
+    if not (is_admin_flag or request.user.pk in (os_obj.solicitante_id, os_obj.tecnico_responsavel_id)):
         raise PermissionDenied()
 
-    is_admin_flag = is_admin(request.user)
-
     # Form de andamento: esconde "visibilidade" para usuário comum
     andamento_form = AndamentoForm()
     if not is_admin_flag:
@@ -96,7 +96,7 @@ def detalhe_os(request, pk):
 
     # Apenas públicos para não-admin (e que não seja o técnico responsável)
     andamentos_qs = os_obj.andamentos.all()
-    if not is_admin_flag and request.user != os_obj.tecnico_responsavel:
+    if not is_admin_flag and request.user.pk != os_obj.tecnico_responsavel_id:
         andamentos_qs = andamentos_qs.filter(visibilidade="PUBLICO")
 
     context = {
@@ -106,7 +106,7 @@ def detalhe_os(request, pk):
         "finalizar_form": FinalizarForm(instance=os_obj),
         "cancelar_form": CancelarForm(instance=os_obj),
         "atribuir_form": AtribuirTecnicoForm(instance=os_obj),
-        "is_admin": is_admin(request.user),
+        "is_admin": is_admin_flag,
         "andamentos": andamentos_qs,
     }
     return render(request, "ordens/os_detalhe.html", context)
@@ -116,7 +116,7 @@ def detalhe_os(request, pk):
 @login_required
 def os_comentario(request, pk):
     os_obj = get_object_or_404(OrdemServico, pk=pk)
-    if not (is_admin(request.user) or os_obj.solicitante == request.user or os_obj.tecnico_responsavel == request.user):
+    if not (is_admin(request.user) or request.user.pk in (os_obj.solicitante_id, os_obj.tecnico_responsavel_id)):
         raise PermissionDenied()
 
     if request.method == "POST":
@@ -136,7 +136,7 @@ def os_comentario(request, pk):
 @login_required
 def os_anexo(request, pk):
     os_obj = get_object_or_404(OrdemServico, pk=pk)
-    if not (is_admin(request.user) or os_obj.solicitante == request.user or os_obj.tecnico_responsavel == request.user):
+    if not (is_admin(request.user) or request.user.pk in (os_obj.solicitante_id, os_obj.tecnico_responsavel_id)):
         raise PermissionDenied()
 
     if request.method == "POST":
@@ -155,7 +155,7 @@ def os_anexo(request, pk):
 @login_required
 def os_acao_status(request, pk):
     os_obj = get_object_or_404(OrdemServico, pk=pk)
-    if not (is_admin(request.user) or os_obj.tecnico_responsavel == request.user):
+    if not (is_admin(request.user) or os_obj.tecnico_responsavel_id == request.user.pk):
         raise PermissionDenied()
 
     acao = request.POST.get("acao")
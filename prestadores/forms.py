@@ -42,3 +42,8 @@ class OrdemExternaForm(forms.ModelForm):
             "data_previsao_retorno": forms.DateInput(attrs={"type": "date"}),
             "data_retorno": forms.DateInput(attrs={"type": "date"}),
         }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # O rótulo de cada OS mostra a loja
+        self.fields["os_interna"].queryset = self.fields["os_interna"].queryset.select_related("loja")
@@ -1,3 +1,17 @@
-from django.test import TestCase
+from core.testes import OrcamentoTestCase
 
-# Create your tests here.
+
+# Consultas e tempo por rota (orçamentos em core/testes.py)
+class OrcamentoPrestadoresTests(OrcamentoTestCase):
+    def test_lista(self):
+        self.assertOrcamento("prestadores:ordem_externa_lista", self.admin)
+        self.assertOrcamento("prestadores:ordem_externa_lista", self.admin, dados={"export": "csv"})
+
+    def test_nova(self):
+        self.assertOrcamento("prestadores:ordem_externa_nova", self.admin)
+
+    def test_detalhe(self):
+        self.assertOrcamento("prestadores:ordem_externa_detalhe", self.admin, kwargs={"pk": self.base["externas"][0].pk})
+
+    def test_contatos(self):
+        self.assertOrcamento("prestadores:contatos_lista", self.admin)
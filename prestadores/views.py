@@ -1,15 +1,24 @@
-import csv
-from django.http import HttpResponse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.shortcuts import render, redirect, get_object_or_404
 from django.db.models import Q
 
+from core.exportacao import formatar_data_hora, iterar_linhas, resposta_csv
+from core.filtros import Busca, Exato, Filtros, Id
 from estoque.models import Loja
 from .models import PrestadorServico, OrdemExterna
 from .forms import OrdemExternaForm
 
 
+FILTROS_ORDENS_EXTERNAS = Filtros(
+    status=Exato("status", OrdemExterna.STATUS_CHOICES),
+    prioridade=Exato("prioridade", OrdemExterna.PRIORIDADE_CHOICES),
+    prestador=Id("prestador_id"),
+    loja=Id("loja_id"),
+    q=Busca("equipamento", "numero_serie", "numero_os_prestador"),
+)
+
+
 @login_required
 def ordem_externa_lista(request):
     ordens = OrdemExterna.objects.select_related("loja", "prestador").all()
@@ -20,67 +29,10 @@ def ordem_externa_lista(request):
     loja_id = request.GET.get("loja", "")
     busca = request.GET.get("q", "")
 
-    if status:
-        ordens = ordens.filter(status=status)
-
-    if prioridade:
-        ordens = ordens.filter(prioridade=prioridade)
-
-    if prestador_id:
-        ordens = ordens.filter(prestador_id=prestador_id)
-
-    if loja_id:
-        ordens = ordens.filter(loja_id=loja_id)
-
-    if busca:
-        ordens = ordens.filter(
-            Q(equipamento__icontains=busca)
-            | Q(numero_serie__icontains=busca)
-            | Q(numero_os_prestador__icontains=busca)
-        )
+    ordens = FILTROS_ORDENS_EXTERNAS.aplicar(ordens, request.GET)
 
     if request.GET.get("export") == "csv":
-        response = HttpResponse(content_type="text/csv; charset=utf-8-sig")
-        response["Content-Disposition"] = 'attachment; filename="ordens_externas.csv"'
-
-        writer = csv.writer(response, delimiter=";")
-
-        writer.writerow([
-            "ID",
-            "Loja",
-            "Prestador",
-            "Equipamento",
-            "Nº Série",
-            "Status",
-            "Prioridade",
-            "Data envio",
-            "Previsão retorno",
-            "Data retorno",
-            "Nº OS prestador",
-            "Valor orçado",
-            "Valor aprovado",
-            "Observações",
-        ])
-
-        for o in ordens:
-            writer.writerow([
-                o.id,
-                o.loja.nome if o.loja else "",
-                o.prestador.nome if o.prestador else "",
-                o.equipamento,
-                o.numero_serie or "",
-                o.get_status_display(),
-                o.get_prioridade_display(),
-                o.data_envio.strftime("%d/%m/%Y") if o.data_envio else "",
-                o.data_previsao_retorno.strftime("%d/%m/%Y") if o.data_previsao_retorno else "",
-                o.data_retorno.strftime("%d/%m/%Y") if o.data_retorno else "",
-                o.numero_os_prestador or "",
-                o.valor_orcado or "",
-                o.valor_aprovado or "",
-                (o.observacoes or "").replace("\n", " ").replace("\r", " "),
-            ])
-
-        return response
+        return resposta_csv(_linhas_ordens_externas(ordens), "ordens_externas.csv", delimiter=";")
 
     context = {
         "ordens": ordens,
@@ -95,6 +47,51 @@ def ordem_externa_lista(request):
     return render(request, "prestadores/ordem_externa_lista.html", context)
 
 
+def _linhas_ordens_externas(ordens):
+    yield [
+        "ID",
+        "Loja",
+        "Prestador",
+        "Equipamento",
+        "Nº Série",
+        "Status",
+        "Prioridade",
+        "Data envio",
+        "Previsão retorno",
+        "Data retorno",
+        "Nº OS prestador",
+        "Valor orçado",
+        "Valor aprovado",
+        "Observações",
+    ]
+
+    status_labels = dict(OrdemExterna.STATUS_CHOICES)
+    prio_labels = dict(OrdemExterna.PRIORIDADE_CHOICES)
+    colunas = (
+        "id", "loja__nome", "prestador__nome", "equipamento", "numero_serie",
+        "status", "prioridade", "data_envio", "data_previsao_retorno", "data_retorno",
+        "numero_os_prestador", "valor_orcado", "valor_aprovado", "observacoes",
+    )
+    for (o_id, loja, prestador, equipamento, numero_serie, status, prioridade,
+         envio, previsao, retorno, numero_os, orcado, aprovado, observacoes) in iterar_linhas(ordens, *colunas):
+        yield [
+            o_id,
+            loja or "",
+            prestador or "",
+            equipamento,
+            numero_serie or "",
+            status_labels.get(status, status),
+            prio_labels.get(prioridade, prioridade),
+            formatar_data_hora(envio, "%d/%m/%Y"),
+            formatar_data_hora(previsao, "%d/%m/%Y"),
+            formatar_data_hora(retorno, "%d/%m/%Y"),
+            numero_os or "",
+            orcado or "",
+            aprovado or "",
+            (observacoes or "").replace("\n", " ").replace("\r", " "),
+        ]
+
+
 @login_required
 def ordem_externa_nova(request):
     if request.method == "POST":
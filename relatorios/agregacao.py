@@ -0,0 +1,103 @@
+from django.db import connections
+from django.db.models import F
+
+from ordens.models import OrdemServico
+from .resumo import mttr_horas, resumo_os
+
+
+# Todos os totais do relatório de OS numa única consulta ao resumo diário:
+# total, MTTR, distribuição por status e por prioridade e OS em aberto por
+# loja. No PostgreSQL sai de um GROUP BY GROUPING SETS; nos demais bancos,
+# de um UNION ALL dos mesmos agrupamentos sobre a mesma CTE (um round-trip).
+
+STATUS_ABERTOS = ("ABERTA", "EM_ANALISE", "EM_EXECUCAO")
+
+_AGREGADOS = (
+    "SUM(qtd), "
+    "SUM(CASE WHEN status IN ({abertos}) THEN qtd ELSE 0 END), "
+    "SUM(CASE WHEN status = 'FINALIZADA' THEN segundos_resolucao ELSE 0 END), "
+    "SUM(CASE WHEN status = 'FINALIZADA' THEN qtd_fechadas ELSE 0 END)"
+).format(abertos=", ".join(f"'{s}'" for s in STATUS_ABERTOS))
+
+# nível, colunas agrupadas (as demais vão como NULL)
+_AGRUPAMENTOS = (
+    ("status", ("status",)),
+    ("prioridade", ("prioridade",)),
+    ("loja", ("loja_id", "loja_nome")),
+    ("total", ()),
+)
+_COLUNAS = ("status", "prioridade", "loja_id", "loja_nome")
+
+
+def _sql_grouping_sets(base: str) -> str:
+    nivel = " ".join(
+        f"WHEN GROUPING({colunas[0]}) = 0 THEN '{nome}'" for nome, colunas in _AGRUPAMENTOS if colunas
+    )
+    conjuntos = ", ".join(f"({', '.join(colunas)})" for _, colunas in _AGRUPAMENTOS)
+    return (
+        f"WITH base AS ({base}) "
+        f"SELECT CASE {nivel} ELSE 'total' END, {', '.join(_COLUNAS)}, {_AGREGADOS} "
+        f"FROM base GROUP BY GROUPING SETS ({conjuntos})"
+    )
+
+
+def _sql_union_all(base: str) -> str:
+    partes = []
+    for nome, colunas in _AGRUPAMENTOS:
+        selecionadas = ", ".join(c if c in colunas else f"NULL AS {c}" for c in _COLUNAS)
+        agrupamento = f" GROUP BY {', '.join(colunas)}" if colunas else ""
+        partes.append(f"SELECT '{nome}', {selecionadas}, {_AGREGADOS} FROM base{agrupamento}")
+    return f"WITH base AS ({base}) " + " UNION ALL ".join(partes)
+
+
+def _linhas(params):
+    base = (
+        resumo_os(params)
+        .annotate(loja_nome=F("loja__nome"))
+        .values("status", "prioridade", "loja_id", "loja_nome", "qtd", "segundos_resolucao", "qtd_fechadas")
+        .order_by()
+    )
+    sql_base, parametros = base.query.sql_with_params()
+    connection = connections[base.db]
+
+    if connection.vendor == "postgresql":
+        sql = _sql_grouping_sets(sql_base)
+    else:
+        sql = _sql_union_all(sql_base)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, parametros)
+        return cursor.fetchall()
+
+
+# {"total", "mttr_horas", "status": [...], "prioridade": [...], "lojas_abertas": [...]}
+# Status e prioridade vêm na ordem dos choices, com código, rótulo e quantidade
+# (só os que têm OS); lojas_abertas traz as 5 lojas com mais OS em aberto.
+def agregar_os(params=None) -> dict:
+    por_status, por_prioridade, lojas = {}, {}, []
+    total, segundos, fechadas = 0, 0, 0
+
+    for nivel, status, prioridade, loja_id, loja_nome, qtd, abertas, seg, fech in _linhas(params):
+        if nivel == "status":
+            por_status[status] = qtd
+        elif nivel == "prioridade":
+            por_prioridade[prioridade] = qtd
+        elif nivel == "loja":
+            if abertas:
+                lojas.append({"loja_id": loja_id, "nome": loja_nome or "", "qtd": int(abertas)})
+        else:
+            total, segundos, fechadas = qtd or 0, seg or 0, fech or 0
+
+    return {
+        "total": int(total),
+        "mttr_horas": mttr_horas(int(segundos), int(fechadas)),
+        "status": [
+            {"codigo": codigo, "rotulo": rotulo, "qtd": int(por_status[codigo])}
+            for codigo, rotulo in OrdemServico.STATUS_CHOICES if por_status.get(codigo)
+        ],
+        "prioridade": [
+            {"codigo": codigo, "rotulo": rotulo, "qtd": int(por_prioridade[codigo])}
+            for codigo, rotulo in OrdemServico.PRIORIDADE_CHOICES if por_prioridade.get(codigo)
+        ],
+        "lojas_abertas": sorted(lojas, key=lambda l: (-l["qtd"], l["nome"]))[:5],
+    }
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class RelatoriosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'relatorios'
+
+    def ready(self):
+        from . import signals  # noqa
@@ -0,0 +1,302 @@
+from django.db.models import Sum
+from django.utils import timezone
+
+from core.exportacao import formatar_data_hora, iterar_linhas
+from core.filtros import DataFinal, DataInicial, Exato, Filtros, Id
+from core.pdf import DocumentoPDF
+from estoque.models import Loja
+from ordens.models import OrdemServico
+from viagens.models import Viagem
+from .agregacao import agregar_os
+from .resumo import mttr_horas, resumo_os
+from .sla import linhas_sla_csv
+
+
+# Filtros da tela de OS (relatório, CSV, PDF)
+FILTROS_OS = Filtros(
+    status=Exato("status", OrdemServico.STATUS_CHOICES),
+    loja=Id("loja_id"),
+    dt_ini=DataInicial("data_abertura"),
+    dt_fim=DataFinal("data_abertura"),
+)
+
+# Relatório de problemas: sem filtro de status
+FILTROS_PROBLEMAS = Filtros(
+    loja=Id("loja_id"),
+    dt_ini=DataInicial("data_abertura"),
+    dt_fim=DataFinal("data_abertura"),
+)
+
+FILTROS_VIAGENS = Filtros(
+    origem=Id("origem_id"),
+    destino=Id("destino_id"),
+    responsavel=Id("responsavel_id"),
+    status=Exato("status", Viagem.STATUS),
+    dt_ini=DataInicial("data_partida"),
+    dt_fim=DataFinal("data_partida"),
+)
+
+
+# Aplica filtros da tela (OS). "params" é o request.GET ou um dict equivalente
+def filtrar_os(params, qs):
+    return FILTROS_OS.aplicar(qs, params)
+
+
+# Aplica filtros da tela VIAGENS. Filtros: origem, destino, responsavel, status, dt_ini, dt_fim
+def filtrar_viagens(params, qs):
+    return FILTROS_VIAGENS.aplicar(qs, params)
+
+
+# Nome dinâmico do arquivo do relatório de OS (CSV ou PDF)
+def nome_arquivo_os(params, extensao="csv") -> str:
+    filtros = FILTROS_OS.ler(params)
+    loja_id = filtros.get("loja", "")
+    status = filtros.get("status", "")
+    dt_ini = filtros.get("dt_ini", "")
+    dt_fim = filtros.get("dt_fim", "")
+
+    partes_nome = ["relatorio_os"]
+    if loja_id:
+        try:
+            loja_nome = Loja.objects.get(pk=loja_id).nome
+            partes_nome.append(loja_nome.replace(" ", "_"))
+        except Loja.DoesNotExist:
+            partes_nome.append(f"loja_{loja_id}")
+    if status:
+        partes_nome.append(status.lower())
+    if dt_ini and dt_fim:
+        partes_nome.append(f"{dt_ini}_a_{dt_fim}")
+    elif dt_ini:
+        partes_nome.append(f"desde_{dt_ini}")
+    elif dt_fim:
+        partes_nome.append(f"ate_{dt_fim}")
+
+    return "_".join(partes_nome).replace("__", "_").lower() + f".{extensao}"
+
+
+# Colunas do detalhe de OS (values_list) usadas pelos relatórios
+_COLUNAS_OS = (
+    "id", "loja__nome", "solicitante__username", "tecnico_responsavel__username",
+    "status", "prioridade", "data_abertura", "data_fechamento", "categoria__nome",
+)
+
+
+def _linhas_detalhe_os(qs, com_custo: bool):
+    status_labels = dict(OrdemServico.STATUS_CHOICES)
+    prio_labels = dict(OrdemServico.PRIORIDADE_CHOICES)
+    colunas = _COLUNAS_OS + (("custo_total",) if com_custo else ())
+
+    for row in iterar_linhas(qs.order_by("id"), *colunas):
+        (os_id, loja, solicitante, tecnico, status, prioridade,
+         abertura, fechamento, categoria, *resto) = row
+        linha = [
+            os_id,
+            loja or "",
+            solicitante or "",
+            tecnico or "",
+            status_labels.get(status, status),
+            prio_labels.get(prioridade, prioridade),
+            formatar_data_hora(abertura),
+            formatar_data_hora(fechamento),
+            categoria or "",
+        ]
+        if com_custo:
+            custo = resto[0]
+            linha.append(f"{custo:.2f}" if custo is not None else "")
+        yield linha
+
+
+# Filtros da tela de OS como pares (rótulo, valor) para o cabeçalho dos relatórios
+def filtros_aplicados_os(params) -> list:
+    filtros = FILTROS_OS.ler(params)
+    loja_id = filtros.get("loja", "")
+    status = filtros.get("status", "")
+    dt_ini = filtros.get("dt_ini", "")
+    dt_fim = filtros.get("dt_fim", "")
+
+    aplicados = []
+    if loja_id:
+        loja_nome = Loja.objects.filter(pk=loja_id).values_list("nome", flat=True).first()
+        aplicados.append(["Loja", loja_nome or loja_id])
+    if status:
+        aplicados.append(["Status", dict(OrdemServico.STATUS_CHOICES).get(status, status)])
+    if dt_ini:
+        aplicados.append(["Data inicial", dt_ini])
+    if dt_fim:
+        aplicados.append(["Data final", dt_fim])
+    return aplicados
+
+
+# Totais e distribuições do relatório de OS como linhas [rótulo, quantidade]
+def resumo_rel_os(params) -> dict:
+    agregado = agregar_os(params)
+    return {
+        "total": agregado["total"],
+        "mttr_horas": agregado["mttr_horas"],
+        "dist_status": [[d["rotulo"], d["qtd"]] for d in agregado["status"]],
+        "dist_prioridade": [[d["rotulo"], d["qtd"]] for d in agregado["prioridade"]],
+        "lojas_abertas": [[d["nome"], d["qtd"]] for d in agregado["lojas_abertas"]],
+    }
+
+
+# Relatório de OS: cabeçalho, filtros, resumo, distribuições e detalhe
+def linhas_rel_os(params):
+    qs = filtrar_os(params, OrdemServico.objects.all())
+
+    yield ["RELATÓRIO DE ORDENS DE SERVIÇO"]
+    yield ["Gerado em", timezone.now().strftime("%Y-%m-%d %H:%M")]
+
+    filtros = filtros_aplicados_os(params)
+    if filtros:
+        yield []
+        yield ["FILTROS APLICADOS"]
+        yield from filtros
+    yield []
+
+    resumo = resumo_rel_os(params)
+    yield ["RESUMO"]
+    yield ["Total de OS", resumo["total"]]
+    yield ["MTTR médio (horas)", resumo["mttr_horas"] if resumo["mttr_horas"] is not None else "—"]
+    yield []
+
+    # Distribuições
+    yield ["DISTRIBUIÇÃO POR STATUS"]
+    yield ["Status", "Quantidade"]
+    yield from resumo["dist_status"]
+    yield []
+
+    yield ["DISTRIBUIÇÃO POR PRIORIDADE"]
+    yield ["Prioridade", "Quantidade"]
+    yield from resumo["dist_prioridade"]
+    yield []
+
+    yield ["LOJAS COM MAIS OS EM ABERTO"]
+    yield ["Loja", "Quantidade"]
+    yield from resumo["lojas_abertas"]
+    yield []
+
+    yield from linhas_sla_csv(qs)
+
+    # Detalhe linha a linha
+    yield ["DETALHES OS"]
+    yield [
+        "ID", "Loja", "Solicitante", "Técnico Responsável",
+        "Status", "Prioridade", "Data Abertura", "Data Fechamento",
+        "Categoria", "Custo Total (R$)"
+    ]
+    yield from _linhas_detalhe_os(qs, com_custo=True)
+
+
+# Mesmo relatório de OS em PDF, entregue página a página.
+# "acompanhar" envolve as linhas do detalhe (progresso do worker).
+_COLUNAS_PDF_OS = [
+    ("ID", 40), ("Loja", 100), ("Solicitante", 90), ("Técnico", 90), ("Status", 70),
+    ("Prioridade", 60), ("Abertura", 80), ("Fechamento", 80), ("Categoria", 100), ("Custo (R$)", 60),
+]
+
+
+def pdf_rel_os(params, acompanhar=None):
+    qs = filtrar_os(params, OrdemServico.objects.all())
+    doc = DocumentoPDF("Relatório de Ordens de Serviço")
+
+    doc.paragrafo("Relatório de Ordens de Serviço", tamanho=16, negrito=True, espaco_depois=2)
+    doc.paragrafo(f"Gerado em {timezone.now().strftime('%Y-%m-%d %H:%M')}", tamanho=8, espaco_depois=8)
+    filtros = filtros_aplicados_os(params)
+    if filtros:
+        doc.paragrafo("Filtros aplicados", negrito=True)
+        for rotulo, valor in filtros:
+            doc.paragrafo(f"{rotulo}: {valor}", tamanho=8, espaco_depois=0)
+        doc.espaco(8)
+
+    resumo = resumo_rel_os(params)
+    doc.paragrafo("Resumo", tamanho=11, negrito=True)
+    doc.paragrafo(f"Total de OS: {resumo['total']}", espaco_depois=0)
+    mttr = resumo["mttr_horas"]
+    doc.paragrafo(f"MTTR médio (horas): {mttr if mttr is not None else '—'}", espaco_depois=10)
+
+    for titulo, rotulo, chave in (
+        ("Distribuição por status", "Status", "dist_status"),
+        ("Distribuição por prioridade", "Prioridade", "dist_prioridade"),
+        ("Lojas com mais OS em aberto", "Loja", "lojas_abertas"),
+    ):
+        doc.paragrafo(titulo, tamanho=11, negrito=True)
+        yield from doc.tabela([(rotulo, 200), ("Quantidade", 80)], resumo[chave])
+        doc.espaco(6)
+    yield from doc.descarregar()
+
+    doc.quebrar_pagina()
+    doc.paragrafo("Detalhes das OS", tamanho=11, negrito=True)
+    linhas = _linhas_detalhe_os(qs, com_custo=True)
+    yield from doc.tabela(_COLUNAS_PDF_OS, acompanhar(linhas) if acompanhar else linhas)
+    yield from doc.finalizar()
+
+
+# Relatório de problemas (sem filtros): top categorias, MTTR por categoria e detalhe
+def linhas_rel_problemas(params=None):
+    resumo = resumo_os()
+
+    yield ["RELATORIO DE PROBLEMAS"]
+    yield ["Gerado em", timezone.now().strftime("%Y-%m-%d %H:%M")]
+    yield ["Total de OS consideradas", resumo.aggregate(total=Sum("qtd"))["total"] or 0]
+    yield []
+
+    yield ["TOP CATEGORIAS (Por quantidade)"]
+    yield ["Categoria", "Quantidade"]
+    dist_cat = (
+        resumo.filter(categoria__isnull=False)
+              .values("categoria__nome")
+              .annotate(qtd=Sum("qtd"))
+              .order_by("-qtd")[:15]
+    )
+    for d in dist_cat:
+        yield [d["categoria__nome"], d["qtd"]]
+    yield []
+
+    yield ["MTTR POR CATEGORIA (Em horas, apenas para OS finalizadas)"]
+    yield ["Categoria", "MTTR (h)"]
+    mttr_cat = (
+        resumo.filter(status="FINALIZADA", categoria__isnull=False, qtd_fechadas__gt=0)
+              .values("categoria__nome")
+              .annotate(segundos=Sum("segundos_resolucao"), fechadas=Sum("qtd_fechadas"))
+              .order_by("categoria__nome")
+    )
+    for d in mttr_cat:
+        yield [d["categoria__nome"], mttr_horas(d["segundos"], d["fechadas"]) or 0.0]
+    yield []
+
+    yield from linhas_sla_csv()
+
+    yield ["DETALHES OS"]
+    yield [
+        "ID", "Loja", "Solicitante", "Técnico Responsável",
+        "Status", "Prioridade", "Data Abertura", "Data Fechamento",
+        "Categoria"
+    ]
+    yield from _linhas_detalhe_os(OrdemServico.objects.all(), com_custo=False)
+
+
+# Viagens filtradas (tabela da tela de relatório)
+def linhas_viagens(params):
+    qs = filtrar_viagens(params, Viagem.objects.order_by("-data_partida"))
+
+    yield [
+        "ID",
+        "Origem",
+        "Destino",
+        "Responsável",
+        "Status",
+        "Data partida",
+        "Data retorno",
+    ]
+    colunas = ("id", "origem__nome", "destino__nome", "responsavel__username",
+               "status", "data_partida", "data_retorno")
+    for v_id, origem, destino, responsavel, status, partida, retorno in iterar_linhas(qs, *colunas):
+        yield [
+            v_id,
+            origem or "",
+            destino or "",
+            responsavel or "",
+            status,
+            formatar_data_hora(partida),
+            formatar_data_hora(retorno),
+        ]
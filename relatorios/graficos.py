@@ -0,0 +1,111 @@
+import hashlib
+import json
+
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+
+from core.versoes import em_cache
+from ordens.models import OrdemServico
+from viagens.models import Viagem
+from core.filtros import Filtros
+from .agregacao import agregar_os
+from .exportacao import FILTROS_OS, FILTROS_PROBLEMAS
+from .resumo import mttr_horas, resumo_os
+from .sla import rotulos_faixas, sla_por_dimensao
+
+
+# Agregados das telas de relatório (gráficos e totais), guardados por
+# combinação de filtros validada (core.filtros): quem abre "este mês, todas as lojas"
+# depois de outro admin recebe o resultado pronto. As versões ("os",
+# "viagens", ...) mudam nos signals, então o cache cai assim que os dados
+# mudam; o TTL só cobre nomes de usuário, que não têm versão.
+TTL_RELATORIO = 600
+
+
+# Estrutura completa de agregar_os (também servida pela API)
+def _graficos_os(filtros):
+    return agregar_os(filtros)
+
+
+def _graficos_problemas(filtros):
+    resumo = resumo_os(filtros)
+
+    # Distribuição por categoria
+    dist_cat = (
+        resumo.filter(categoria__isnull=False)
+              .values("categoria__nome")
+              .annotate(total=Sum("qtd"))
+              .order_by("-total")[:10]
+    )
+
+    # MTTR por categoria, apenas OS finalizadas
+    mttr_qs = (
+        resumo.filter(status="FINALIZADA", categoria__isnull=False, qtd_fechadas__gt=0)
+              .values("categoria__nome")
+              .annotate(segundos=Sum("segundos_resolucao"), fechadas=Sum("qtd_fechadas"))
+              .order_by("categoria__nome")
+    )
+    return {
+        "cat_labels": [d["categoria__nome"] for d in dist_cat],
+        "cat_values": [d["total"] for d in dist_cat],
+        "mttr_labels": [d["categoria__nome"] for d in mttr_qs],
+        "mttr_values": [mttr_horas(d["segundos"], d["fechadas"]) or 0.0 for d in mttr_qs],
+        # Percentis e histograma do tempo de resolução, direto das OS
+        "sla": sla_por_dimensao(FILTROS_PROBLEMAS.aplicar(OrdemServico.objects.all(), filtros)),
+        "sla_faixas": rotulos_faixas(),
+    }
+
+
+# Visão geral de viagens: não depende dos filtros da tela
+def _visao_geral_viagens(filtros):
+    qs = Viagem.objects.all()
+    return {
+        "viagens_por_loja": list(
+            qs.values(nome=F("destino__nome"))
+              .annotate(qtd=Count("id"))
+              .order_by("-qtd")
+        ),
+        "viagens_por_mes": list(
+            qs.annotate(mes=TruncMonth("data_partida"))
+              .values("mes")
+              .annotate(qtd=Count("id"))
+              .order_by("mes")
+        ),
+        "total_viagens": qs.count(),
+        "dist_status": list(
+            qs.values("status")
+              .annotate(qtd=Count("id"))
+              .order_by("-qtd")
+        ),
+        "top_responsaveis": list(
+            qs.values(nome=F("responsavel__username"))
+              .annotate(qtd=Count("id"))
+              .order_by("-qtd")[:5]
+        ),
+        "responsaveis": list(
+            qs.values("responsavel_id", "responsavel__username")
+              .distinct()
+              .order_by("responsavel__username")
+        ),
+        "status_distintos": list(
+            qs.values_list("status", flat=True)
+              .distinct()
+              .order_by()
+        ),
+    }
+
+
+# nome: (filtros que mudam o resultado, versões usadas, função de cálculo)
+RELATORIOS = {
+    "os": (FILTROS_OS, ("os", "lojas"), _graficos_os),
+    "problemas": (FILTROS_PROBLEMAS, ("os", "lojas", "categorias"), _graficos_problemas),
+    "viagens": (Filtros(), ("viagens", "lojas"), _visao_geral_viagens),
+}
+
+
+def graficos(nome: str, params) -> dict:
+    especificacao, assuntos, calcular = RELATORIOS[nome]
+    filtros = especificacao.ler(params)
+    # hash para manter a chave curta qualquer que seja o valor dos filtros
+    assinatura = hashlib.sha1(json.dumps(filtros).encode()).hexdigest()
+    return em_cache(f"relatorio:{nome}:{assinatura}", assuntos, lambda: calcular(filtros), TTL_RELATORIO)
@@ -0,0 +1,245 @@
+import hashlib
+import logging
+from datetime import timedelta
+from typing import Callable, NamedTuple
+
+from django.contrib import messages
+from django.db import IntegrityError, transaction
+from django.shortcuts import redirect
+from django.utils import timezone
+
+from core.exportacao import gerar_csv, resposta_csv
+from core.filtros import Filtros
+from core.pdf import resposta_pdf
+from core.versoes import versoes
+from estoque.exportacao import FILTROS_PRODUTOS, filtrar_produtos, linhas_estoque, nome_arquivo_estoque
+from ordens.models import OrdemServico
+from viagens.models import Viagem
+from .exportacao import (
+    FILTROS_OS,
+    FILTROS_VIAGENS,
+    filtrar_os,
+    filtrar_viagens,
+    linhas_rel_os,
+    linhas_rel_problemas,
+    linhas_viagens,
+    nome_arquivo_os,
+    pdf_rel_os,
+)
+from .models import ExportacaoJob, ParteExportacao
+
+
+logger = logging.getLogger(__name__)
+
+# Acima deste número de linhas a exportação vai para a fila
+LIMITE_SINCRONO = 20000
+
+# PDF custa bem mais por linha (layout + compressão por página): ~50 páginas
+LIMITE_SINCRONO_PDF = 2000
+
+# A cada quantas linhas o worker grava o progresso
+INTERVALO_PROGRESSO = 5000
+
+# Job em "PROCESSANDO" há mais tempo que isso é considerado abandonado
+TEMPO_MAXIMO_JOB = timedelta(minutes=30)
+
+# Arquivos gerados ficam disponíveis por este período
+RETENCAO = timedelta(days=7)
+
+# Tamanho de cada ParteExportacao gravada pelo worker
+TAMANHO_PARTE = 1024 * 1024
+
+
+class TipoExportacao(NamedTuple):
+    filtros: Filtros                # parâmetros do GET que influenciam o arquivo
+    consulta: Callable              # params -> queryset do detalhe (para estimar o tamanho)
+    gerar: Callable                 # params -> linhas do CSV ou blocos do PDF
+    nome_arquivo: Callable          # params -> nome do arquivo
+    assuntos: tuple                 # versões (core.versoes) dos dados usados
+    delimiter: str = ","
+    formato: str = "csv"            # "csv" ou "pdf"
+    limite: int = LIMITE_SINCRONO   # acima disso vai para a fila
+
+
+EXPORTACOES = {
+    "os": TipoExportacao(
+        filtros=FILTROS_OS,
+        consulta=lambda p: filtrar_os(p, OrdemServico.objects.all()),
+        gerar=linhas_rel_os,
+        nome_arquivo=nome_arquivo_os,
+        assuntos=("os", "lojas", "categorias"),
+    ),
+    "os_pdf": TipoExportacao(
+        filtros=FILTROS_OS,
+        consulta=lambda p: filtrar_os(p, OrdemServico.objects.all()),
+        gerar=pdf_rel_os,
+        nome_arquivo=lambda p: nome_arquivo_os(p, extensao="pdf"),
+        assuntos=("os", "lojas", "categorias"),
+        formato="pdf",
+        limite=LIMITE_SINCRONO_PDF,
+    ),
+    "problemas": TipoExportacao(
+        filtros=Filtros(),
+        consulta=lambda p: OrdemServico.objects.all(),
+        gerar=linhas_rel_problemas,
+        nome_arquivo=lambda p: "relatorio_problemas_completo.csv",
+        assuntos=("os", "lojas", "categorias"),
+    ),
+    "viagens": TipoExportacao(
+        filtros=FILTROS_VIAGENS,
+        consulta=lambda p: filtrar_viagens(p, Viagem.objects.all()),
+        gerar=linhas_viagens,
+        nome_arquivo=lambda p: "relatorio_viagens.csv",
+        assuntos=("viagens", "lojas"),
+        delimiter=";",
+    ),
+    "estoque": TipoExportacao(
+        filtros=FILTROS_PRODUTOS,
+        consulta=filtrar_produtos,
+        gerar=linhas_estoque,
+        nome_arquivo=nome_arquivo_estoque,
+        assuntos=("estoque",),
+    ),
+}
+
+
+def normalizar_parametros(tipo: str, params) -> dict:
+    return EXPORTACOES[tipo].filtros.ler(params)
+
+
+def chave_exportacao(tipo: str, params: dict) -> str:
+    partes = [tipo, *(f"{k}={v}" for k, v in sorted(params.items()))]
+    partes += [str(v) for v in versoes(*EXPORTACOES[tipo].assuntos)]
+    return hashlib.sha1("|".join(partes).encode()).hexdigest()
+
+
+# Devolve o job que atende o pedido: um igual já na fila/pronto, ou um novo
+def enfileirar(tipo: str, params: dict, user, total_linhas=None) -> tuple[ExportacaoJob, bool]:
+    chave = chave_exportacao(tipo, params)
+    existente = ExportacaoJob.objects.filter(chave=chave).exclude(status="ERRO").first()
+    if existente:
+        return existente, False
+    try:
+        with transaction.atomic():
+            job = ExportacaoJob.objects.create(
+                tipo=tipo,
+                parametros=params,
+                chave=chave,
+                solicitante=user,
+                nome_arquivo=EXPORTACOES[tipo].nome_arquivo(params),
+                total_linhas=total_linhas,
+            )
+        return job, True
+    except IntegrityError:
+        # Outro admin pediu a mesma exportação ao mesmo tempo
+        return ExportacaoJob.objects.filter(chave=chave).exclude(status="ERRO").get(), False
+
+
+# Exportações pequenas saem direto em streaming; as grandes (ou com
+# ?segundo_plano=1) vão para a fila e o admin baixa depois em "Exportações"
+def exportar(request, tipo: str):
+    exp = EXPORTACOES[tipo]
+    params = normalizar_parametros(tipo, request.GET)
+    total = exp.consulta(params).count()
+
+    if total <= exp.limite and not request.GET.get("segundo_plano"):
+        if exp.formato == "pdf":
+            return resposta_pdf(exp.gerar(params), exp.nome_arquivo(params))
+        return resposta_csv(exp.gerar(params), exp.nome_arquivo(params), delimiter=exp.delimiter)
+
+    job, novo = enfileirar(tipo, params, request.user, total_linhas=total)
+    if job.status == "CONCLUIDA":
+        messages.info(request, f"Este relatório já foi gerado: {job.nome_arquivo}.")
+    elif novo:
+        messages.info(request, f"Relatório com {total} linhas enviado para geração em segundo plano.")
+    else:
+        messages.info(request, "Este relatório já está sendo gerado.")
+    return redirect("relatorios:exportacoes")
+
+
+# Worker
+
+def reivindicar(limite: int) -> list[int]:
+    # update condicional: dois workers nunca pegam o mesmo job
+    candidatos = (
+        ExportacaoJob.objects.filter(status="PENDENTE")
+        .order_by("criado_em")
+        .values_list("pk", flat=True)[:limite]
+    )
+    agora = timezone.now()
+    return [
+        pk for pk in candidatos
+        if ExportacaoJob.objects.filter(pk=pk, status="PENDENTE").update(status="PROCESSANDO", iniciado_em=agora)
+    ]
+
+
+def recuperar_abandonados() -> int:
+    limite = timezone.now() - TEMPO_MAXIMO_JOB
+    return ExportacaoJob.objects.filter(status="PROCESSANDO", iniciado_em__lt=limite).update(
+        status="PENDENTE", iniciado_em=None, linhas_processadas=0,
+    )
+
+
+def limpar_antigos() -> int:
+    # As partes do arquivo saem junto (CASCADE)
+    _, excluidos = ExportacaoJob.objects.filter(criado_em__lt=timezone.now() - RETENCAO).delete()
+    return excluidos.get(ExportacaoJob._meta.label, 0)
+
+
+def marcar_erro(job_id: int, mensagem: str) -> None:
+    ExportacaoJob.objects.filter(pk=job_id).update(
+        status="ERRO", erro=mensagem[:1000], concluido_em=timezone.now(),
+    )
+
+
+def _com_progresso(job_id: int, linhas):
+    processadas = 0
+    for linha in linhas:
+        yield linha
+        processadas += 1
+        if processadas % INTERVALO_PROGRESSO == 0:
+            ExportacaoJob.objects.filter(pk=job_id).update(linhas_processadas=processadas)
+    ExportacaoJob.objects.filter(pk=job_id).update(linhas_processadas=processadas)
+
+
+# Grava os blocos (bytes) em partes de TAMANHO_PARTE; arquivo vazio vira
+# uma parte vazia
+def _gravar_partes(job_id: int, blocos) -> None:
+    buffer = bytearray()
+    ordem = 0
+    for bloco in blocos:
+        buffer += bloco
+        while len(buffer) >= TAMANHO_PARTE:
+            ParteExportacao.objects.create(job_id=job_id, ordem=ordem, dados=bytes(buffer[:TAMANHO_PARTE]))
+            del buffer[:TAMANHO_PARTE]
+            ordem += 1
+    if buffer or not ordem:
+        ParteExportacao.objects.create(job_id=job_id, ordem=ordem, dados=bytes(buffer))
+
+
+# Executado nos processos do pool: grava o arquivo no banco, em partes. O
+# download só é liberado com o job CONCLUIDA, então partes de um arquivo
+# incompleto nunca são servidas.
+def executar_job(job_id: int) -> str:
+    job = ExportacaoJob.objects.get(pk=job_id)
+    exp = EXPORTACOES[job.tipo]
+    # Sobras de uma execução interrompida (job devolvido à fila)
+    ParteExportacao.objects.filter(job_id=job.pk).delete()
+
+    try:
+        if exp.formato == "pdf":
+            # O PDF sai página a página; o progresso conta as linhas do detalhe
+            acompanhar = lambda linhas: _com_progresso(job.pk, linhas)
+            blocos = exp.gerar(job.parametros, acompanhar=acompanhar)
+        else:
+            linhas = _com_progresso(job.pk, exp.gerar(job.parametros))
+            blocos = (bloco.encode("utf-8") for bloco in gerar_csv(linhas, delimiter=exp.delimiter))
+        _gravar_partes(job.pk, blocos)
+    except Exception as e:
+        logger.exception("Falha na exportação %s", job.pk)
+        ParteExportacao.objects.filter(job_id=job.pk).delete()
+        marcar_erro(job.pk, str(e))
+        return "ERRO"
+
+    ExportacaoJob.objects.filter(pk=job.pk).update(status="CONCLUIDA", concluido_em=timezone.now())
+    return "CONCLUIDA"
@@ -0,0 +1,61 @@
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from relatorios.jobs import executar_job, limpar_antigos, marcar_erro, recuperar_abandonados, reivindicar
+
+
+INTERVALO_FILA = 2          # segundos entre consultas à fila vazia
+INTERVALO_LIMPEZA = 3600    # segundos entre limpezas de arquivos expirados
+
+
+class Command(BaseCommand):
+    help = "Worker das exportações em segundo plano: gera os arquivos da fila usando um pool de processos"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processos", type=int, default=2, help="Exportações simultâneas")
+        parser.add_argument("--uma-vez", action="store_true", help="Processa a fila atual e encerra")
+
+    def handle(self, *args, **opts):
+        processos = max(1, opts["processos"])
+        recuperados = recuperar_abandonados()
+        if recuperados:
+            self.stdout.write(f"{recuperados} job(s) abandonado(s) voltaram para a fila")
+        limpar_antigos()
+        ultima_limpeza = time.monotonic()
+
+        # "spawn": cada processo abre as próprias conexões com o banco
+        contexto = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=processos, mp_context=contexto, initializer=django.setup) as pool:
+            em_andamento = {}
+            while True:
+                close_old_connections()
+                for job_id in reivindicar(processos - len(em_andamento)):
+                    em_andamento[pool.submit(executar_job, job_id)] = job_id
+                    self.stdout.write(f"Exportação #{job_id} iniciada")
+
+                if not em_andamento:
+                    if opts["uma_vez"]:
+                        break
+                    if time.monotonic() - ultima_limpeza > INTERVALO_LIMPEZA:
+                        limpar_antigos()
+                        ultima_limpeza = time.monotonic()
+                    time.sleep(INTERVALO_FILA)
+                    continue
+
+                prontos, _ = wait(em_andamento, timeout=INTERVALO_FILA, return_when=FIRST_COMPLETED)
+                for futuro in prontos:
+                    job_id = em_andamento.pop(futuro)
+                    try:
+                        status = futuro.result()
+                    except BrokenProcessPool as e:
+                        # Processo do pool morreu (ex.: falta de memória): o job
+                        # fica com erro e o worker encerra para ser reiniciado
+                        marcar_erro(job_id, str(e))
+                        raise CommandError(f"Pool de processos interrompido na exportação #{job_id}.")
+                    self.stdout.write(f"Exportação #{job_id}: {status}")
@@ -0,0 +1,25 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ordens.models import OrdemServico
+from relatorios.models import ResumoDiarioOS
+from relatorios.resumo import reconstruir
+
+
+class Command(BaseCommand):
+    help = "Recalcula o resumo diário de OS (backfill ou reparo), opcionalmente só num intervalo de dias"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--desde", help="Primeiro dia (AAAA-MM-DD)")
+        parser.add_argument("--ate", help="Último dia (AAAA-MM-DD)")
+
+    def handle(self, *args, **opts):
+        try:
+            desde = date.fromisoformat(opts["desde"]) if opts["desde"] else None
+            ate = date.fromisoformat(opts["ate"]) if opts["ate"] else None
+        except ValueError:
+            raise CommandError("Datas devem estar no formato AAAA-MM-DD.")
+
+        linhas = reconstruir(OrdemServico, ResumoDiarioOS, desde=desde, ate=ate)
+        self.stdout.write(self.style.SUCCESS(f"Resumo diário recalculado ({linhas} linhas)"))
@@ -0,0 +1,81 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncDate
+
+
+# Backfill do resumo com as OS existentes. Mesma agregação de
+# relatorios.resumo.reconstruir, copiada aqui para a migração não depender
+# do código atual do app (só models históricos).
+def preencher_resumo(apps, schema_editor):
+    OrdemServico = apps.get_model("ordens", "OrdemServico")
+    ResumoDiarioOS = apps.get_model("relatorios", "ResumoDiarioOS")
+
+    duracao = ExpressionWrapper(F("data_fechamento") - F("data_abertura"), output_field=DurationField())
+    grupos = (
+        OrdemServico.objects.annotate(dia=TruncDate("data_abertura"))
+        .values("dia", "loja_id", "categoria_id", "status", "prioridade")
+        .annotate(
+            qtd=Count("id"),
+            qtd_fechadas=Count("data_fechamento"),
+            duracao=Sum(duracao),
+            qtd_com_custo=Count("custo_total"),
+            soma_custo=Sum("custo_total"),
+        )
+        .order_by()
+    )
+    ResumoDiarioOS.objects.bulk_create(
+        (
+            ResumoDiarioOS(
+                dia=g["dia"],
+                loja_id=g["loja_id"],
+                categoria_id=g["categoria_id"],
+                status=g["status"],
+                prioridade=g["prioridade"],
+                qtd=g["qtd"],
+                qtd_fechadas=g["qtd_fechadas"],
+                segundos_resolucao=int(g["duracao"].total_seconds()) if g["duracao"] else 0,
+                qtd_com_custo=g["qtd_com_custo"],
+                custo_total=g["soma_custo"] or 0,
+            )
+            for g in grupos.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('estoque', '0009_movimentacao'),
+        ('ordens', '0005_ordemservico_atualizado_em_osexcluida'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumoDiarioOS',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.DateField()),
+                ('status', models.CharField(max_length=15)),
+                ('prioridade', models.CharField(max_length=10)),
+                ('qtd', models.IntegerField(default=0)),
+                ('qtd_fechadas', models.IntegerField(default=0)),
+                ('segundos_resolucao', models.BigIntegerField(default=0)),
+                ('qtd_com_custo', models.IntegerField(default=0)),
+                ('custo_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('categoria', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='ordens.categoriaproblema')),
+                ('loja', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='estoque.loja')),
+            ],
+            options={
+                'verbose_name': 'Resumo diário de OS',
+                'verbose_name_plural': 'Resumos diários de OS',
+                'constraints': [models.UniqueConstraint(fields=('dia', 'loja', 'categoria', 'status', 'prioridade'), name='uniq_resumo_os_chave')],
+            },
+        ),
+        migrations.RunPython(preencher_resumo, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('relatorios', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportacaoJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(max_length=30)),
+                ('parametros', models.JSONField(blank=True, default=dict)),
+                ('chave', models.CharField(max_length=40)),
+                ('status', models.CharField(choices=[('PENDENTE', 'Na fila'), ('PROCESSANDO', 'Processando'), ('CONCLUIDA', 'Concluída'), ('ERRO', 'Erro')], default='PENDENTE', max_length=15)),
+                ('nome_arquivo', models.CharField(max_length=200)),
+                ('arquivo', models.FileField(blank=True, upload_to='exportacoes/')),
+                ('total_linhas', models.IntegerField(blank=True, null=True)),
+                ('linhas_processadas', models.IntegerField(default=0)),
+                ('erro', models.TextField(blank=True, default='')),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('iniciado_em', models.DateTimeField(blank=True, null=True)),
+                ('concluido_em', models.DateTimeField(blank=True, null=True)),
+                ('solicitante', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='exportacoes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Exportação',
+                'verbose_name_plural': 'Exportações',
+                'ordering': ('-criado_em',),
+                'indexes': [models.Index(fields=['status', 'criado_em'], name='relatorios__status_580b15_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status', 'ERRO'), _negated=True), fields=('chave',), name='uniq_exportacao_chave_ativa')],
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.6 on 2026-10-18 09:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Arquivos já gerados ficaram no disco do worker, fora do alcance da web:
+# os jobs passam a ERRO para que um novo pedido gere o arquivo no banco
+def descartar_arquivos_em_disco(apps, schema_editor):
+    ExportacaoJob = apps.get_model("relatorios", "ExportacaoJob")
+    ExportacaoJob.objects.filter(status="CONCLUIDA").update(
+        status="ERRO", erro="Arquivo indisponível. Solicite a exportação novamente.",
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('relatorios', '0002_exportacaojob'),
+    ]
+
+    operations = [
+        migrations.RunPython(descartar_arquivos_em_disco, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='exportacaojob',
+            name='arquivo',
+        ),
+        migrations.CreateModel(
+            name='ParteExportacao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ordem', models.PositiveIntegerField()),
+                ('dados', models.BinaryField()),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='partes', to='relatorios.exportacaojob')),
+            ],
+            options={
+                'verbose_name': 'Parte de exportação',
+                'verbose_name_plural': 'Partes de exportação',
+                'constraints': [models.UniqueConstraint(fields=('job', 'ordem'), name='uniq_parte_exportacao_ordem')],
+            },
+        ),
+    ]
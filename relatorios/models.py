@@ -1,3 +1,121 @@
 from django.db import models
+from django.conf import settings
 
-# Create your models here.
+
+# Resumo diário das OS, mantido pelos signals de OrdemServico (ver resumo.py).
+# Uma linha por combinação de dia de abertura (fuso local), loja, categoria,
+# status e prioridade; os relatórios somam estas linhas em vez de agregar
+# a tabela de OS. Linhas repetidas (possíveis com categoria nula, que o
+# unique não cobre) não afetam as somas.
+class ResumoDiarioOS(models.Model):
+    dia = models.DateField()
+    loja = models.ForeignKey("estoque.Loja", on_delete=models.CASCADE, related_name="+")
+    categoria = models.ForeignKey(
+        "ordens.CategoriaProblema",
+        on_delete=models.SET_NULL,  # acompanha o SET_NULL de OrdemServico.categoria
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    status = models.CharField(max_length=15)
+    prioridade = models.CharField(max_length=10)
+
+    qtd = models.IntegerField(default=0)
+    qtd_fechadas = models.IntegerField(default=0)        # com data_fechamento
+    segundos_resolucao = models.BigIntegerField(default=0)  # soma de fechamento - abertura
+    qtd_com_custo = models.IntegerField(default=0)
+    custo_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = "Resumo diário de OS"
+        verbose_name_plural = "Resumos diários de OS"
+        constraints = [
+            # Também serve de índice para os filtros por período (dia na frente)
+            models.UniqueConstraint(
+                fields=["dia", "loja", "categoria", "status", "prioridade"],
+                name="uniq_resumo_os_chave",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.dia} | {self.loja_id} | {self.status} | {self.qtd}"
+
+
+# Exportação gerada em segundo plano pelo comando processar_exportacoes.
+# "chave" identifica tipo + filtros + versão dos dados: pedidos iguais
+# reaproveitam o job em andamento ou o arquivo já gerado. O arquivo fica no
+# banco (ParteExportacao): worker e web rodam em containers separados, sem
+# sistema de arquivos compartilhado.
+class ExportacaoJob(models.Model):
+    STATUS_CHOICES = (
+        ("PENDENTE", "Na fila"),
+        ("PROCESSANDO", "Processando"),
+        ("CONCLUIDA", "Concluída"),
+        ("ERRO", "Erro"),
+    )
+
+    tipo = models.CharField(max_length=30)
+    parametros = models.JSONField(default=dict, blank=True)
+    chave = models.CharField(max_length=40)
+    status = models.CharField(max_length=15, choices=STATUS_CHOICES, default="PENDENTE")
+    solicitante = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="exportacoes",
+    )
+
+    nome_arquivo = models.CharField(max_length=200)
+    total_linhas = models.IntegerField(null=True, blank=True)  # estimativa feita ao enfileirar
+    linhas_processadas = models.IntegerField(default=0)
+    erro = models.TextField(blank=True, default="")
+
+    criado_em = models.DateTimeField(auto_now_add=True)
+    iniciado_em = models.DateTimeField(null=True, blank=True)
+    concluido_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Exportação"
+        verbose_name_plural = "Exportações"
+        ordering = ("-criado_em",)
+        constraints = [
+            # Um job válido por chave; jobs com erro podem ser repetidos
+            models.UniqueConstraint(
+                fields=["chave"],
+                condition=~models.Q(status="ERRO"),
+                name="uniq_exportacao_chave_ativa",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["status", "criado_em"]),
+        ]
+
+    def __str__(self):
+        return f"{self.tipo} #{self.pk} | {self.status}"
+
+    @property
+    def progresso(self):
+        if self.status == "CONCLUIDA":
+            return 100
+        if not self.total_linhas:
+            return None
+        return min(99, int(self.linhas_processadas * 100 / self.total_linhas))
+
+
+# Arquivo de uma exportação em partes de até TAMANHO_PARTE bytes (ver
+# relatorios/jobs.py): o worker grava e o download lê uma parte por vez,
+# sem ter o arquivo inteiro em memória.
+class ParteExportacao(models.Model):
+    job = models.ForeignKey(ExportacaoJob, on_delete=models.CASCADE, related_name="partes")
+    ordem = models.PositiveIntegerField()
+    dados = models.BinaryField()
+
+    class Meta:
+        verbose_name = "Parte de exportação"
+        verbose_name_plural = "Partes de exportação"
+        constraints = [
+            models.UniqueConstraint(fields=["job", "ordem"], name="uniq_parte_exportacao_ordem"),
+        ]
+
+    def __str__(self):
+        return f"{self.job_id} | {self.ordem}"
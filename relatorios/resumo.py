@@ -0,0 +1,146 @@
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from core.filtros import DataFinal, DataInicial, Exato, Filtros, Id, intervalo_dias
+from ordens.models import OrdemServico as _OrdemServico  # "OrdemServico" é parâmetro de reconstruir()
+
+
+# Campos de OrdemServico que definem a contribuição de uma OS para o resumo
+CAMPOS = ("data_abertura", "data_fechamento", "loja_id", "categoria_id", "status", "prioridade", "custo_total")
+
+
+def _contribuicao(valores):
+    chave = (
+        timezone.localdate(valores["data_abertura"]),
+        valores["loja_id"],
+        valores["categoria_id"],
+        valores["status"],
+        valores["prioridade"],
+    )
+    fechada = valores["data_fechamento"] is not None
+    segundos = 0
+    if fechada:
+        segundos = int((valores["data_fechamento"] - valores["data_abertura"]).total_seconds())
+    custo = valores["custo_total"]
+    medidas = {
+        "qtd": 1,
+        "qtd_fechadas": int(fechada),
+        "segundos_resolucao": segundos,
+        "qtd_com_custo": int(custo is not None),
+        "custo_total": Decimal(custo or 0),
+    }
+    return chave, medidas
+
+
+def _aplicar(chave, medidas, sinal):
+    from .models import ResumoDiarioOS
+
+    if not any(medidas.values()):
+        return
+    dia, loja_id, categoria_id, status, prioridade = chave
+    filtros = dict(dia=dia, loja_id=loja_id, categoria_id=categoria_id, status=status, prioridade=prioridade)
+    atualizacao = {campo: F(campo) + sinal * valor for campo, valor in medidas.items()}
+
+    # Atualiza uma única linha: com categoria nula pode haver mais de uma
+    pk = ResumoDiarioOS.objects.filter(**filtros).values_list("pk", flat=True).first()
+    if pk is not None:
+        ResumoDiarioOS.objects.filter(pk=pk).update(**atualizacao)
+        return
+    if sinal < 0:
+        return  # resumo ainda não reconstruído para este dia; nada a descontar
+    try:
+        with transaction.atomic():
+            ResumoDiarioOS.objects.create(**filtros, **medidas)
+    except IntegrityError:
+        # Outra transação criou a linha ao mesmo tempo
+        ResumoDiarioOS.objects.filter(**filtros).update(**atualizacao)
+
+
+# Move a contribuição da OS de "anterior" para "atual" (qualquer um pode ser None)
+def registrar_mudanca(anterior, atual):
+    if anterior and atual:
+        chave_ant, med_ant = _contribuicao(anterior)
+        chave_nova, med_nova = _contribuicao(atual)
+        if chave_ant == chave_nova:
+            _aplicar(chave_nova, {c: med_nova[c] - med_ant[c] for c in med_nova}, 1)
+            return
+        _aplicar(chave_ant, med_ant, -1)
+        _aplicar(chave_nova, med_nova, 1)
+    elif anterior:
+        _aplicar(*_contribuicao(anterior), -1)
+    elif atual:
+        _aplicar(*_contribuicao(atual), 1)
+
+
+# Recalcula o resumo a partir das OS (reparo, carga de dados). O backfill da
+# migração 0001 tem uma cópia própria desta agregação.
+#
+# Só save() e delete() mantêm o resumo (signals de relatorios/signals.py).
+# QuerySet.update(), bulk_create e bulk_update em OrdemServico passam por
+# fora: quem altera OS assim chama reconstruir() no período afetado depois,
+# como popular_base e o gerador de dados, ou o comando recalcular_resumo_os.
+def reconstruir(OrdemServico, ResumoDiarioOS, desde=None, ate=None) -> int:
+    ordens = OrdemServico.objects.filter(intervalo_dias("data_abertura", desde, ate))
+    resumos = ResumoDiarioOS.objects.filter(intervalo_dias("dia", desde, ate, com_hora=False))
+
+    duracao = ExpressionWrapper(F("data_fechamento") - F("data_abertura"), output_field=DurationField())
+    grupos = (
+        ordens.annotate(dia=TruncDate("data_abertura"))
+        .values("dia", "loja_id", "categoria_id", "status", "prioridade")
+        .annotate(
+            qtd=Count("id"),
+            qtd_fechadas=Count("data_fechamento"),
+            duracao=Sum(duracao),
+            qtd_com_custo=Count("custo_total"),
+            soma_custo=Sum("custo_total"),
+        )
+        .order_by()
+    )
+
+    with transaction.atomic():
+        resumos.delete()
+        criados = ResumoDiarioOS.objects.bulk_create(
+            [
+                ResumoDiarioOS(
+                    dia=g["dia"],
+                    loja_id=g["loja_id"],
+                    categoria_id=g["categoria_id"],
+                    status=g["status"],
+                    prioridade=g["prioridade"],
+                    qtd=g["qtd"],
+                    qtd_fechadas=g["qtd_fechadas"],
+                    segundos_resolucao=int(g["duracao"].total_seconds()) if g["duracao"] else 0,
+                    qtd_com_custo=g["qtd_com_custo"],
+                    custo_total=g["soma_custo"] or 0,
+                )
+                for g in grupos.iterator()
+            ],
+            batch_size=1000,
+        )
+    return len(criados)
+
+
+# Resumo filtrado pelos mesmos parâmetros da tela de OS (status, loja, dt_ini, dt_fim).
+# Todos os filtros têm granularidade de dia, então o resumo responde exatamente.
+FILTROS_RESUMO_OS = Filtros(
+    status=Exato("status", _OrdemServico.STATUS_CHOICES),
+    loja=Id("loja_id"),
+    dt_ini=DataInicial("dia", com_hora=False),
+    dt_fim=DataFinal("dia", com_hora=False),
+)
+
+
+def resumo_os(params=None):
+    from .models import ResumoDiarioOS
+
+    return FILTROS_RESUMO_OS.aplicar(ResumoDiarioOS.objects.filter(qtd__gt=0), params or {})
+
+
+def mttr_horas(segundos, qtd_fechadas):
+    if not qtd_fechadas:
+        return None
+    return round(segundos / qtd_fechadas / 3600, 1)
@@ -0,0 +1,36 @@
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from ordens.models import OrdemServico
+from .resumo import CAMPOS, registrar_mudanca
+
+
+# Mantém ResumoDiarioOS atualizado a cada gravação/exclusão de OS.
+# Os valores com que a OS foi carregada (OrdemServico.valores_carregados)
+# ficam em "_resumo_valores" para que, ao salvar, a contribuição antiga seja
+# descontada e a nova somada.
+@receiver(pre_save, sender=OrdemServico)
+@receiver(pre_delete, sender=OrdemServico)
+def guardar_valores_os(sender, instance, **kwargs):
+    carregado = instance.valores_carregados()
+    instance._resumo_valores = {c: carregado[c] for c in CAMPOS} if carregado else None
+
+
+@receiver(post_save, sender=OrdemServico)
+def atualizar_resumo_os(sender, instance, created, update_fields=None, **kwargs):
+    anterior = None if created else instance._resumo_valores
+    if anterior is None or update_fields is None:
+        atual = {c: getattr(instance, c) for c in CAMPOS}
+    else:
+        # Só os campos gravados mudaram no banco
+        atual = {
+            c: getattr(instance, c) if (c in update_fields or c.removesuffix("_id") in update_fields) else anterior[c]
+            for c in CAMPOS
+        }
+    registrar_mudanca(anterior, atual)
+    instance.__dict__.setdefault("_carregado", {}).update(atual)
+
+
+@receiver(post_delete, sender=OrdemServico)
+def descontar_resumo_os(sender, instance, **kwargs):
+    registrar_mudanca(instance._resumo_valores, None)
@@ -0,0 +1,198 @@
+from django.db import connections
+from django.db.models import Aggregate, Avg, Count, F, FloatField, Func, Q
+
+from ordens.models import OrdemServico
+
+
+# Tempo de resolução das OS finalizadas calculado no banco: percentis
+# (p50/p90/p99) e histograma por faixa de horas, agrupados por loja,
+# categoria, prioridade ou técnico. Só voltam as linhas já agregadas.
+#
+# PostgreSQL usa percentile_cont. Nos demais bancos (SQLite na demo) o mesmo
+# valor sai de ROW_NUMBER() sobre a consulta filtrada: pega as duas posições
+# vizinhas do percentil e interpola como o percentile_cont faz.
+
+PERCENTIS = (0.5, 0.9, 0.99)
+
+# Limites superiores (horas) das faixas do histograma; a última é aberta
+LIMITES_FAIXAS = (1, 4, 8, 24, 48, 72, 168)
+
+DIMENSOES = {
+    "loja": ("Loja", "loja__nome"),
+    "categoria": ("Categoria", "categoria__nome"),
+    "prioridade": ("Prioridade", "prioridade"),
+    "tecnico": ("Técnico", "tecnico_responsavel__username"),
+}
+
+_SEM_GRUPO = {"categoria": "Sem categoria", "tecnico": "Sem técnico"}
+
+
+def _rotulo_horas(horas: int) -> str:
+    return f"{horas // 24}d" if horas >= 24 and horas % 24 == 0 else f"{horas}h"
+
+
+def rotulos_faixas() -> list[str]:
+    rotulos, anterior = [], 0
+    for limite in LIMITES_FAIXAS:
+        rotulos.append(f"{_rotulo_horas(anterior)}–{_rotulo_horas(limite)}" if anterior else f"< {_rotulo_horas(limite)}")
+        anterior = limite
+    rotulos.append(f"≥ {_rotulo_horas(anterior)}")
+    return rotulos
+
+
+# Segundos entre dois DateTimeField, como número (comparável e ordenável)
+class Segundos(Func):
+    arity = 2
+    output_field = FloatField()
+
+    def as_sql(self, compiler, connection, **extra_context):
+        return super().as_sql(
+            compiler, connection,
+            template="CAST(EXTRACT(EPOCH FROM (%(expressions)s)) AS DOUBLE PRECISION)", arg_joiner=" - ",
+            **extra_context,
+        )
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return super().as_sql(
+            compiler, connection,
+            template="((julianday(%(expressions)s)) * 86400.0)", arg_joiner=") - julianday(",
+            **extra_context,
+        )
+
+
+class PercentileCont(Aggregate):
+    function = "PERCENTILE_CONT"
+    template = "%(function)s(%(percentil)s) WITHIN GROUP (ORDER BY %(expressions)s)"
+    output_field = FloatField()
+
+    def __init__(self, expressao, percentil: float, **extra):
+        super().__init__(expressao, percentil=float(percentil), **extra)
+
+
+def ordens_resolvidas(qs=None):
+    qs = OrdemServico.objects.all() if qs is None else qs
+    return qs.filter(status="FINALIZADA", data_fechamento__isnull=False).annotate(
+        segundos=Segundos(F("data_fechamento"), F("data_abertura")),
+    )
+
+
+def _faixas_q():
+    condicoes, anterior = [], None
+    for limite in LIMITES_FAIXAS:
+        teto = Q(segundos__lt=limite * 3600)
+        condicoes.append(teto if anterior is None else teto & Q(segundos__gte=anterior * 3600))
+        anterior = limite
+    condicoes.append(Q(segundos__gte=anterior * 3600))
+    return condicoes
+
+
+def _por_percentile_cont(base):
+    agregados = {"qtd": Count("id"), "media": Avg("segundos")}
+    for i, p in enumerate(PERCENTIS):
+        agregados[f"p{i}"] = PercentileCont("segundos", p)
+    for i, condicao in enumerate(_faixas_q()):
+        agregados[f"f{i}"] = Count("id", filter=condicao)
+
+    for linha in base.values("grupo").annotate(**agregados):
+        yield (
+            linha["grupo"], linha["qtd"], linha["media"],
+            [linha[f"p{i}"] for i in range(len(PERCENTIS))],
+            [linha[f"f{i}"] for i in range(len(LIMITES_FAIXAS) + 1)],
+        )
+
+
+def _por_posicao(base, connection):
+    sql_base, params = base.values("grupo", "segundos").query.sql_with_params()
+
+    colunas, params_externos = [], []
+    for p in PERCENTIS:
+        # percentile_cont: posição 1 + p * (n - 1), interpolada entre as vizinhas
+        for deslocamento in (1, 2):
+            colunas.append(
+                f"MAX(CASE WHEN pos = {deslocamento} + CAST(%s * (qtd - 1) AS INTEGER) THEN segundos END)"
+            )
+            params_externos.append(p)
+    anterior = None
+    for limite in LIMITES_FAIXAS:
+        condicao = "segundos < %s" if anterior is None else "segundos >= %s AND segundos < %s"
+        colunas.append(f"SUM(CASE WHEN {condicao} THEN 1 ELSE 0 END)")
+        params_externos += [limite * 3600] if anterior is None else [anterior * 3600, limite * 3600]
+        anterior = limite
+    colunas.append("SUM(CASE WHEN segundos >= %s THEN 1 ELSE 0 END)")
+    params_externos.append(anterior * 3600)
+
+    sql = (
+        "SELECT grupo, MAX(qtd), AVG(segundos), " + ", ".join(colunas) + " FROM ("
+        " SELECT grupo, segundos,"
+        " ROW_NUMBER() OVER (PARTITION BY grupo ORDER BY segundos) AS pos,"
+        " COUNT(*) OVER (PARTITION BY grupo) AS qtd"
+        f" FROM ({sql_base}) base"
+        ") ordenado GROUP BY grupo"
+    )
+    with connection.cursor() as cursor:
+        # as colunas externas vêm antes da subconsulta no SQL
+        cursor.execute(sql, (*params_externos, *params))
+        linhas = cursor.fetchall()
+
+    n_perc = len(PERCENTIS)
+    for grupo, qtd, media, *resto in linhas:
+        vizinhas, faixas = resto[:2 * n_perc], resto[2 * n_perc:]
+        valores = []
+        for i, p in enumerate(PERCENTIS):
+            baixo, alto = vizinhas[2 * i], vizinhas[2 * i + 1]
+            fracao = p * (qtd - 1) - int(p * (qtd - 1))
+            valores.append(baixo + fracao * (alto - baixo) if alto is not None else baixo)
+        yield grupo, qtd, media, valores, [int(f or 0) for f in faixas]
+
+
+def _horas(segundos):
+    return round(segundos / 3600, 1) if segundos is not None else None
+
+
+# Uma linha por grupo: {"grupo", "qtd", "media", "p50", "p90", "p99", "faixas": [...]}
+# (tempos em horas), ordenada pelo p90 (pior primeiro)
+def estatisticas_resolucao(dimensao: str, qs=None) -> list[dict]:
+    _, campo = DIMENSOES[dimensao]
+    base = ordens_resolvidas(qs).annotate(grupo=F(campo)).order_by()
+    connection = connections[base.db]
+
+    if connection.vendor == "postgresql":
+        linhas = _por_percentile_cont(base)
+    else:
+        linhas = _por_posicao(base, connection)
+
+    resultado = []
+    for grupo, qtd, media, percentis, faixas in linhas:
+        item = {
+            "grupo": grupo if grupo is not None else _SEM_GRUPO.get(dimensao, "—"),
+            "qtd": qtd,
+            "media": _horas(media),
+            "faixas": faixas,
+        }
+        for p, valor in zip(PERCENTIS, percentis):
+            item[f"p{round(p * 100)}"] = _horas(valor)
+        resultado.append(item)
+
+    if dimensao == "prioridade":
+        rotulos = dict(OrdemServico.PRIORIDADE_CHOICES)
+        for item in resultado:
+            item["grupo"] = rotulos.get(item["grupo"], item["grupo"])
+    return sorted(resultado, key=lambda item: (-(item["p90"] or 0), str(item["grupo"])))
+
+
+# Todas as dimensões, no formato usado pelas telas e pelos CSVs
+def sla_por_dimensao(qs=None) -> list[dict]:
+    return [
+        {"dimensao": dimensao, "titulo": titulo, "linhas": estatisticas_resolucao(dimensao, qs)}
+        for dimensao, (titulo, _) in DIMENSOES.items()
+    ]
+
+
+def linhas_sla_csv(qs=None):
+    cabecalho_faixas = rotulos_faixas()
+    for bloco in sla_por_dimensao(qs):
+        yield [f"TEMPO DE RESOLUÇÃO POR {bloco['titulo'].upper()} (horas, OS finalizadas)"]
+        yield [bloco["titulo"], "OS", "Média", "p50", "p90", "p99", *cabecalho_faixas]
+        for item in bloco["linhas"]:
+            yield [item["grupo"], item["qtd"], item["media"], item["p50"], item["p90"], item["p99"], *item["faixas"]]
+        yield []
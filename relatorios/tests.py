@@ -1,3 +1,110 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db.models.signals import post_init
 from django.test import TestCase
+from django.urls import reverse
+
+from core.exportacao import gerar_csv
+from core.testes import OrcamentoTestCase
+from estoque.models import Loja
+from ordens.models import OrdemServico
+from . import jobs
+from .exportacao import linhas_rel_os
+from .models import ExportacaoJob, ParteExportacao, ResumoDiarioOS
+from .resumo import reconstruir
+
+
+# Consultas e tempo por rota (orçamentos em core/testes.py). As telas são
+# medidas com o cache vazio, o pior caso.
+class OrcamentoRelatoriosTests(OrcamentoTestCase):
+    def test_viagens(self):
+        self.assertOrcamento("relatorios:viagens", self.admin)
+        self.assertOrcamento("relatorios:viagens", self.admin, dados={"export": "csv"})
+
+    def test_os(self):
+        self.assertOrcamento("relatorios:os", self.admin)
+        self.assertOrcamento("relatorios:os", self.admin, dados={"loja": "²"})
+
+    def test_os_csv(self):
+        self.assertOrcamento("relatorios:os_csv", self.admin)
+
+    def test_os_pdf(self):
+        resposta = self.assertOrcamento("relatorios:os_pdf", self.admin)
+        self.assertEqual(resposta["Content-Type"], "application/pdf")
+
+    def test_problemas(self):
+        self.assertOrcamento("relatorios:problemas", self.admin)
+
+    def test_problemas_csv(self):
+        self.assertOrcamento("relatorios:problemas_csv", self.admin)
+
+    def test_exportacoes(self):
+        self.assertOrcamento("relatorios:exportacoes", self.admin)
+
+    def test_exportacao_download(self):
+        self.assertOrcamento("relatorios:exportacao_download", self.admin, kwargs={"pk": self.base["exportacao"].pk})
+
+
+# O worker grava o arquivo no banco; a web serve as partes (sem disco compartilhado)
+class ExportacaoJobTests(OrcamentoTestCase):
+    def test_arquivo_gravado_em_partes(self):
+        job, _ = jobs.enfileirar("os", {}, self.admin)
+        with mock.patch.object(jobs, "TAMANHO_PARTE", 256):
+            self.assertEqual(jobs.executar_job(job.pk), "CONCLUIDA")
+
+        esperado = "".join(gerar_csv(linhas_rel_os({}))).encode()
+        self.assertGreater(ParteExportacao.objects.filter(job=job).count(), 1)
+        resposta = self.cliente(self.admin).get(reverse("relatorios:exportacao_download", args=[job.pk]))
+        self.assertEqual(b"".join(resposta.streaming_content), esperado)
+
+    def test_erro_descarta_partes(self):
+        job, _ = jobs.enfileirar("os", {}, self.admin)
+
+        def falhar(params):
+            yield ["parcial"]
+            raise RuntimeError("banco indisponível")
+
+        tipo = jobs.EXPORTACOES["os"]._replace(gerar=falhar)
+        with mock.patch.dict(jobs.EXPORTACOES, {"os": tipo}), mock.patch.object(jobs, "TAMANHO_PARTE", 1):
+            with self.assertLogs("relatorios.jobs", "ERROR"):
+                self.assertEqual(jobs.executar_job(job.pk), "ERRO")
+        self.assertFalse(ParteExportacao.objects.filter(job=job).exists())
+        self.assertEqual(ExportacaoJob.objects.get(pk=job.pk).status, "ERRO")
+
+
+# O resumo mantido pelos signals tem de bater com o recalculado do zero
+class ResumoDiarioTests(TestCase):
+    def setUp(self):
+        self.loja = Loja.objects.create(nome="Loja 01")
+        self.usuario = User.objects.create_user("loja01")
+
+    def resumo(self):
+        return sorted(
+            ResumoDiarioOS.objects.filter(qtd__gt=0).values_list(
+                "dia", "loja_id", "status", "prioridade", "qtd", "qtd_fechadas", "qtd_com_custo", "custo_total",
+            )
+        )
+
+    def assertResumoConfere(self):
+        incremental = self.resumo()
+        reconstruir(OrdemServico, ResumoDiarioOS)
+        self.assertEqual(incremental, self.resumo())
+
+    def test_sem_post_init_em_ordem_servico(self):
+        self.assertFalse(post_init.has_listeners(OrdemServico))
+
+    def test_gravacoes_e_exclusao(self):
+        os_obj = OrdemServico.objects.create(loja=self.loja, solicitante=self.usuario, descricao_problema="Goteira")
+        os_obj.prioridade = "ALTA"
+        os_obj.save()
+        self.assertResumoConfere()
+
+        parcial = OrdemServico.objects.only("pk").get(pk=os_obj.pk)
+        parcial.status = "EM_ANALISE"
+        parcial.save(update_fields=["status"])
+        self.assertResumoConfere()
 
-# Create your tests here.
+        outra = OrdemServico.objects.create(loja=self.loja, solicitante=self.usuario, descricao_problema="Porta")
+        OrdemServico.objects.only("pk").get(pk=outra.pk).delete()
+        self.assertResumoConfere()
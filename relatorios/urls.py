@@ -12,4 +12,7 @@ urlpatterns = [
 
     path("problemas/", views.rel_problemas, name="problemas"),
     path("problemas.csv", views.rel_problemas_csv, name="problemas_csv"),
+
+    path("exportacoes/", views.exportacoes, name="exportacoes"),
+    path("exportacoes/<int:pk>/download/", views.exportacao_download, name="exportacao_download"),
 ]
@@ -1,5 +1,6 @@
 from django.contrib import admin, messages
 from django.db import transaction
+from core.versoes import nova_versao
 from .models import Viagem, Veiculo
 
 @admin.register(Veiculo)
@@ -19,6 +20,7 @@ class ViagemAdmin(admin.ModelAdmin):
     @admin.action(description="Iniciar viagem")
     def iniciar(self, request, qs):
         updated = qs.filter(status="PLANEJADA").update(status="EM_ANDAMENTO")
+        nova_versao("viagens")  # update() não dispara post_save
         self.message_user(request, f"{updated} viagem(ns) iniciada(s).", level=messages.SUCCESS)
 
     @admin.action(description="Fechar viagem")
@@ -37,4 +39,5 @@ class ViagemAdmin(admin.ModelAdmin):
     @admin.action(description="Cancelar viagem")
     def cancelar(self, request, qs):
         updated = qs.exclude(status="FECHADA").update(status="CANCELADA")
+        nova_versao("viagens")  # update() não dispara post_save
         self.message_user(request, f"{updated} viagem(ns) cancelada(s).", level=messages.WARNING)
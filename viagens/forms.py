@@ -62,6 +62,8 @@ class ViagemForm(forms.ModelForm):
         self.fields["origem"].queryset = Loja.objects.all().order_by("nome")
         self.fields["destino"].queryset = Loja.objects.all().order_by("nome")
         self.fields["responsavel"].queryset = User.objects.filter(is_active=True).order_by("username")
+        # O rótulo de cada OS mostra a loja
+        self.fields["referencia_os"].queryset = OrdemServico.objects.select_related("loja")
 
         # Sugerir origem = central
         try:
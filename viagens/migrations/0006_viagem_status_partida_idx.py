@@ -0,0 +1,21 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estoque', '0009_movimentacao'),
+        ('ordens', '0006_ordemservico_filtros_idx'),
+        ('viagens', '0005_alter_viagem_options'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='viagem',
+            index=models.Index(fields=['status', 'data_partida'], name='viagens_via_status_c843df_idx'),
+        ),
+    ]
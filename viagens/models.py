@@ -65,6 +65,7 @@ class Viagem(models.Model):
             models.Index(fields=["status"]),
             models.Index(fields=["data_partida"]),
             models.Index(fields=["origem", "destino"]),
+            models.Index(fields=["status", "data_partida"]),
         ]
         ordering = ("-data_partida",)
 
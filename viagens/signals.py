@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.versoes import nova_versao
+from .models import Viagem
+
+
+# Invalida o widget de viagens próximas do dashboard
+@receiver(post_save, sender=Viagem)
+@receiver(post_delete, sender=Viagem)
+def viagem_alterada(sender, **kwargs):
+    nova_versao("viagens")
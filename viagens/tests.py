@@ -1,3 +1,16 @@
-from django.test import TestCase
+from core.testes import OrcamentoTestCase
 
-# Create your tests here.
+
+# Consultas e tempo por rota (orçamentos em core/testes.py)
+class OrcamentoViagensTests(OrcamentoTestCase):
+    def test_nova(self):
+        self.assertOrcamento("viagens:viagem_nova", self.admin)
+        self.assertOrcamento("viagens:nova", self.admin)
+
+    def test_nova_a_partir_da_os(self):
+        self.assertOrcamento("viagens:viagem_nova_os", self.admin, kwargs={"os_id": self.base["ordens"][0].pk})
+
+    def test_detalhe(self):
+        pk = self.base["viagens"][1].pk
+        self.assertOrcamento("viagens:viagem_detalhe", self.admin, kwargs={"pk": pk})
+        self.assertOrcamento("viagens:detalhe", self.admin, kwargs={"pk": pk})